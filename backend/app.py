@@ -1,33 +1,282 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify, Response, stream_with_context, send_file, g, current_app
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import cv2
 import base64
 import logging
+import uuid
+import json
+import os
+import time
+import io
+import hmac
+import atexit
+import zipfile
+import zlib
+import threading
+from contextlib import ExitStack, contextmanager
 from config import config
 from models.detector import DeepFakeDetector
-from models.utils import base64_to_image, image_to_base64, draw_detection_results
+from models.detector_pool import DetectorPool
+from models.face_detectors import FACE_DETECTOR_BACKENDS
+from models.adaptive_quality import AdaptiveQualityController
+from models.admission import AdmissionController, LaneFullError
+from models.shared_state import create_redis_client, ResultCache, JobStore
+from models.parallel_video import ParallelVideoAnalyzer
+from models.frame_gate import FrameSimilarityGate
+from models.face_tracker import FaceTracker
+from models.stream_manager import StreamManager, SourcePolicy
+from models.profiling import RequestProfiler
+from models.video_checkpoint import VideoCheckpointStore, CheckpointBusyError
+from models.inference_profile import load_inference_profile, apply_thread_settings, profile_summary
+from models.utils import (base64_to_image, bytes_to_image, image_to_base64,
+                          image_to_jpeg_bytes, draw_detection_results)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class DetectionRequest(Request):
+    """Request with a separate upload cap for the streaming batch endpoint"""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint == 'detect_batch':
+            return current_app.config['BATCH_MAX_CONTENT_LENGTH']
+        return super().max_content_length
+
 # Initialize Flask app
 app = Flask(__name__)
+app.request_class = DetectionRequest
 app.config.from_object(config['default'])
 
 # Enable CORS
 CORS(app, resources={r"/*": {"origins": "*"}})
 
+# Shared state across workers, in-process if Redis is unreachable
+redis_client = create_redis_client(
+    app.config['REDIS_URL'],
+    max_connections=app.config['REDIS_MAX_CONNECTIONS']
+)
+result_cache = ResultCache(
+    redis_client,
+    ttl=app.config['RESULT_CACHE_TTL'],
+    max_local_entries=app.config['RESULT_CACHE_LOCAL_SIZE']
+)
+jobs = JobStore(redis_client)
+
 # Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode='threading',
+    message_queue=app.config['REDIS_URL'] if redis_client is not None else None
+)
+
+# Host-specific inference settings from autotune.py; thread pools must be set before any model runs
+inference_profile = load_inference_profile(app.config['INFERENCE_PROFILE_PATH'])
+if inference_profile is not None:
+    apply_thread_settings(inference_profile)
+    if 'BATCH_INFERENCE_SIZE' not in os.environ:
+        app.config['BATCH_INFERENCE_SIZE'] = inference_profile['best']['batch_size']
+
+# Detector settings shared by the pool and the segment-parallel video workers
+detector_kwargs = {
+    'model_path': app.config['MODEL_PATH'],
+    'confidence_threshold': app.config['CONFIDENCE_THRESHOLD'],
+    'cascade_model_path': app.config['CASCADE_MODEL_PATH'],
+    'cascade_band': app.config['CASCADE_UNCERTAINTY_BAND'],
+    'face_detector': app.config['FACE_DETECTOR'],
+    'face_box_margin': app.config['FACE_BOX_MARGIN'],
+    'face_detector_options': {
+        'min_confidence': app.config['FACE_DETECTOR_MIN_CONFIDENCE'],
+        'dnn_prototxt': app.config['OPENCV_DNN_PROTOTXT'],
+        'dnn_model': app.config['OPENCV_DNN_MODEL']
+    },
+    'allow_untrained': app.config['ALLOW_UNTRAINED_MODEL'],
+    'inference_backend': inference_profile['best']['backend'] if inference_profile else 'predict'
+}
+
+# Initialize a pool of DeepFake Detectors, one per concurrent request
+detector_pool = DetectorPool(
+    lambda: DeepFakeDetector(**detector_kwargs),
+    size=app.config['DETECTOR_POOL_SIZE'],
+    warmup=app.config['DETECTOR_POOL_WARMUP']
+)
+
+def probe_face_detectors(detector):
+    """Face detector backends that load on this host (e.g. opencv_dnn needs its model files)"""
+    available = []
+    for name in FACE_DETECTOR_BACKENDS:
+        try:
+            detector.get_face_detector(name)
+            available.append(name)
+        except Exception as e:
+            logger.warning(f"Face detector '{name}' unavailable: {e}")
+    return available
+
+available_face_detectors = probe_face_detectors(detector_pool.primary)
+
+# Load-aware quality degradation
+quality = AdaptiveQualityController(
+    target_latency_ms=app.config['QUALITY_TARGET_LATENCY_MS'],
+    high_queue_depth=app.config['QUALITY_HIGH_QUEUE_DEPTH'],
+    low_queue_depth=app.config['QUALITY_LOW_QUEUE_DEPTH'],
+    cooldown_seconds=app.config['QUALITY_COOLDOWN_SECONDS'],
+    enabled=app.config['ADAPTIVE_QUALITY']
+)
+
+# Admission control and priority lanes
+admission = AdmissionController(
+    lane_limits={
+        'realtime': app.config['ADMISSION_REALTIME_LIMIT'],
+        'interactive': app.config['ADMISSION_INTERACTIVE_LIMIT'],
+        'batch': app.config['ADMISSION_BATCH_LIMIT']
+    },
+    concurrency=app.config['ADMISSION_CONCURRENCY'],
+    retry_after=app.config['ADMISSION_RETRY_AFTER']
+)
+
+# Opt-in per-request profiling, by token or by sampling one request in N
+profiler = RequestProfiler(
+    profile_dir=app.config['PROFILE_DIR'],
+    token=app.config['PROFILE_TOKEN'],
+    sample_every=app.config['PROFILE_SAMPLE_EVERY'],
+    max_profiles=app.config['PROFILE_MAX_FILES'],
+    tf_trace=app.config['PROFILE_TF_TRACE'],
+    enabled=app.config['PROFILING_ENABLED']
+)
+
+# Resumable video jobs and their persisted results, keyed by content hash
+video_checkpoints = VideoCheckpointStore(app.config['VIDEO_CHECKPOINT_DIR'])
+
+# Segment-parallel video analysis, only when configured with more than one worker
+video_analyzer = None
+video_analyzer_lock = threading.Lock()
 
-# Initialize DeepFake Detector
-detector = DeepFakeDetector(
-    model_path=app.config['MODEL_PATH'],
-    confidence_threshold=app.config['CONFIDENCE_THRESHOLD']
+def get_video_analyzer():
+    """The segment-parallel analyzer, started on first use; None when VIDEO_WORKERS <= 1
+
+    Not started at import: spawned workers re-import this module as
+    __mp_main__, and a pool created during that import cannot bootstrap.
+    """
+    global video_analyzer
+    if app.config['VIDEO_WORKERS'] <= 1:
+        return None
+    with video_analyzer_lock:
+        if video_analyzer is None:
+            video_analyzer = ParallelVideoAnalyzer(
+                workers=app.config['VIDEO_WORKERS'],
+                inference_profile=inference_profile,
+                **detector_kwargs
+            )
+    return video_analyzer
+
+@atexit.register
+def close_video_analyzer():
+    if video_analyzer is not None:
+        video_analyzer.close()
+
+def model_identity():
+    """Model version and threshold, so stored verdicts never outlive the model that made them"""
+    manifest = detector_pool.primary.model_manifest
+    return {
+        'model': manifest['version'] if manifest else app.config['MODEL_PATH'],
+        'confidence_threshold': detector_pool.primary.confidence_threshold
+    }
+
+def lane_full_response(error):
+    """503 response telling the client when to retry"""
+    response = jsonify({'error': str(error), 'lane': error.lane, 'retry_after': error.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+@contextmanager
+def detector_slot(lane):
+    """Take an admission slot for the lane, then check out a detector
+
+    Slots are always taken before detectors, and slot concurrency matches the
+    pool size, so a slot holder never waits long for an instance.
+    """
+    with admission.slot(lane), detector_pool.checkout() as detector:
+        yield detector
+
+def validate_face_detector(name):
+    """Check a per-request face detector choice, None means the configured default"""
+    if name is not None and name not in FACE_DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown face_detector '{name}', expected one of {FACE_DETECTOR_BACKENDS}")
+    if name is not None and name not in available_face_detectors:
+        raise ValueError(f"Face detector '{name}' is not available here, expected one of {available_face_detectors}")
+    return name
+
+def analyze_with_quality(image, lane, face_detector=None):
+    """Analyze an image at the current quality tier"""
+    tier = quality.current_tier()
+    with quality.track(), detector_slot(lane) as detector:
+        result = detector.analyze_frame(
+            image,
+            max_frame_size=tier['max_frame_size'],
+            fast_only=tier['fast_only'],
+            face_detector=face_detector
+        )
+    result['quality_tier'] = tier['name']
+    return result, tier
+
+def publish_stream_result(stream_id, frame, result):
+    """Send a managed stream's result to the clients in its room"""
+    frame_data = None
+    if app.config['STREAM_PUBLISH_FRAMES']:
+        frame_data = image_to_base64(frame, app.config['STREAM_JPEG_QUALITY'], app.config['STREAM_MAX_WIDTH'])
+    socketio.emit('stream_result', {
+        'stream_id': stream_id,
+        'frame': frame_data,
+        'analysis': result
+    }, to=f'stream:{stream_id}')
+
+# Camera/RTSP/file sources scored in shared batches, one realtime slot per batch
+stream_manager = StreamManager(
+    slot=lambda: detector_slot('realtime'),
+    on_result=publish_stream_result,
+    batch_size=app.config['STREAM_BATCH_SIZE']
 )
 
+# Clients may only open server-side sources that are explicitly allowed
+stream_sources = SourcePolicy(
+    media_dir=app.config['STREAM_MEDIA_DIR'],
+    allowed_devices=app.config['STREAM_ALLOWED_DEVICES'],
+    allowed_schemes=app.config['STREAM_ALLOWED_SCHEMES'],
+    allowed_hosts=app.config['STREAM_ALLOWED_HOSTS']
+)
+
+def is_stream_authorized(token):
+    """Managed streams read server-side sources, so every stream operation needs STREAM_TOKEN"""
+    expected = app.config['STREAM_TOKEN']
+    return bool(expected) and token is not None and hmac.compare_digest(
+        str(token).encode('utf-8'), expected.encode('utf-8')
+    )
+
+@app.before_request
+def start_request_profile():
+    if request.path.startswith('/api/admin/'):
+        return
+    token = request.headers.get('X-Profile-Token') or request.args.get('profile')
+    if profiler.should_profile(token):
+        g.profile_session = profiler.start(request.endpoint or 'request')
+
+@app.after_request
+def add_profile_header(response):
+    session = g.get('profile_session')
+    if session is not None:
+        response.headers['X-Profile-Id'] = session.profile_id
+    return response
+
+@app.teardown_request
+def finish_request_profile(error=None):
+    session = g.pop('profile_session', None)
+    if session is not None:
+        profiler.finish(session)
+
 @app.route('/')
 def hello():
     return jsonify({
@@ -38,7 +287,95 @@ def hello():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'model_loaded': detector.model is not None})
+    manifest = detector_pool.primary.model_manifest
+    return jsonify({
+        'status': 'healthy',
+        'model_loaded': detector_pool.primary.model is not None,
+        'model_version': manifest['version'] if manifest else None,
+        'confidence_threshold': detector_pool.primary.confidence_threshold,
+        'face_detectors': available_face_detectors,
+        'inference_profile': profile_summary(inference_profile)
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        'cascade': detector_pool.get_cascade_metrics(),
+        'detector_pool': detector_pool.get_status(),
+        'quality': quality.get_status(),
+        'admission': admission.get_status(),
+        'result_cache': result_cache.get_stats(),
+        'streams': stream_manager.get_status()
+    })
+
+@app.route('/api/streams', methods=['GET'])
+def list_streams():
+    if not is_stream_authorized(request.headers.get('X-Stream-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify(stream_manager.get_status())
+
+@app.route('/api/streams', methods=['POST'])
+def add_stream():
+    """Start ingesting an allowed device, media file or URL; clients join its room with join_stream"""
+    if not is_stream_authorized(request.headers.get('X-Stream-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    data = request.get_json(silent=True) or {}
+    if 'source' not in data:
+        return jsonify({'error': 'No source provided'}), 400
+    if len(stream_manager.streams) >= app.config['STREAM_MAX_SOURCES']:
+        return jsonify({'error': 'Too many streams'}), 503
+    
+    stream_id = str(data.get('stream_id') or uuid.uuid4().hex[:8])
+    try:
+        source = stream_sources.check(data['source'])
+        stream_manager.add_stream(stream_id, source, loop=bool(data.get('loop', False)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'stream_id': stream_id, 'room': f'stream:{stream_id}'}), 201
+
+@app.route('/api/streams/<stream_id>', methods=['DELETE'])
+def remove_stream(stream_id):
+    if not is_stream_authorized(request.headers.get('X-Stream-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    if not stream_manager.remove_stream(stream_id):
+        return jsonify({'error': 'Unknown stream'}), 404
+    return jsonify({'stream_id': stream_id, 'status': 'stopped'})
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    if not profiler.is_authorized(request.headers.get('X-Profile-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify({'enabled': profiler.enabled, 'profiles': profiler.list_profiles()})
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """Download a profile as a text summary (default), raw pstats (format=prof) or zipped TF trace (format=tf)"""
+    if not profiler.is_authorized(request.headers.get('X-Profile-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    kind = request.args.get('format', 'txt')
+    path = profiler.get_path(profile_id, kind)
+    if path is None:
+        return jsonify({'error': 'Unknown profile'}), 404
+    
+    if kind == 'tf':
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            for root, _, files in os.walk(path):
+                for name in files:
+                    full_path = os.path.join(root, name)
+                    zf.write(full_path, os.path.relpath(full_path, path))
+        archive.seek(0)
+        return send_file(archive, mimetype='application/zip', as_attachment=True,
+                         download_name=f'{profile_id}.tf.zip')
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=os.path.basename(path))
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
 
 @app.route('/api/detect/image', methods=['POST'])
 def detect_image():
@@ -49,40 +386,248 @@ def detect_image():
         if not data or 'image' not in data:
             return jsonify({'error': 'No image data provided'}), 400
         
+        try:
+            face_detector = validate_face_detector(data.get('face_detector'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Convert base64 to image
         image = base64_to_image(data['image'])
         
-        # Analyze image
-        result = detector.analyze_frame(image)
-        
-        # Draw results on image if requested
-        if data.get('return_image', False):
-            result_image = draw_detection_results(image, result)
-            result['annotated_image'] = image_to_base64(result_image)
+        with admission.admit('interactive'):
+            # Full-quality results are shared across workers by content hash
+            identity = model_identity()
+            cache_key = result_cache.make_key(
+                f"{identity['model']}:{identity['confidence_threshold']}:"
+                f"{face_detector or app.config['FACE_DETECTOR']}:{data['image']}"
+            )
+            result = result_cache.get(cache_key)
+            if result is not None:
+                tier = quality.current_tier()
+                result['cached'] = True
+            else:
+                # Analyze image
+                result, tier = analyze_with_quality(image, 'interactive', face_detector)
+                # Failed analyses must not be served to everyone as verdicts
+                if tier['name'] == 'full' and not result.get('error'):
+                    result_cache.set(cache_key, result)
+            
+            # Draw results on image if requested and the current tier allows it
+            if data.get('return_image', False):
+                if tier['render_image']:
+                    result_image = draw_detection_results(image, result)
+                    result['annotated_image'] = image_to_base64(result_image)
+                else:
+                    result['annotated_image'] = None
         
         return jsonify(result)
         
+    except LaneFullError as e:
+        return lane_full_response(e)
     except Exception as e:
         logger.error(f"Error in image detection: {e}")
         return jsonify({'error': str(e)}), 500
 
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+# Per-member failures: encrypted, unsupported compression, corrupt or truncated data
+ZIP_MEMBER_ERRORS = (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error, EOFError)
+
+def read_limited(stream, max_bytes):
+    """Read a whole stream, but never more than max_bytes + 1 bytes into memory"""
+    data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"Image larger than {max_bytes} bytes")
+    return data
+
+def iter_batch_uploads(files, max_image_bytes):
+    """Yield (filename, image bytes, error) one at a time from uploaded images and zip archives
+
+    Items that are too large or unreadable come back with bytes None and an
+    error message instead of ending the stream.
+    """
+    for upload in files:
+        if upload.filename.lower().endswith('.zip'):
+            # Uploads are spooled to disk, so members are read lazily from the archive
+            with zipfile.ZipFile(upload.stream) as archive:
+                for member in archive.infolist():
+                    if member.is_dir() or os.path.splitext(member.filename)[1].lower() not in IMAGE_EXTENSIONS:
+                        continue
+                    if member.file_size > max_image_bytes:
+                        yield member.filename, None, f"Image larger than {max_image_bytes} bytes"
+                        continue
+                    try:
+                        # The declared size can lie, so the read itself is capped too
+                        with archive.open(member) as f:
+                            image_bytes, error = read_limited(f, max_image_bytes), None
+                    except ValueError as e:
+                        image_bytes, error = None, str(e)
+                    except ZIP_MEMBER_ERRORS as e:
+                        image_bytes, error = None, f"Unreadable archive member: {e}"
+                    yield member.filename, image_bytes, error
+        else:
+            try:
+                image_bytes, error = read_limited(upload.stream, max_image_bytes), None
+            except ValueError as e:
+                image_bytes, error = None, str(e)
+            yield upload.filename, image_bytes, error
+
+def iter_chunks(items, size):
+    """Group an iterator into lists of at most `size` items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+@app.route('/api/detect/batch', methods=['POST'])
+def detect_batch():
+    """Endpoint for many images or a zip archive, streaming NDJSON results"""
+    files = request.files.getlist('images') + request.files.getlist('archive')
+    if not files:
+        return jsonify({'error': 'No images or archive provided'}), 400
+    
+    try:
+        face_detector = validate_face_detector(request.form.get('face_detector'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Admit up front so a full lane is shed before streaming starts
+    stack = ExitStack()
+    try:
+        stack.enter_context(admission.admit('batch'))
+    except LaneFullError as e:
+        return lane_full_response(e)
+    
+    def generate():
+        with stack:
+            start_time = time.time()
+            processed = 0
+            deepfakes = 0
+            errors = 0
+            
+            try:
+                # Only one chunk of decoded images is held in memory at a time
+                uploads = iter_batch_uploads(files, app.config['BATCH_MAX_IMAGE_BYTES'])
+                for chunk in iter_chunks(uploads, app.config['BATCH_INFERENCE_SIZE']):
+                    names, images = [], []
+                    for filename, image_bytes, read_error in chunk:
+                        try:
+                            if read_error:
+                                raise ValueError(read_error)
+                            images.append(bytes_to_image(image_bytes))
+                            names.append(filename)
+                        except (ValueError, cv2.error) as e:
+                            errors += 1
+                            yield json.dumps({'filename': filename, 'error': str(e)}) + '\n'
+                    
+                    if not images:
+                        continue
+                    
+                    tier = quality.current_tier()
+                    with quality.track(), detector_slot('batch') as detector:
+                        results = detector.analyze_frames(
+                            images,
+                            max_frame_size=tier['max_frame_size'],
+                            fast_only=tier['fast_only'],
+                            face_detector=face_detector
+                        )
+                    
+                    for filename, result in zip(names, results):
+                        processed += 1
+                        deepfakes += int(result['deepfake_detected'])
+                        result['filename'] = filename
+                        result['quality_tier'] = tier['name']
+                        yield json.dumps(result) + '\n'
+            
+            except zipfile.BadZipFile as e:
+                errors += 1
+                yield json.dumps({'error': f'Invalid archive: {e}'}) + '\n'
+            
+            yield json.dumps({'summary': {
+                'images_processed': processed,
+                'deepfakes_detected': deepfakes,
+                'errors': errors,
+                'elapsed_seconds': round(time.time() - start_time, 3)
+            }}) + '\n'
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    # Releases the lane even if the client disconnects before streaming starts
+    response.call_on_close(stack.close)
+    return response
+
 @app.route('/api/detect/video', methods=['POST'])
 def detect_video():
     """Endpoint for video file detection"""
+    job_id = None
+    checkpoint_lock = None
     try:
         if 'video' not in request.files:
             return jsonify({'error': 'No video file provided'}), 400
         
         video_file = request.files['video']
         
-        # Save temporary video file
-        video_path = f"/tmp/{video_file.filename}"
-        video_file.save(video_path)
+        # Clients may pick the job id to poll /api/jobs/<job_id> while uploading
+        job_id = request.form.get('job_id') or uuid.uuid4().hex
         
-        # Process video
-        results = []
-        for frame, result in detector.process_video_stream(video_path=video_path):
-            results.append(result)
+        # Shed before saving the upload if the batch lane is full
+        with admission.admit('batch'):
+            # Save temporary video file
+            video_path = f"/tmp/{video_file.filename}"
+            video_file.save(video_path)
+            
+            reuse_threshold = app.config['FRAME_REUSE_THRESHOLD']
+            analyzer = get_video_analyzer()
+            checkpoint_key = video_checkpoints.make_key(
+                video_path,
+                analyzer='segments' if analyzer is not None else 'stream',
+                reuse_threshold=reuse_threshold,
+                face_detector=app.config['FACE_DETECTOR'],
+                **model_identity()
+            )
+            # One analysis per key at a time; a concurrent retry would interleave the frame log
+            checkpoint_lock = video_checkpoints.acquire(checkpoint_key)
+            
+            # Same content analyzed the same way before: serve the stored result
+            stored = video_checkpoints.load_result(checkpoint_key)
+            if stored is not None:
+                jobs.update(job_id, status='completed', frames_processed=stored.get('total_frames', 0),
+                            deepfake_detected=stored.get('deepfake_detected'),
+                            deepfake_percentage=stored.get('deepfake_percentage'))
+                return jsonify(dict(stored, job_id=job_id, from_store=True))
+            
+            # Resume an interrupted analysis from its last checkpoint
+            frames_logged, results = video_checkpoints.load_resume_state(checkpoint_key) if analyzer is None else (0, [])
+            jobs.update(job_id, status='processing', frames_processed=frames_logged, resumed_from=frames_logged)
+            
+            if analyzer is not None:
+                # Segments run in the worker pool, outside this process's detector,
+                # at the quality tier current when the video was submitted
+                tier = quality.current_tier()
+                results = analyzer.analyze_frames(video_path, reuse_threshold=reuse_threshold,
+                                                  max_frame_size=tier['max_frame_size'],
+                                                  fast_only=tier['fast_only'])
+            else:
+                # Process video, checking out a pooled detector per frame so
+                # higher lanes get slots between frames
+                for frame, result in detector_pool.primary.process_video_stream(
+                    video_path=video_path,
+                    quality=quality,
+                    slot=lambda: detector_slot('batch'),
+                    gate=FrameSimilarityGate(reuse_threshold=reuse_threshold) if reuse_threshold > 0 else None,
+                    start_frame=frames_logged
+                ):
+                    results.append(result)
+                    if len(results) % app.config['JOB_PROGRESS_INTERVAL'] == 0:
+                        jobs.update(job_id, frames_processed=len(results))
+                    if len(results) - frames_logged >= app.config['VIDEO_CHECKPOINT_INTERVAL']:
+                        video_checkpoints.save_checkpoint(
+                            checkpoint_key, {'frames_logged': len(results)}, frames=results[frames_logged:]
+                        )
+                        frames_logged = len(results)
         
         # Calculate overall video result
         if results:
@@ -95,16 +640,62 @@ def detect_video():
                 'deepfake_percentage': deepfake_percentage,
                 'total_frames': total_frames,
                 'deepfake_frames': deepfake_frames,
+                'frames_reused': sum(1 for r in results if r.get('reused')),
                 'frame_results': results
             }
+            jobs.update(
+                job_id,
+                status='completed',
+                frames_processed=total_frames,
+                deepfake_detected=overall_result['deepfake_detected'],
+                deepfake_percentage=deepfake_percentage
+            )
+            video_checkpoints.save_result(checkpoint_key, overall_result)
         else:
             overall_result = {'error': 'No frames processed'}
+            jobs.update(job_id, status='failed', error=overall_result['error'])
         
+        overall_result['job_id'] = job_id
         return jsonify(overall_result)
         
+    except LaneFullError as e:
+        if job_id:
+            jobs.update(job_id, status='failed', error=str(e))
+        return lane_full_response(e)
+    except CheckpointBusyError:
+        error = 'This video is already being analyzed with the same settings'
+        jobs.update(job_id, status='failed', error=error)
+        return jsonify({'error': error}), 409
     except Exception as e:
         logger.error(f"Error in video detection: {e}")
+        if job_id:
+            jobs.update(job_id, status='failed', error=str(e))
         return jsonify({'error': str(e)}), 500
+    finally:
+        if checkpoint_lock is not None:
+            checkpoint_lock.release()
+
+def decode_socket_image(image_data):
+    """Decode an image sent as a binary attachment or as a base64 string"""
+    if isinstance(image_data, (bytes, bytearray)):
+        return bytes_to_image(bytes(image_data))
+    return base64_to_image(image_data)
+
+def get_output_options(data):
+    """Per-event output frame options, defaulting to the configured values"""
+    data = data or {}
+    return {
+        'binary': bool(data.get('binary', False)),
+        'boxes_only': bool(data.get('boxes_only', False)),
+        'jpeg_quality': min(100, max(1, int(data.get('jpeg_quality', app.config['STREAM_JPEG_QUALITY'])))),
+        'max_width': int(data.get('max_width', app.config['STREAM_MAX_WIDTH']))
+    }
+
+def encode_output_frame(image, options):
+    """Encode a frame for SocketIO as raw JPEG bytes (a binary attachment) or base64"""
+    if options['binary']:
+        return image_to_jpeg_bytes(image, options['jpeg_quality'], options['max_width'])
+    return image_to_base64(image, options['jpeg_quality'], options['max_width'])
 
 @socketio.on('connect')
 def handle_connect():
@@ -115,23 +706,57 @@ def handle_connect():
 def handle_disconnect():
     logger.info('Client disconnected')
 
+@socketio.on('join_stream')
+def handle_join_stream(data):
+    """Subscribe to a managed stream's 'stream_result' events"""
+    if not is_stream_authorized((data or {}).get('token')):
+        emit('error', {'message': 'Forbidden'})
+        return
+    stream_id = str((data or {}).get('stream_id'))
+    if stream_id not in stream_manager.streams:
+        emit('error', {'message': f"Unknown stream '{stream_id}'"})
+        return
+    join_room(f'stream:{stream_id}')
+    emit('status', {'message': f'Joined stream {stream_id}'})
+
+@socketio.on('leave_stream')
+def handle_leave_stream(data):
+    leave_room(f"stream:{(data or {}).get('stream_id')}")
+
 @socketio.on('start_stream')
 def handle_start_stream(data):
     """Handle real-time video stream via WebSocket"""
     try:
         logger.info('Starting real-time stream')
+        options = get_output_options(data)
         
-        # Process frames in real-time
-        for frame, result in detector.process_video_stream(camera_index=0):
-            # Convert frame to base64 for streaming
-            frame_base64 = image_to_base64(frame)
-            
-            # Emit result to client
-            emit('frame_result', {
-                'frame': frame_base64,
-                'analysis': result
-            })
+        # Per-stream face tracks; unchanged faces reuse their last score
+        tracker = None
+        if app.config['FACE_TRACKING']:
+            tracker = FaceTracker(
+                confidence_threshold=detector_pool.primary.confidence_threshold,
+                change_threshold=app.config['FACE_TRACK_CHANGE_THRESHOLD'],
+                refresh_interval=app.config['FACE_TRACK_REFRESH_INTERVAL'],
+                ema_alpha=app.config['FACE_TRACK_EMA_ALPHA']
+            )
+        
+        with admission.admit('realtime'):
+            # Process frames in real-time
+            for frame, result in detector_pool.primary.process_video_stream(
+                camera_index=0,
+                quality=quality,
+                slot=lambda: detector_slot('realtime'),
+                tracker=tracker
+            ):
+                # Frames come from the server's camera, so the client has no copy to
+                # overlay boxes on; boxes_only only applies to analyze_frame
+                emit('frame_result', {
+                    'frame': encode_output_frame(frame, options),
+                    'analysis': result
+                })
             
+    except LaneFullError as e:
+        emit('error', {'message': str(e), 'lane': e.lane, 'retry_after': e.retry_after})
     except Exception as e:
         logger.error(f"Error in real-time stream: {e}")
         emit('error', {'message': str(e)})
@@ -139,26 +764,44 @@ def handle_start_stream(data):
 @socketio.on('analyze_frame')
 def handle_analyze_frame(data):
     """Analyze a single frame sent via WebSocket"""
+    session = None
+    if profiler.should_profile((data or {}).get('profile')):
+        session = profiler.start('socket_analyze_frame')
+    try:
+        analyze_socket_frame(data)
+    finally:
+        if session is not None:
+            profiler.finish(session)
+
+def analyze_socket_frame(data):
     try:
         if 'image' not in data:
             emit('error', {'message': 'No image data provided'})
             return
         
-        # Convert base64 to image
-        image = base64_to_image(data['image'])
+        # Binary attachments skip base64 decoding entirely
+        image = decode_socket_image(data['image'])
         
-        # Analyze frame
-        result = detector.analyze_frame(image)
+        face_detector = validate_face_detector(data.get('face_detector'))
+        options = get_output_options(data)
         
-        # Draw results on image
-        result_image = draw_detection_results(image, result)
-        result_base64 = image_to_base64(result_image)
+        with admission.admit('realtime'):
+            # Analyze frame
+            result, tier = analyze_with_quality(image, 'realtime', face_detector)
+            
+            # Draw results on image unless the client only wants boxes or the tier skips rendering
+            annotated_frame = None
+            if tier['render_image'] and not options['boxes_only']:
+                result_image = draw_detection_results(image, result)
+                annotated_frame = encode_output_frame(result_image, options)
         
         emit('analysis_result', {
-            'annotated_frame': result_base64,
+            'annotated_frame': annotated_frame,
             'analysis': result
         })
         
+    except LaneFullError as e:
+        emit('error', {'message': str(e), 'lane': e.lane, 'retry_after': e.retry_after})
     except Exception as e:
         logger.error(f"Error in frame analysis: {e}")
         emit('error', {'message': str(e)})
@@ -0,0 +1,152 @@
+# backend/autotune.py
+"""Sweep inference settings on this machine and write the best one as a profile
+
+Usage:
+    python backend/autotune.py --model_path models/pretrained/deepfake_model.h5 \\
+        --output models/pretrained/inference_profile.json [--latency_budget_ms 100]
+
+Every combination of TF intra/inter-op threads, batch size and inference
+backend ('predict' or a direct model call) is timed on synthetic face crops
+at the model's input size. Thread pools can only be set before TensorFlow
+starts, so each thread setting runs in a fresh process. The fastest setting
+(faces per second) whose p95 batch latency fits the budget is written as
+'best'; the server applies it at startup from INFERENCE_PROFILE_PATH.
+"""
+import os
+import json
+import time
+import socket
+import platform
+import argparse
+import itertools
+import multiprocessing as mp
+
+import numpy as np
+from config import Config
+from models.inference_profile import INFERENCE_BACKENDS
+
+def synthetic_crops(count, width, height, seed=0):
+    """Skin-toned noise crops, already scaled to [0, 1] like preprocess_face output"""
+    rng = np.random.default_rng(seed)
+    crops = rng.normal(loc=(0.45, 0.55, 0.7), scale=0.1, size=(count, height, width, 3))
+    return np.clip(crops, 0.0, 1.0).astype(np.float32)
+
+def time_thread_setting(task):
+    """Time every batch size and backend under one thread setting, in a fresh process"""
+    model_path, intra_op, inter_op, batch_sizes, backends, runs, warmup = task
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+    from models.detector import DeepFakeDetector
+    # Haar is the cheapest face detector to construct; only the model is timed
+    detector = DeepFakeDetector(model_path=model_path, face_detector='haar')
+    model = detector.model
+    width, height = detector.input_size
+
+    results = []
+    for batch_size, backend in itertools.product(batch_sizes, backends):
+        detector.inference_backend = backend
+        batch = synthetic_crops(batch_size, width, height)
+        for _ in range(warmup):
+            detector.run_model(model, batch)
+
+        timings = []
+        for _ in range(runs):
+            start_time = time.perf_counter()
+            detector.run_model(model, batch)
+            timings.append((time.perf_counter() - start_time) * 1000)
+
+        results.append({
+            'intra_op_threads': intra_op,
+            'inter_op_threads': inter_op,
+            'batch_size': batch_size,
+            'backend': backend,
+            'input_size': [width, height],
+            'p50_ms': round(float(np.percentile(timings, 50)), 3),
+            'p95_ms': round(float(np.percentile(timings, 95)), 3),
+            'faces_per_second': round(batch_size / (np.median(timings) / 1000), 2)
+        })
+    return results
+
+def pick_best(results, latency_budget_ms):
+    """Highest throughput within the latency budget, or the lowest-latency setting if none fits"""
+    within_budget = [r for r in results if r['p95_ms'] <= latency_budget_ms]
+    if within_budget:
+        return max(within_budget, key=lambda r: (r['faces_per_second'], -r['p95_ms']))
+    return min(results, key=lambda r: r['p95_ms'])
+
+def default_thread_counts():
+    cpus = os.cpu_count() or 1
+    return sorted({1, 2, max(1, cpus // 2), cpus})
+
+def run_autotune(model_path, output, thread_counts, inter_op_counts, batch_sizes, backends,
+                 latency_budget_ms, runs, warmup):
+    tasks = [
+        (model_path, intra_op, inter_op, batch_sizes, backends, runs, warmup)
+        for intra_op, inter_op in itertools.product(thread_counts, inter_op_counts)
+    ]
+    print(f"🔧 Sweeping {len(tasks)} thread settings x {len(batch_sizes)} batch sizes x {len(backends)} backends")
+
+    results = []
+    context = mp.get_context('spawn')
+    for task in tasks:
+        with context.Pool(1) as pool:
+            setting_results = pool.apply(time_thread_setting, (task,))
+        results.extend(setting_results)
+        fastest = max(setting_results, key=lambda r: r['faces_per_second'])
+        print(f"intra_op={task[1]:<3} inter_op={task[2]:<2} best batch={fastest['batch_size']:<3} "
+              f"backend={fastest['backend']:<8} {fastest['faces_per_second']:.1f} faces/s p95={fastest['p95_ms']:.1f}ms")
+
+    best = pick_best(results, latency_budget_ms)
+    profile = {
+        'name': f"{socket.gethostname()}-{time.strftime('%Y%m%d-%H%M%S')}",
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'model_path': model_path,
+        'latency_budget_ms': latency_budget_ms,
+        'host': {
+            'hostname': socket.gethostname(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count()
+        },
+        'best': {key: best[key] for key in
+                 ('intra_op_threads', 'inter_op_threads', 'batch_size', 'backend', 'input_size',
+                  'p95_ms', 'faces_per_second')},
+        'results': results
+    }
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(profile, f, indent=2)
+    print(f"✅ Best: {profile['best']}")
+    print(f"📄 Profile saved to {output}")
+    return profile
+
+def main():
+    parser = argparse.ArgumentParser(description='Autotune inference settings for this machine')
+    parser.add_argument('--model_path', type=str, default=Config.MODEL_PATH,
+                       help='Model (artifact directory or .h5) to tune for')
+    parser.add_argument('--output', type=str, default=Config.INFERENCE_PROFILE_PATH,
+                       help='Where to write the profile')
+    parser.add_argument('--threads', type=int, nargs='+', default=default_thread_counts(),
+                       help='Intra-op thread counts to try')
+    parser.add_argument('--inter_op_threads', type=int, nargs='+', default=[1, 2],
+                       help='Inter-op thread counts to try')
+    parser.add_argument('--batch_sizes', type=int, nargs='+', default=[1, 4, 8, 16, 32],
+                       help='Batch sizes to try')
+    parser.add_argument('--backends', type=str, nargs='+', default=INFERENCE_BACKENDS,
+                       choices=INFERENCE_BACKENDS, help='Inference backends to try')
+    parser.add_argument('--latency_budget_ms', type=float, default=100,
+                       help='Maximum acceptable p95 latency per batch')
+    parser.add_argument('--runs', type=int, default=30,
+                       help='Timed runs per setting')
+    parser.add_argument('--warmup', type=int, default=3,
+                       help='Untimed runs per setting')
+
+    args = parser.parse_args()
+    run_autotune(args.model_path, args.output, args.threads, args.inter_op_threads, args.batch_sizes,
+                 args.backends, args.latency_budget_ms, args.runs, args.warmup)
+
+if __name__ == '__main__':
+    main()
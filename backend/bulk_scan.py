@@ -0,0 +1,261 @@
+# backend/bulk_scan.py
+"""Scan a directory tree of images and videos for deepfakes using a process pool
+
+Usage:
+    python backend/bulk_scan.py /path/to/archive --output results.jsonl --workers 4
+
+Results are written as each file finishes. Interrupted runs resume from the
+checkpoint file, skipping files that already have results.
+"""
+import os
+import json
+import time
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+
+import cv2
+import numpy as np
+from config import Config
+from models.artifact import check_model_path
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm'}
+
+# Each worker process holds its own detector
+worker_detector = None
+
+def init_worker(model_path, confidence_threshold):
+    """Create the detector once per worker process"""
+    global worker_detector
+    from models.detector import DeepFakeDetector
+    worker_detector = DeepFakeDetector(model_path=model_path, confidence_threshold=confidence_threshold)
+
+def scan_image(path):
+    image = cv2.imread(str(path))
+    if image is None:
+        raise ValueError("Could not read image")
+
+    result = worker_detector.analyze_frame(image)
+    return {
+        'deepfake_detected': result['deepfake_detected'],
+        'confidence': result['confidence'],
+        'faces_detected': result['faces_detected']
+    }
+
+def scan_video(path, sample_rate):
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise ValueError("Could not open video file")
+
+    frame_count = 0
+    frames_analyzed = 0
+    deepfake_frames = 0
+    confidence_sum = 0.0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        frame_count += 1
+        if frame_count % sample_rate != 0:
+            continue
+
+        result = worker_detector.analyze_frame(frame)
+        frames_analyzed += 1
+        deepfake_frames += int(result['deepfake_detected'])
+        confidence_sum += result['confidence']
+    cap.release()
+
+    deepfake_percentage = (deepfake_frames / frames_analyzed) * 100 if frames_analyzed else 0.0
+    return {
+        'deepfake_detected': deepfake_percentage > 50,  # Majority voting, as in /api/detect/video
+        'confidence': confidence_sum / frames_analyzed if frames_analyzed else 0.0,
+        'deepfake_percentage': deepfake_percentage,
+        'frames_analyzed': frames_analyzed,
+        'total_frames': frame_count
+    }
+
+def scan_file(task):
+    """Scan one file in a worker process"""
+    path, relative_path, sample_rate = task
+    media_type = 'video' if Path(path).suffix.lower() in VIDEO_EXTENSIONS else 'image'
+    start_time = time.time()
+
+    record = {'path': relative_path, 'type': media_type}
+    try:
+        if media_type == 'video':
+            record.update(scan_video(path, sample_rate))
+        else:
+            record.update(scan_image(path))
+    except Exception as e:
+        record['error'] = str(e)
+
+    record['elapsed_ms'] = round((time.time() - start_time) * 1000, 2)
+    return record
+
+def find_media_files(root):
+    """All image and video files under root, in a stable order"""
+    extensions = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
+    return sorted(p for p in Path(root).rglob('*') if p.is_file() and p.suffix.lower() in extensions)
+
+def load_checkpoint(checkpoint_path):
+    """Relative paths of files that already have results"""
+    if not checkpoint_path.exists():
+        return set()
+    with open(checkpoint_path) as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+class JsonlWriter:
+    """Appends one JSON line per result"""
+
+    def __init__(self, output_path):
+        self.file = open(output_path, 'a')
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+        return [record['path']]
+
+    def close(self):
+        self.file.close()
+        return []
+
+# Fixed schema so every part file of a Parquet dataset lines up
+RESULT_COLUMNS = [
+    'path', 'type', 'deepfake_detected', 'confidence', 'faces_detected',
+    'deepfake_percentage', 'frames_analyzed', 'total_frames', 'error', 'elapsed_ms'
+]
+
+class ParquetWriter:
+    """Buffers results and writes each batch as its own closed Parquet part file
+
+    A part file is only complete once closed, so checkpointing happens per part
+    and an interrupted run never leaves unreadable results behind.
+    """
+
+    def __init__(self, output_dir, rows_per_part=500):
+        import pyarrow  # noqa: F401  (fail early if Parquet support is missing)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.rows_per_part = rows_per_part
+        self.buffer = []
+        self.part_index = len(list(self.output_dir.glob('part-*.parquet')))
+
+    def write(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.rows_per_part:
+            return self.flush()
+        return []
+
+    def flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self.buffer:
+            return []
+        rows = [{column: record.get(column) for column in RESULT_COLUMNS} for record in self.buffer]
+        table = pa.Table.from_pylist(rows)
+        pq.write_table(table, self.output_dir / f'part-{self.part_index:05d}.parquet')
+        self.part_index += 1
+
+        written = [record['path'] for record in self.buffer]
+        self.buffer = []
+        return written
+
+    def close(self):
+        return self.flush()
+
+def summarize(records, elapsed):
+    """Throughput and per-file timing statistics"""
+    summary = {
+        'files_scanned': len(records),
+        'errors': sum(1 for r in records if 'error' in r),
+        'deepfakes_detected': sum(1 for r in records if r.get('deepfake_detected')),
+        'elapsed_seconds': round(elapsed, 2),
+        'files_per_second': round(len(records) / elapsed, 2) if elapsed > 0 else 0.0
+    }
+
+    for media_type in ('image', 'video'):
+        timings = [r['elapsed_ms'] for r in records if r['type'] == media_type]
+        if timings:
+            summary[f'{media_type}_timing_ms'] = {
+                'count': len(timings),
+                'mean': round(float(np.mean(timings)), 2),
+                'p50': round(float(np.percentile(timings, 50)), 2),
+                'p95': round(float(np.percentile(timings, 95)), 2),
+                'max': round(float(np.max(timings)), 2)
+            }
+
+    return summary
+
+def run_scan(root, output, workers, sample_rate, model_path, confidence_threshold, checkpoint=None):
+    root = Path(root)
+    output = Path(output)
+    checkpoint_path = Path(checkpoint) if checkpoint else output.with_name(output.name + '.checkpoint')
+
+    done = load_checkpoint(checkpoint_path)
+    files = find_media_files(root)
+    tasks = [
+        (str(path), str(path.relative_to(root)), sample_rate)
+        for path in files
+        if str(path.relative_to(root)) not in done
+    ]
+    print(f"📂 Found {len(files)} media files, {len(done)} already scanned, {len(tasks)} to go")
+
+    # Checked here: a worker initializer that fails would be respawned forever
+    check_model_path(model_path)
+
+    if output.suffix == '.parquet':
+        writer = ParquetWriter(output)
+    else:
+        writer = JsonlWriter(output)
+
+    records = []
+    start_time = time.time()
+    # Spawned workers avoid sharing TensorFlow/MediaPipe state across fork
+    context = mp.get_context('spawn')
+    with open(checkpoint_path, 'a') as checkpoint_file:
+        try:
+            with context.Pool(workers, initializer=init_worker,
+                              initargs=(model_path, confidence_threshold)) as pool:
+                for record in pool.imap_unordered(scan_file, tasks):
+                    records.append(record)
+                    for path in writer.write(record):
+                        checkpoint_file.write(path + '\n')
+                    checkpoint_file.flush()
+
+                    if len(records) % 50 == 0:
+                        rate = len(records) / (time.time() - start_time)
+                        print(f"Progress: {len(records)}/{len(tasks)} files ({rate:.1f} files/s)")
+        finally:
+            for path in writer.close():
+                checkpoint_file.write(path + '\n')
+
+    summary = summarize(records, time.time() - start_time)
+    print(f"📊 Scan summary: {json.dumps(summary, indent=2)}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan a directory of images and videos for deepfakes')
+    parser.add_argument('root', type=str,
+                       help='Directory to scan recursively')
+    parser.add_argument('--output', type=str, default='scan_results.jsonl',
+                       help='Results file (.jsonl) or Parquet dataset (.parquet)')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                       help='Checkpoint file (defaults to <output>.checkpoint)')
+    parser.add_argument('--workers', type=int, default=max(1, os.cpu_count() // 2),
+                       help='Number of worker processes, each with its own detector')
+    parser.add_argument('--sample_rate', type=int, default=3,
+                       help='Analyze every nth video frame')
+    parser.add_argument('--model_path', type=str, default=Config.MODEL_PATH,
+                       help='Path to the detection model')
+    parser.add_argument('--threshold', type=float, default=Config.CONFIDENCE_THRESHOLD,
+                       help='Confidence threshold')
+
+    args = parser.parse_args()
+    run_scan(args.root, args.output, args.workers, args.sample_rate,
+             args.model_path, args.threshold, checkpoint=args.checkpoint)
+
+if __name__ == '__main__':
+    main()
@@ -9,18 +9,110 @@ class Config:
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
     
     # Model Configuration
+    # MODEL_PATH is a serving artifact directory (see models/artifact.py) or a Keras .h5 file
     MODEL_PATH = os.getenv('MODEL_PATH', 'models/pretrained/deepfake_model.h5')
-    CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', '0.85'))
+    # Unset uses the threshold from the artifact manifest (0.85 for .h5 models)
+    CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD')) if os.getenv('CONFIDENCE_THRESHOLD') else None
+    # Startup fails if MODEL_PATH is missing, unless serving random weights is explicitly allowed
+    ALLOW_UNTRAINED_MODEL = os.getenv('ALLOW_UNTRAINED_MODEL', 'False').lower() == 'true'
+    # Written by autotune.py; applied at startup when present
+    INFERENCE_PROFILE_PATH = os.getenv('INFERENCE_PROFILE_PATH', 'models/pretrained/inference_profile.json')
+    # Serving artifact written by `train_deepfake.py --mode distill` (the .h5 lacks its RGB preprocessing)
+    REALTIME_MODEL_PATH = os.getenv('REALTIME_MODEL_PATH', 'models/pretrained/realtime_student')
+    
+    # Detector pool: independent detector instances for concurrent requests
+    DETECTOR_POOL_SIZE = int(os.getenv('DETECTOR_POOL_SIZE', '2'))
+    DETECTOR_POOL_WARMUP = os.getenv('DETECTOR_POOL_WARMUP', 'True').lower() == 'true'
+    
+    # Face detection backend: mediapipe_short, mediapipe_full, opencv_dnn or haar.
+    # Endpoints can override it per request with a `face_detector` field.
+    FACE_DETECTOR = os.getenv('FACE_DETECTOR', 'mediapipe_full')
+    FACE_DETECTOR_MIN_CONFIDENCE = float(os.getenv('FACE_DETECTOR_MIN_CONFIDENCE', '0.7'))
+    FACE_BOX_MARGIN = float(os.getenv('FACE_BOX_MARGIN', '0.15'))  # box expansion per side, fraction of face size
+    OPENCV_DNN_PROTOTXT = os.getenv('OPENCV_DNN_PROTOTXT', 'models/pretrained/deploy.prototxt')
+    OPENCV_DNN_MODEL = os.getenv('OPENCV_DNN_MODEL', 'models/pretrained/res10_300x300_ssd_iter_140000.caffemodel')
+    
+    # Face tracking on the realtime stream: a tracked face is re-scored only when its
+    # crop changes by FACE_TRACK_CHANGE_THRESHOLD or every FACE_TRACK_REFRESH_INTERVAL frames
+    FACE_TRACKING = os.getenv('FACE_TRACKING', 'True').lower() == 'true'
+    FACE_TRACK_CHANGE_THRESHOLD = float(os.getenv('FACE_TRACK_CHANGE_THRESHOLD', '0.08'))
+    FACE_TRACK_REFRESH_INTERVAL = int(os.getenv('FACE_TRACK_REFRESH_INTERVAL', '15'))
+    FACE_TRACK_EMA_ALPHA = float(os.getenv('FACE_TRACK_EMA_ALPHA', '0.3'))
+    
+    # Model cascade: a cheap model scores every face, only scores within
+    # CASCADE_UNCERTAINTY_BAND of the threshold go to MODEL_PATH
+    CASCADE_MODEL_PATH = os.getenv('CASCADE_MODEL_PATH', '')
+    CASCADE_UNCERTAINTY_BAND = float(os.getenv('CASCADE_UNCERTAINTY_BAND', '0.1'))
     
     # Video Processing
     FRAME_RATE = int(os.getenv('FRAME_RATE', '10'))
+    VIDEO_WORKERS = int(os.getenv('VIDEO_WORKERS', '1'))  # >1 analyzes uploads as parallel segments
+    FRAME_REUSE_THRESHOLD = float(os.getenv('FRAME_REUSE_THRESHOLD', '0.02'))  # 0 disables near-duplicate reuse
     MAX_FRAME_SIZE = int(os.getenv('MAX_FRAME_SIZE', '640'))
+    # Video jobs checkpoint every VIDEO_CHECKPOINT_INTERVAL frames and resume on resubmission
+    VIDEO_CHECKPOINT_DIR = os.getenv('VIDEO_CHECKPOINT_DIR', 'video_checkpoints')
+    VIDEO_CHECKPOINT_INTERVAL = int(os.getenv('VIDEO_CHECKPOINT_INTERVAL', '300'))
+    
+    # Managed multi-source streams (/api/streams), scored in shared batches
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '8'))
+    STREAM_MAX_SOURCES = int(os.getenv('STREAM_MAX_SOURCES', '16'))
+    STREAM_PUBLISH_FRAMES = os.getenv('STREAM_PUBLISH_FRAMES', 'True').lower() == 'true'
+    # Stream management and join_stream require STREAM_TOKEN (disabled while empty).
+    # Sources are limited to files under STREAM_MEDIA_DIR, the listed device indices
+    # and URLs whose scheme and host are both listed; empty lists allow nothing.
+    STREAM_TOKEN = os.getenv('STREAM_TOKEN', '')
+    STREAM_MEDIA_DIR = os.getenv('STREAM_MEDIA_DIR', '')
+    STREAM_ALLOWED_DEVICES = [int(d) for d in os.getenv('STREAM_ALLOWED_DEVICES', '').split(',') if d.strip()]
+    STREAM_ALLOWED_SCHEMES = [s.strip().lower() for s in os.getenv('STREAM_ALLOWED_SCHEMES', 'rtsp,http,https').split(',') if s.strip()]
+    STREAM_ALLOWED_HOSTS = [h.strip().lower() for h in os.getenv('STREAM_ALLOWED_HOSTS', '').split(',') if h.strip()]
+    
+    # Per-request profiling: requests carrying PROFILE_TOKEN (X-Profile-Token header,
+    # ?profile= query or a 'profile' field on SocketIO events) or one in PROFILE_SAMPLE_EVERY
+    # are profiled into a ring of PROFILE_MAX_FILES under PROFILE_DIR
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+    PROFILE_SAMPLE_EVERY = int(os.getenv('PROFILE_SAMPLE_EVERY', '0'))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '50'))
+    PROFILE_TF_TRACE = os.getenv('PROFILE_TF_TRACE', 'False').lower() == 'true'
+    
+    # SocketIO output frames; clients can override per event with
+    # jpeg_quality, max_width, binary and boxes_only
+    STREAM_JPEG_QUALITY = int(os.getenv('STREAM_JPEG_QUALITY', '75'))
+    STREAM_MAX_WIDTH = int(os.getenv('STREAM_MAX_WIDTH', '640'))
+    
+    # Adaptive quality: step down to cheaper settings when queue depth or
+    # p95 latency exceed these limits, step back up when load falls
+    ADAPTIVE_QUALITY = os.getenv('ADAPTIVE_QUALITY', 'True').lower() == 'true'
+    QUALITY_TARGET_LATENCY_MS = float(os.getenv('QUALITY_TARGET_LATENCY_MS', '500'))
+    QUALITY_HIGH_QUEUE_DEPTH = int(os.getenv('QUALITY_HIGH_QUEUE_DEPTH', '4'))
+    QUALITY_LOW_QUEUE_DEPTH = int(os.getenv('QUALITY_LOW_QUEUE_DEPTH', '1'))
+    QUALITY_COOLDOWN_SECONDS = float(os.getenv('QUALITY_COOLDOWN_SECONDS', '2.0'))
     
     # API Configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # /api/detect/batch spools uploads to disk and decodes one chunk at a time, so
+    # memory stays bounded; this cap only limits temporary disk use (default 2GB)
+    BATCH_MAX_CONTENT_LENGTH = int(os.getenv('BATCH_MAX_CONTENT_LENGTH', str(2 * 1024 * 1024 * 1024)))
+    # Largest single image (upload part or uncompressed zip member) the batch endpoint reads
+    BATCH_MAX_IMAGE_BYTES = int(os.getenv('BATCH_MAX_IMAGE_BYTES', str(20 * 1024 * 1024)))
+    BATCH_INFERENCE_SIZE = int(os.getenv('BATCH_INFERENCE_SIZE', '16'))  # images decoded and scored together
+    
+    # Admission control: max in-flight jobs per traffic lane before shedding
+    # with 503/Retry-After, and how many detector calls may run at once
+    # (defaults to the detector pool size)
+    ADMISSION_REALTIME_LIMIT = int(os.getenv('ADMISSION_REALTIME_LIMIT', '8'))
+    ADMISSION_INTERACTIVE_LIMIT = int(os.getenv('ADMISSION_INTERACTIVE_LIMIT', '16'))
+    ADMISSION_BATCH_LIMIT = int(os.getenv('ADMISSION_BATCH_LIMIT', '2'))
+    ADMISSION_CONCURRENCY = int(os.getenv('ADMISSION_CONCURRENCY', str(DETECTOR_POOL_SIZE)))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '2'))
     
     # Redis for SocketIO (if using multiple workers)
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '20'))
+    RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', '3600'))
+    RESULT_CACHE_LOCAL_SIZE = int(os.getenv('RESULT_CACHE_LOCAL_SIZE', '1024'))
+    JOB_PROGRESS_INTERVAL = int(os.getenv('JOB_PROGRESS_INTERVAL', '30'))  # frames between updates
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,349 @@
+# backend/load_test.py
+"""Drive a running server with simulated clients and record throughput and latency
+
+Usage:
+    python backend/load_test.py --url http://localhost:5000 --clients 16 --duration 60 \\
+        --mix image=6,video=1,socket=3 --output load_results.json [--server_pid 1234]
+    python backend/load_test.py --compare baseline.json load_results.json
+
+Each client repeatedly picks a scenario from the weighted mix: an
+/api/detect/image request, an /api/detect/video upload or an analyze_frame
+round trip over its own SocketIO connection. Media is synthetic. Images are
+unique per request unless --repeat_images is set (which exercises the result
+cache). Server-side admission/quality state is sampled from /api/metrics, and
+CPU/RSS of --server_pid from /proc when available.
+"""
+import os
+import json
+import time
+import base64
+import random
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+
+import cv2
+import numpy as np
+import requests
+
+SCENARIOS = ['image', 'video', 'socket']
+
+def synthetic_image(rng, width=640, height=480):
+    """Noisy background with a face-like shape at a random position"""
+    image = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (31, 31), 0)
+    cx, cy = int(rng.integers(width // 4, 3 * width // 4)), int(rng.integers(height // 4, 3 * height // 4))
+    cv2.ellipse(image, (cx, cy), (60, 80), 0, 0, 360, (150, 180, 220), -1)
+    for dx in (-25, 25):
+        cv2.circle(image, (cx + dx, cy - 20), 8, (40, 40, 40), -1)
+    cv2.ellipse(image, (cx, cy + 35), (25, 10), 0, 0, 180, (60, 60, 150), -1)
+    return image
+
+def encode_image(image):
+    _, buffer = cv2.imencode('.jpg', image)
+    return base64.b64encode(buffer).decode('utf-8')
+
+def synthetic_video(path, rng, frames=60, fps=15, width=480, height=360):
+    """Short clip with a slowly drifting face-like shape"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    base = synthetic_image(rng, width, height)
+    for i in range(frames):
+        writer.write(np.roll(base, i * 2, axis=1))
+    writer.release()
+    with open(path, 'rb') as f:
+        return f.read()
+
+class Recorder:
+    """Thread-safe per-scenario latencies, status codes and errors"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def record(self, scenario, latency_ms, status, ok):
+        with self.lock:
+            self.statuses[scenario][str(status)] += 1
+            if ok:
+                self.latencies[scenario].append(latency_ms)
+            else:
+                self.errors[scenario] += 1
+
+    def summary(self, elapsed):
+        def stats(latencies, errors, statuses):
+            total = len(latencies) + errors
+            result = {
+                'requests': total,
+                'errors': errors,
+                'error_rate': round(errors / total, 4) if total else 0.0,
+                'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                'status_codes': dict(statuses)
+            }
+            if latencies:
+                result['latency_ms'] = {
+                    'mean': round(float(np.mean(latencies)), 2),
+                    'p50': round(float(np.percentile(latencies, 50)), 2),
+                    'p90': round(float(np.percentile(latencies, 90)), 2),
+                    'p95': round(float(np.percentile(latencies, 95)), 2),
+                    'p99': round(float(np.percentile(latencies, 99)), 2),
+                    'max': round(float(np.max(latencies)), 2)
+                }
+            return result
+
+        with self.lock:
+            scenarios = {
+                name: stats(self.latencies[name], self.errors[name], self.statuses[name])
+                for name in set(self.latencies) | set(self.errors)
+            }
+            all_latencies = [l for name in self.latencies for l in self.latencies[name]]
+            all_statuses = defaultdict(int)
+            for name in self.statuses:
+                for status, count in self.statuses[name].items():
+                    all_statuses[status] += count
+            overall = stats(all_latencies, sum(self.errors.values()), all_statuses)
+        return scenarios, overall
+
+class ProcessSampler:
+    """Samples CPU and RSS of a local server process from /proc (Linux only)"""
+
+    def __init__(self, pid, interval=1.0):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.ticks = os.sysconf('SC_CLK_TCK')
+
+    def read(self):
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self.ticks  # utime + stime
+        with open(f'/proc/{self.pid}/status') as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        return cpu_seconds, rss_kb / 1024
+
+    def run(self):
+        last_cpu, _ = self.read()
+        last_time = time.monotonic()
+        while not self.stop_event.wait(self.interval):
+            try:
+                cpu, rss_mb = self.read()
+            except (OSError, StopIteration):
+                break
+            now = time.monotonic()
+            self.samples.append({'cpu_percent': (cpu - last_cpu) / (now - last_time) * 100, 'rss_mb': rss_mb})
+            last_cpu, last_time = cpu, now
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        if not self.samples:
+            return None
+        cpu = [s['cpu_percent'] for s in self.samples]
+        rss = [s['rss_mb'] for s in self.samples]
+        return {
+            'cpu_percent': {'mean': round(float(np.mean(cpu)), 1), 'max': round(float(np.max(cpu)), 1)},
+            'rss_mb': {'mean': round(float(np.mean(rss)), 1), 'max': round(float(np.max(rss)), 1)}
+        }
+
+class SimulatedClient:
+    """One closed-loop client: pick a scenario, run it, think, repeat"""
+
+    def __init__(self, client_id, args, mix, recorder, video_bytes, deadline):
+        self.client_id = client_id
+        self.args = args
+        self.mix = mix
+        self.recorder = recorder
+        self.video_bytes = video_bytes
+        self.deadline = deadline
+        self.rng = np.random.default_rng(args.seed + client_id)
+        self.chooser = random.Random(args.seed + client_id)
+        self.session = requests.Session()
+        self.socket = None
+        self.socket_reply = threading.Event()
+        self.socket_ok = False
+        self.shared_image = encode_image(synthetic_image(np.random.default_rng(args.seed)))
+
+    def next_image(self):
+        if self.args.repeat_images:
+            return self.shared_image
+        return encode_image(synthetic_image(self.rng))
+
+    def run_image(self):
+        response = self.session.post(f'{self.args.url}/api/detect/image',
+                                     json={'image': self.next_image()}, timeout=self.args.timeout)
+        return response.status_code, response.status_code == 200
+
+    def run_video(self):
+        response = self.session.post(
+            f'{self.args.url}/api/detect/video',
+            files={'video': (f'load_{self.client_id}.mp4', self.video_bytes, 'video/mp4')},
+            timeout=self.args.timeout
+        )
+        return response.status_code, response.status_code == 200
+
+    def connect_socket(self):
+        import socketio  # python-socketio client, only needed for the socket scenario
+        self.socket = socketio.Client(reconnection=False)
+
+        def on_reply(ok):
+            def handler(data):
+                self.socket_ok = ok
+                self.socket_reply.set()
+            return handler
+
+        self.socket.on('analysis_result', on_reply(True))
+        self.socket.on('error', on_reply(False))
+        self.socket.connect(self.args.url)
+
+    def run_socket(self):
+        if self.socket is None:
+            self.connect_socket()
+        self.socket_reply.clear()
+        self.socket.emit('analyze_frame', {'image': self.next_image(), 'boxes_only': True})
+        if not self.socket_reply.wait(self.args.timeout):
+            return 'timeout', False
+        return ('ok' if self.socket_ok else 'error'), self.socket_ok
+
+    def run(self):
+        scenarios = list(self.mix)
+        weights = [self.mix[s] for s in scenarios]
+        while time.monotonic() < self.deadline:
+            scenario = self.chooser.choices(scenarios, weights)[0]
+            start_time = time.perf_counter()
+            try:
+                status, ok = getattr(self, f'run_{scenario}')()
+            except Exception as e:
+                status, ok = type(e).__name__, False
+            self.recorder.record(scenario, (time.perf_counter() - start_time) * 1000, status, ok)
+            if self.args.think_ms:
+                time.sleep(self.chooser.expovariate(1000.0 / self.args.think_ms))
+
+        if self.socket is not None:
+            self.socket.disconnect()
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}', expected one of {SCENARIOS}")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+def fetch_metrics(url):
+    try:
+        return requests.get(f'{url}/api/metrics', timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return None
+
+def run_load_test(args):
+    mix = parse_mix(args.mix)
+    recorder = Recorder()
+
+    video_bytes = None
+    if 'video' in mix:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            video_bytes = synthetic_video(os.path.join(tmp_dir, 'load.mp4'), np.random.default_rng(args.seed),
+                                          frames=args.video_frames)
+
+    sampler = ProcessSampler(args.server_pid) if args.server_pid else None
+    if sampler:
+        sampler.start()
+    metrics_before = fetch_metrics(args.url)
+
+    print(f"🚀 {args.clients} clients for {args.duration}s against {args.url} with mix {mix}")
+    start_time = time.monotonic()
+    deadline = start_time + args.duration
+    threads = []
+    for client_id in range(args.clients):
+        client = SimulatedClient(client_id, args, mix, recorder, video_bytes, deadline)
+        thread = threading.Thread(target=client.run, daemon=True)
+        thread.start()
+        threads.append(thread)
+        # Ramp up gradually so the first seconds don't measure a thundering herd
+        time.sleep(args.ramp_up / max(1, args.clients))
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start_time
+
+    scenarios, overall = recorder.summary(elapsed)
+    results = {
+        'config': {key: value for key, value in vars(args).items() if key not in ('compare', 'output')},
+        'mix': mix,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(time.time() - elapsed)),
+        'elapsed_seconds': round(elapsed, 2),
+        'overall': overall,
+        'scenarios': scenarios,
+        'server': {
+            'process': sampler.stop() if sampler else None,
+            'metrics_before': metrics_before,
+            'metrics_after': fetch_metrics(args.url)
+        }
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Results saved to {args.output}")
+    print(json.dumps({'overall': overall, 'scenarios': scenarios}, indent=2))
+    return results
+
+def compare_results(baseline_path, candidate_path):
+    """Print throughput, p95 latency and error-rate changes per scenario"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    rows = [('overall', baseline['overall'], candidate['overall'])]
+    rows += [(name, baseline['scenarios'][name], candidate['scenarios'][name])
+             for name in SCENARIOS if name in baseline['scenarios'] and name in candidate['scenarios']]
+
+    for name, before, after in rows:
+        p95_before = before.get('latency_ms', {}).get('p95', 0.0)
+        p95_after = after.get('latency_ms', {}).get('p95', 0.0)
+        print(f"{name:<8} throughput {before['throughput_rps']:.2f} -> {after['throughput_rps']:.2f} rps  "
+              f"p95 {p95_before:.1f} -> {p95_after:.1f} ms  "
+              f"errors {before['error_rate']:.2%} -> {after['error_rate']:.2%}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a running deepfake detection server')
+    parser.add_argument('--url', type=str, default='http://localhost:5000',
+                       help='Base URL of the server')
+    parser.add_argument('--clients', type=int, default=8,
+                       help='Number of concurrent simulated clients')
+    parser.add_argument('--duration', type=float, default=30,
+                       help='Test duration in seconds')
+    parser.add_argument('--ramp_up', type=float, default=5,
+                       help='Seconds over which clients are started')
+    parser.add_argument('--mix', type=str, default='image=6,video=1,socket=3',
+                       help='Weighted scenario mix, e.g. image=6,video=1,socket=3')
+    parser.add_argument('--think_ms', type=float, default=0,
+                       help='Mean think time between a client\'s requests (exponential)')
+    parser.add_argument('--repeat_images', action='store_true',
+                       help='Send the same image every time instead of unique ones')
+    parser.add_argument('--video_frames', type=int, default=60,
+                       help='Frames in the synthetic upload video')
+    parser.add_argument('--timeout', type=float, default=60,
+                       help='Per-request timeout in seconds')
+    parser.add_argument('--server_pid', type=int, default=None,
+                       help='PID of a local server process to sample CPU/RSS from')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default='load_results.json',
+                       help='Where to write the JSON results')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                       help='Compare two result files instead of running a test')
+
+    args = parser.parse_args()
+    if args.compare:
+        compare_results(*args.compare)
+    else:
+        run_load_test(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# backend/models/adaptive_quality.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+# Quality tiers from best to cheapest. max_frame_size caps the resolution used
+# for face detection, frame_skip analyzes every nth stream frame, fast_only
+# trusts the cascade model without escalation and render_image controls
+# whether annotated images are drawn for `return_image` requests.
+QUALITY_TIERS = [
+    {'name': 'full', 'max_frame_size': None, 'frame_skip': 1, 'fast_only': False, 'render_image': True},
+    {'name': 'reduced', 'max_frame_size': 480, 'frame_skip': 2, 'fast_only': False, 'render_image': True},
+    {'name': 'low', 'max_frame_size': 320, 'frame_skip': 3, 'fast_only': True, 'render_image': False},
+    {'name': 'minimal', 'max_frame_size': 240, 'frame_skip': 5, 'fast_only': True, 'render_image': False},
+]
+
+class AdaptiveQualityController:
+    """Steps through cheaper quality tiers as load rises and back up as it falls"""
+
+    def __init__(self, target_latency_ms=500, high_queue_depth=4, low_queue_depth=1,
+                 cooldown_seconds=2.0, window_size=50, min_samples=5, tiers=None, enabled=True):
+        self.tiers = tiers or QUALITY_TIERS
+        self.target_latency_ms = target_latency_ms
+        self.high_queue_depth = high_queue_depth
+        self.low_queue_depth = low_queue_depth
+        self.cooldown_seconds = cooldown_seconds
+        self.min_samples = min_samples
+        self.enabled = enabled
+
+        self.lock = threading.Lock()
+        self.level = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=window_size)
+        self.last_change = 0.0
+        self.tier_changes = 0
+
+    @contextmanager
+    def track(self):
+        """Count a unit of work as in flight and record its latency"""
+        with self.lock:
+            self.in_flight += 1
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            with self.lock:
+                self.in_flight -= 1
+                self.latencies.append(elapsed_ms)
+
+    def current_tier(self):
+        """Get the tier to use for the next unit of work"""
+        with self.lock:
+            if self.enabled:
+                self._update()
+            return self.tiers[self.level]
+
+    def _recent_latency(self):
+        """p95 of the latencies recorded at the current tier, or None if too few"""
+        if len(self.latencies) < self.min_samples:
+            return None
+        return float(np.percentile(self.latencies, 95))
+
+    def _update(self):
+        now = time.monotonic()
+        if now - self.last_change < self.cooldown_seconds:
+            return
+
+        latency = self._recent_latency()
+        overloaded = self.in_flight >= self.high_queue_depth or (
+            latency is not None and latency > self.target_latency_ms
+        )
+        underloaded = self.in_flight <= self.low_queue_depth and (
+            latency is not None and latency < self.target_latency_ms * 0.5
+        )
+
+        if overloaded and self.level < len(self.tiers) - 1:
+            self.level += 1
+        elif underloaded and self.level > 0:
+            self.level -= 1
+        else:
+            return
+
+        # Latencies from the previous tier no longer describe the current one
+        self.latencies.clear()
+        self.last_change = now
+        self.tier_changes += 1
+
+    def get_status(self):
+        """Get controller state for monitoring"""
+        with self.lock:
+            latency = self._recent_latency()
+            return {
+                'enabled': self.enabled,
+                'tier': self.tiers[self.level]['name'],
+                'level': self.level,
+                'in_flight': self.in_flight,
+                'p95_latency_ms': round(latency, 2) if latency is not None else None,
+                'target_latency_ms': self.target_latency_ms,
+                'tier_changes': self.tier_changes
+            }
+
+# Load spike scenario with a simulated detector
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Simulated service time per tier; a single lock plays the shared detector
+    service_ms = {'full': 40, 'reduced': 25, 'low': 12, 'minimal': 8}
+    model_lock = threading.Lock()
+
+    def run_phase(controller, clients, requests_per_client):
+        latencies = []
+
+        def client():
+            for _ in range(requests_per_client):
+                tier = controller.current_tier()
+                start_time = time.perf_counter()
+                with controller.track():
+                    with model_lock:
+                        time.sleep(service_ms[tier['name']] / 1000)
+                latencies.append((time.perf_counter() - start_time) * 1000)
+
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            for _ in range(clients):
+                pool.submit(client)
+        return float(np.percentile(latencies, 99))
+
+    for enabled in (False, True):
+        controller = AdaptiveQualityController(target_latency_ms=200, cooldown_seconds=0.2, enabled=enabled)
+        print(f"Adaptive quality {'enabled' if enabled else 'disabled'}:")
+        for phase, clients, requests_per_client in (('baseline', 1, 20), ('spike', 16, 20), ('recovery', 1, 100)):
+            p99 = run_phase(controller, clients, requests_per_client)
+            print(f"  {phase:<9} clients={clients:<3} p99={p99:.1f}ms tier={controller.get_status()['tier']}")
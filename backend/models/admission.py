@@ -0,0 +1,87 @@
+# backend/models/admission.py
+import threading
+from contextlib import contextmanager
+
+# Traffic classes, highest priority first
+LANES = ['realtime', 'interactive', 'batch']
+
+class LaneFullError(Exception):
+    """Raised when a traffic lane is at capacity and the job is shed"""
+
+    def __init__(self, lane, retry_after):
+        super().__init__(f"The {lane} lane is at capacity, retry in {retry_after}s")
+        self.lane = lane
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Caps in-flight jobs per traffic lane and runs work in lane priority order
+
+    `admit(lane)` wraps a whole job (an image request, a video upload, a
+    stream) and sheds it immediately when the lane is full. `slot(lane)` wraps
+    each unit of detector work inside a job; when work is waiting, slots go to
+    realtime frames first, then interactive images, then batch video frames.
+    """
+
+    def __init__(self, lane_limits, concurrency=1, retry_after=2):
+        self.lane_limits = dict(lane_limits)
+        self.concurrency = concurrency
+        self.retry_after = retry_after
+
+        self.condition = threading.Condition()
+        self.running = 0
+        self.admitted = {lane: 0 for lane in LANES}
+        self.waiting = {lane: 0 for lane in LANES}
+        self.rejected = {lane: 0 for lane in LANES}
+        self.completed = {lane: 0 for lane in LANES}
+
+    @contextmanager
+    def admit(self, lane):
+        """Admit a job into its lane or raise LaneFullError"""
+        with self.condition:
+            if self.admitted[lane] >= self.lane_limits[lane]:
+                self.rejected[lane] += 1
+                raise LaneFullError(lane, self.retry_after)
+            self.admitted[lane] += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.admitted[lane] -= 1
+                self.completed[lane] += 1
+
+    @contextmanager
+    def slot(self, lane):
+        """Wait for a detector slot, yielding to higher-priority lanes"""
+        higher_lanes = LANES[:LANES.index(lane)]
+        with self.condition:
+            self.waiting[lane] += 1
+            while self.running >= self.concurrency or any(self.waiting[l] for l in higher_lanes):
+                self.condition.wait()
+            self.waiting[lane] -= 1
+            self.running += 1
+            # Lower lanes may have been blocked only by this waiter
+            self.condition.notify_all()
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.running -= 1
+                self.condition.notify_all()
+
+    def get_status(self):
+        """Get lane occupancy and rejection counts for monitoring"""
+        with self.condition:
+            return {
+                'concurrency': self.concurrency,
+                'running': self.running,
+                'lanes': {
+                    lane: {
+                        'limit': self.lane_limits[lane],
+                        'in_flight': self.admitted[lane],
+                        'waiting': self.waiting[lane],
+                        'rejected': self.rejected[lane],
+                        'completed': self.completed[lane]
+                    }
+                    for lane in LANES
+                }
+            }
@@ -0,0 +1,174 @@
+# backend/models/artifact.py
+"""Serving artifact format for detection models
+
+An artifact is a directory holding:
+
+    manifest.json       format, version, input size, preprocessing, threshold
+                        and the shape/dtype of every weight tensor
+    architecture.json   the Keras model config (model.to_json())
+    weights/NNNN.npy    one array per weight tensor, in model.get_weights() order
+
+Loading rebuilds the graph from the config and copies memory-mapped arrays
+straight into the variables, so there is no HDF5 parsing, optimizer state or
+recompilation. Any mismatch raises instead of leaving layers uninitialised.
+"""
+import os
+import json
+import time
+import numpy as np
+
+ARTIFACT_FORMAT = 1
+MANIFEST_NAME = 'manifest.json'
+ARCHITECTURE_NAME = 'architecture.json'
+WEIGHTS_DIR = 'weights'
+
+# What DeepFakeDetector.preprocess_face feeds the model: BGR crops scaled to [0, 1]
+DEFAULT_PREPROCESSING = {'color_order': 'bgr', 'rescale': 1.0 / 255}
+
+class ArtifactError(ValueError):
+    """A serving artifact is missing, incomplete or does not match its manifest"""
+
+def is_artifact(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_NAME))
+
+def save_artifact(model, artifact_dir, threshold=0.85, version=None, preprocessing=None):
+    """Write model as a serving artifact and return its manifest"""
+    weights_dir = os.path.join(artifact_dir, WEIGHTS_DIR)
+    os.makedirs(weights_dir, exist_ok=True)
+
+    weights = model.get_weights()
+    for index, array in enumerate(weights):
+        np.save(os.path.join(weights_dir, f'{index:04d}.npy'), np.ascontiguousarray(array))
+
+    with open(os.path.join(artifact_dir, ARCHITECTURE_NAME), 'w') as f:
+        f.write(model.to_json())
+
+    height, width = model.input_shape[1:3]
+    manifest = {
+        'format': ARTIFACT_FORMAT,
+        'version': version or time.strftime('%Y%m%d-%H%M%S'),
+        'name': model.name,
+        'input_size': [width, height],
+        'preprocessing': preprocessing or DEFAULT_PREPROCESSING,
+        'threshold': threshold,
+        'weights': [{'shape': list(array.shape), 'dtype': str(array.dtype)} for array in weights]
+    }
+    # Manifest last, so a half-written artifact is never mistaken for a complete one
+    with open(os.path.join(artifact_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def read_manifest(artifact_dir):
+    manifest_path = os.path.join(artifact_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise ArtifactError(f"No {MANIFEST_NAME} in {artifact_dir}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != ARTIFACT_FORMAT:
+        raise ArtifactError(f"Unsupported artifact format {manifest.get('format')} in {artifact_dir}")
+    return manifest
+
+def check_model_path(model_path, allow_untrained=False):
+    """Fail before starting worker pools if their detectors could not load the model
+
+    A Pool initializer that raises is respawned forever and map() hangs, so
+    callers check here, in the parent, where the error reaches them.
+    """
+    if not model_path or not os.path.exists(model_path):
+        if allow_untrained:
+            return
+        raise FileNotFoundError(
+            f"Model not found at {model_path!r}; set ALLOW_UNTRAINED_MODEL=true to serve an untrained model"
+        )
+    if os.path.isdir(model_path):
+        read_manifest(model_path)
+
+def load_artifact(artifact_dir):
+    """Load (model, manifest) from a serving artifact; the model is not compiled"""
+    import tensorflow as tf
+
+    manifest = read_manifest(artifact_dir)
+    with open(os.path.join(artifact_dir, ARCHITECTURE_NAME)) as f:
+        model = tf.keras.models.model_from_json(f.read())
+
+    expected = manifest['weights']
+    if len(expected) != len(model.weights):
+        raise ArtifactError(
+            f"{artifact_dir}: manifest lists {len(expected)} weight tensors, model has {len(model.weights)}"
+        )
+
+    weights = []
+    for index, spec in enumerate(expected):
+        path = os.path.join(artifact_dir, WEIGHTS_DIR, f'{index:04d}.npy')
+        if not os.path.exists(path):
+            raise ArtifactError(f"Missing weight file {path}")
+        array = np.load(path, mmap_mode='r')
+        if list(array.shape) != spec['shape'] or str(array.dtype) != spec['dtype']:
+            raise ArtifactError(f"{path}: expected {spec['shape']} {spec['dtype']}, found {list(array.shape)} {array.dtype}")
+        weights.append(array)
+    model.set_weights(weights)
+
+    return model, manifest
+
+def run_load(kind, path):
+    """Time one cold load in a fresh process (imports are timed separately)"""
+    start_time = time.perf_counter()
+    import tensorflow as tf
+    import_ms = (time.perf_counter() - start_time) * 1000
+
+    start_time = time.perf_counter()
+    if kind == 'artifact':
+        model, _ = load_artifact(path)
+    elif kind == 'h5_compile':
+        model = tf.keras.models.load_model(path)
+    else:
+        model = tf.keras.models.load_model(path, compile=False)
+    load_ms = (time.perf_counter() - start_time) * 1000
+
+    # First prediction includes graph tracing, which is also part of a cold start
+    height, width = model.input_shape[1:3]
+    start_time = time.perf_counter()
+    model.predict(np.zeros((1, height or 128, width or 128, 3), dtype=np.float32), verbose=0)
+    first_predict_ms = (time.perf_counter() - start_time) * 1000
+    return import_ms, load_ms, first_predict_ms
+
+# Conversion and cold-start benchmark:
+#   python -m models.artifact export models/pretrained/deepfake_model.h5 models/pretrained/deepfake_model [--threshold 0.85]
+#   python -m models.artifact benchmark models/pretrained/deepfake_model.h5 models/pretrained/deepfake_model [--runs 3]
+if __name__ == "__main__":
+    import argparse
+    import multiprocessing as mp
+
+    parser = argparse.ArgumentParser(description='Export and benchmark serving artifacts')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export')
+    export_parser.add_argument('h5_path', type=str)
+    export_parser.add_argument('artifact_dir', type=str)
+    export_parser.add_argument('--threshold', type=float, default=0.85)
+    export_parser.add_argument('--version', type=str, default=None)
+    export_parser.add_argument('--color_order', type=str, default='bgr', choices=['bgr', 'rgb'])
+
+    benchmark_parser = subparsers.add_parser('benchmark')
+    benchmark_parser.add_argument('h5_path', type=str)
+    benchmark_parser.add_argument('artifact_dir', type=str)
+    benchmark_parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        import tensorflow as tf
+        model = tf.keras.models.load_model(args.h5_path, compile=False)
+        manifest = save_artifact(model, args.artifact_dir, threshold=args.threshold, version=args.version,
+                                 preprocessing=dict(DEFAULT_PREPROCESSING, color_order=args.color_order))
+        print(f"Exported {args.h5_path} to {args.artifact_dir} (version {manifest['version']})")
+    else:
+        # A fresh spawned process per run, so every load is a real cold start
+        context = mp.get_context('spawn')
+        for kind, path in (('h5_compile', args.h5_path), ('h5', args.h5_path), ('artifact', args.artifact_dir)):
+            timings = []
+            for _ in range(args.runs):
+                with context.Pool(1) as pool:
+                    timings.append(pool.apply(run_load, (kind, path)))
+            import_ms, load_ms, first_predict_ms = np.mean(timings, axis=0)
+            print(f"{kind:<11} import={import_ms:.0f}ms load={load_ms:.0f}ms "
+                  f"first_predict={first_predict_ms:.0f}ms total={import_ms + load_ms + first_predict_ms:.0f}ms")
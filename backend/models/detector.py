@@ -2,36 +2,98 @@ import cv2
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import load_model
-import mediapipe as mp
 from PIL import Image
 import logging
+import threading
+import time
+from contextlib import nullcontext
+from .face_detectors import create_face_detector, expand_box
+from .artifact import is_artifact, load_artifact, DEFAULT_PREPROCESSING
+from .parallel_video import open_at_frame
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DeepFakeDetector:
-    def __init__(self, model_path=None, confidence_threshold=0.85):
-        self.confidence_threshold = confidence_threshold
-        self.face_detection = mp.solutions.face_detection.FaceDetection(
-            model_selection=1, min_detection_confidence=0.7
-        )
+    def __init__(self, model_path=None, confidence_threshold=None,
+                 cascade_model_path=None, cascade_band=0.1,
+                 face_detector='mediapipe_full', face_box_margin=0.15, face_detector_options=None,
+                 allow_untrained=False, inference_backend='predict'):
+        
+        # Face detector backends are created on first use, keyed by name
+        self.default_face_detector = face_detector
+        self.face_box_margin = face_box_margin
+        self.face_detector_options = face_detector_options or {}
+        self.face_detectors = {}
+        self.get_face_detector(face_detector)
+        
+        self.allow_untrained = allow_untrained
+        self.inference_backend = inference_backend
+        self.model_manifest = None
         self.model = self.load_model(model_path)
-        self.input_size = (128, 128)  # Expected input size for the model
+        self.input_size = self.get_input_size(self.model)  # Expected input size for the model
+        
+        # An explicit threshold wins over the one the model was exported with
+        if confidence_threshold is None:
+            confidence_threshold = (self.model_manifest or {}).get('threshold', 0.85)
+        self.confidence_threshold = confidence_threshold
+        self.preprocessing = (self.model_manifest or {}).get('preprocessing', DEFAULT_PREPROCESSING)
+        
+        # Optional cheap first-stage model; only uncertain faces reach self.model
+        self.cascade_band = cascade_band
+        self.cascade_preprocessing = DEFAULT_PREPROCESSING
+        self.cascade_model = self.load_cascade_model(cascade_model_path)
+        self.cascade_input_size = self.get_input_size(self.cascade_model) if self.cascade_model else None
+        self.cascade_lock = threading.Lock()
+        self.cascade_stats = {'faces_scored': 0, 'escalated': 0}
         
     def load_model(self, model_path):
-        """Load the deepfake detection model"""
-        try:
-            if model_path and tf.io.gfile.exists(model_path):
-                model = load_model(model_path)
-                logger.info(f"Model loaded successfully from {model_path}")
-            else:
-                # Create a simple CNN model if no pre-trained model is available
-                model = self.create_default_model()
-                logger.info("Using default model architecture")
-            return model
-        except Exception as e:
-            logger.error(f"Error loading model: {e}")
+        """Load the deepfake detection model from a serving artifact or a Keras .h5 file
+        
+        Load errors propagate; the untrained default architecture is only
+        served when allow_untrained is set and no model exists at model_path.
+        """
+        if not model_path or not tf.io.gfile.exists(model_path):
+            if not self.allow_untrained:
+                raise FileNotFoundError(
+                    f"Model not found at {model_path!r}; set ALLOW_UNTRAINED_MODEL=true to serve an untrained model"
+                )
+            logger.warning(f"Model not found at {model_path!r}, serving an UNTRAINED default model")
             return self.create_default_model()
+        
+        start_time = time.perf_counter()
+        model, self.model_manifest = self.read_model(model_path)
+        version = self.model_manifest['version'] if self.model_manifest else 'h5'
+        logger.info(f"Model loaded from {model_path} ({version}) in {(time.perf_counter() - start_time) * 1000:.0f}ms")
+        return model
+    
+    def read_model(self, model_path):
+        """(model, manifest) for an artifact directory, (model, None) for a .h5 file"""
+        if is_artifact(model_path):
+            return load_artifact(model_path)
+        # Serving never trains, so skip restoring the optimizer and recompiling
+        return load_model(model_path, compile=False), None
+    
+    def load_cascade_model(self, model_path):
+        """Load the lightweight cascade model, or disable the cascade if it is unavailable"""
+        if not model_path:
+            return None
+        if not tf.io.gfile.exists(model_path):
+            logger.warning(f"Cascade model not found at {model_path}, cascade disabled")
+            return None
+        
+        # The cascade may have been exported with different preprocessing than the main model
+        model, manifest = self.read_model(model_path)
+        self.cascade_preprocessing = (manifest or {}).get('preprocessing', DEFAULT_PREPROCESSING)
+        logger.info(f"Cascade model loaded from {model_path}")
+        return model
+    
+    def get_input_size(self, model, default=(128, 128)):
+        """Read the (width, height) the model expects, e.g. 112x112 for the realtime student"""
+        height, width = model.input_shape[1:3]
+        if height is None or width is None:
+            return default
+        return (width, height)
     
     def create_default_model(self):
         """Create a simple CNN model for deepfake detection"""
@@ -51,132 +113,329 @@ class DeepFakeDetector:
         model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
         return model
     
-    def detect_faces(self, image):
-        """Detect faces in the image using MediaPipe"""
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.face_detection.process(rgb_image)
-        
-        faces = []
-        if results.detections:
-            for detection in results.detections:
-                bbox = detection.location_data.relative_bounding_box
-                h, w, _ = image.shape
-                
-                x = int(bbox.xmin * w)
-                y = int(bbox.ymin * h)
-                width = int(bbox.width * w)
-                height = int(bbox.height * h)
-                
-                # Expand bounding box slightly
-                x = max(0, x - 20)
-                y = max(0, y - 20)
-                width = min(w - x, width + 40)
-                height = min(h - y, height + 40)
-                
-                faces.append((x, y, width, height))
+    def get_face_detector(self, name=None):
+        """Get (creating if needed) the face detector backend with this name"""
+        name = name or self.default_face_detector
+        if name not in self.face_detectors:
+            self.face_detectors[name] = create_face_detector(name, **self.face_detector_options)
+        return self.face_detectors[name]
+    
+    def detect_faces(self, image, face_detector=None):
+        """Detect faces in the image with the selected backend"""
+        boxes = self.get_face_detector(face_detector).detect(image)
         
-        return faces
+        # Expand bounding boxes in proportion to face size
+        return [expand_box(box, image.shape, self.face_box_margin) for box in boxes]
     
-    def preprocess_face(self, face_roi):
-        """Preprocess face ROI for model prediction"""
+    def preprocess_face(self, face_roi, input_size=None, preprocessing=None):
+        """Preprocess face ROI for model prediction (the main model's size and preprocessing by default)"""
+        preprocessing = preprocessing or self.preprocessing
+        
         # Resize to model input size
-        face_resized = cv2.resize(face_roi, self.input_size)
+        face_resized = cv2.resize(face_roi, input_size or self.input_size)
+        if preprocessing['color_order'] == 'rgb':
+            face_resized = cv2.cvtColor(face_resized, cv2.COLOR_BGR2RGB)
         
         # Normalize pixel values
-        face_normalized = face_resized.astype('float32') / 255.0
+        face_normalized = face_resized.astype('float32') * preprocessing['rescale']
         
         # Expand dimensions for batch prediction
         face_expanded = np.expand_dims(face_normalized, axis=0)
         
         return face_expanded
     
-    def analyze_frame(self, frame):
-        """Analyze a single frame for deepfake content"""
-        try:
-            # Detect faces in the frame
-            faces = self.detect_faces(frame)
+    def run_model(self, model, batch):
+        """Run a model on a preprocessed batch with the configured inference backend"""
+        if self.inference_backend == 'call':
+            # A direct call skips predict()'s per-call setup, which dominates small batches
+            return model(batch, training=False).numpy()
+        return model.predict(batch, verbose=0)
+    
+    def score_faces(self, face_rois, fast_only=False):
+        """Score face crops with one batched call per model, escalating only those near the threshold"""
+        scores = [None] * len(face_rois)
+        pending = list(range(len(face_rois)))
+        if not face_rois:
+            return scores
+        
+        if self.cascade_model is not None:
+            batch = np.concatenate([
+                self.preprocess_face(f, self.cascade_input_size, self.cascade_preprocessing) for f in face_rois
+            ])
+            predictions = self.run_model(self.cascade_model, batch)[:, 0]
             
-            if not faces:
-                return {
-                    'deepfake_detected': False,
-                    'confidence': 0.0,
-                    'faces_detected': 0,
-                    'message': 'No faces detected'
-                }
+            pending = []
+            for i, prediction in enumerate(predictions):
+                prediction = float(prediction)
+                # Under heavy load the cheap model's answer is final
+                if not fast_only and abs(prediction - self.confidence_threshold) <= self.cascade_band:
+                    pending.append(i)
+                else:
+                    scores[i] = (prediction, 'cascade')
             
-            results = []
-            for i, (x, y, w, h) in enumerate(faces):
-                # Extract face ROI
-                face_roi = frame[y:y+h, x:x+w]
-                
-                if face_roi.size == 0:
-                    continue
-                
-                # Preprocess face for model
-                processed_face = self.preprocess_face(face_roi)
-                
-                # Predict deepfake probability
-                prediction = self.model.predict(processed_face, verbose=0)[0][0]
-                
-                # Convert to confidence score (1.0 = real, 0.0 = fake)
-                confidence_real = float(prediction)
-                is_deepfake = confidence_real < self.confidence_threshold
-                
-                results.append({
-                    'face_id': i,
-                    'bbox': [x, y, w, h],
-                    'confidence_real': confidence_real,
-                    'confidence_fake': 1.0 - confidence_real,
-                    'is_deepfake': is_deepfake
-                })
+            with self.cascade_lock:
+                self.cascade_stats['faces_scored'] += len(face_rois)
+                self.cascade_stats['escalated'] += len(pending)
+        
+        if pending:
+            batch = np.concatenate([self.preprocess_face(face_rois[i]) for i in pending])
+            predictions = self.run_model(self.model, batch)[:, 0]
+            for i, prediction in zip(pending, predictions):
+                scores[i] = (float(prediction), 'full')
+        
+        return scores
+    
+    def score_face(self, face_roi, fast_only=False):
+        """Score a single face crop"""
+        return self.score_faces([face_roi], fast_only=fast_only)[0]
+    
+    def get_cascade_metrics(self):
+        """Get cascade escalation statistics"""
+        with self.cascade_lock:
+            faces_scored = self.cascade_stats['faces_scored']
+            escalated = self.cascade_stats['escalated']
+        
+        return {
+            'enabled': self.cascade_model is not None,
+            'uncertainty_band': self.cascade_band,
+            'faces_scored': faces_scored,
+            'escalated': escalated,
+            'escalation_rate': escalated / faces_scored if faces_scored else 0.0
+        }
+    
+    def detect_faces_scaled(self, image, max_frame_size=None, face_detector=None):
+        """Detect faces on a downscaled copy and map boxes back to full resolution"""
+        h, w = image.shape[:2]
+        if not max_frame_size or max(h, w) <= max_frame_size:
+            return self.detect_faces(image, face_detector)
+        
+        scale = max_frame_size / max(h, w)
+        small_image = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        
+        faces = []
+        for (x, y, width, height) in self.detect_faces(small_image, face_detector):
+            x, y = int(x / scale), int(y / scale)
+            faces.append((x, y, min(w - x, int(width / scale)), min(h - y, int(height / scale))))
+        return faces
+    
+    def extract_faces(self, frame, faces):
+        """Crop face ROIs from the frame, skipping empty crops"""
+        crops = []
+        for i, (x, y, w, h) in enumerate(faces):
+            # Extract face ROI
+            face_roi = frame[y:y+h, x:x+w]
             
-            # Overall frame result
-            if results:
-                avg_confidence = np.mean([r['confidence_real'] for r in results])
-                deepfake_detected = any(r['is_deepfake'] for r in results)
-                
-                return {
-                    'deepfake_detected': deepfake_detected,
-                    'confidence': float(avg_confidence),
-                    'faces_detected': len(faces),
-                    'face_results': results,
-                    'message': f'Detected {len(faces)} face(s)'
-                }
-            else:
-                return {
-                    'deepfake_detected': False,
-                    'confidence': 0.0,
-                    'faces_detected': 0,
-                    'message': 'Faces detected but unable to process'
-                }
-                
-        except Exception as e:
-            logger.error(f"Error analyzing frame: {e}")
+            if face_roi.size == 0:
+                continue
+            
+            crops.append((i, (x, y, w, h), face_roi))
+        
+        return crops
+    
+    def build_frame_result(self, faces, crops, scores):
+        """Combine per-face scores into the frame-level result"""
+        if not faces:
             return {
                 'deepfake_detected': False,
                 'confidence': 0.0,
                 'faces_detected': 0,
-                'message': f'Error: {str(e)}'
+                'message': 'No faces detected'
             }
+        
+        results = []
+        for (i, (x, y, w, h), _), (prediction, stage) in zip(crops, scores):
+            # Convert to confidence score (1.0 = real, 0.0 = fake)
+            confidence_real = float(prediction)
+            is_deepfake = confidence_real < self.confidence_threshold
+            
+            results.append({
+                'face_id': i,
+                'bbox': [x, y, w, h],
+                'confidence_real': confidence_real,
+                'confidence_fake': 1.0 - confidence_real,
+                'is_deepfake': is_deepfake,
+                'decided_by': stage
+            })
+        
+        # Overall frame result
+        if results:
+            avg_confidence = np.mean([r['confidence_real'] for r in results])
+            deepfake_detected = any(r['is_deepfake'] for r in results)
+            
+            return {
+                'deepfake_detected': deepfake_detected,
+                'confidence': float(avg_confidence),
+                'faces_detected': len(faces),
+                'face_results': results,
+                'decided_by': self.frame_stage([r['decided_by'] for r in results]),
+                'message': f'Detected {len(faces)} face(s)'
+            }
+        else:
+            return {
+                'deepfake_detected': False,
+                'confidence': 0.0,
+                'faces_detected': 0,
+                'message': 'Faces detected but unable to process'
+            }
+    
+    def frame_stage(self, stages):
+        """Most expensive stage that scored any face in the frame"""
+        for stage in ('full', 'cascade'):
+            if stage in stages:
+                return stage
+        return 'track'
+    
+    def score_tracked_faces(self, crops, tracker, fast_only=False):
+        """Score only the faces whose tracks need a fresh inference; the rest reuse their last score"""
+        assignments = tracker.assign([(bbox, roi) for _, bbox, roi in crops])
+        stale = [i for i, (_, needs_inference) in enumerate(assignments) if needs_inference]
+        fresh_scores = dict(zip(stale, self.score_faces([crops[i][2] for i in stale], fast_only=fast_only)))
+        
+        scores = []
+        for i, (track, needs_inference) in enumerate(assignments):
+            if needs_inference:
+                prediction, stage = fresh_scores[i]
+                tracker.observe(track, prediction, stage)
+                scores.append((prediction, stage))
+            else:
+                tracker.observe(track)
+                scores.append((track.last_score, 'track'))
+        return scores, [track for track, _ in assignments]
     
-    def process_video_stream(self, video_path=None, camera_index=0):
-        """Process video stream for real-time detection"""
+    def error_result(self, error):
+        """Frame result returned when analysis fails"""
+        return {
+            'deepfake_detected': False,
+            'confidence': 0.0,
+            'faces_detected': 0,
+            'message': f'Error: {str(error)}',
+            'error': True
+        }
+    
+    def analyze_frame(self, frame, max_frame_size=None, fast_only=False, face_detector=None, tracker=None):
+        """Analyze a single frame for deepfake content
+        
+        With a FaceTracker, faces are followed across calls and unchanged crops
+        reuse their track's last score; per-face results then carry track_id
+        and the frame result lists the track-level verdicts of visible faces.
+        """
+        try:
+            # Detect faces in the frame
+            faces = self.detect_faces_scaled(frame, max_frame_size, face_detector)
+            crops = self.extract_faces(frame, faces)
+            
+            if tracker is None:
+                # Predict deepfake probability for all faces at once
+                scores = self.score_faces([roi for _, _, roi in crops], fast_only=fast_only)
+                return self.build_frame_result(faces, crops, scores)
+            
+            scores, tracks = self.score_tracked_faces(crops, tracker, fast_only=fast_only)
+            result = self.build_frame_result(faces, crops, scores)
+            for face_result, track in zip(result.get('face_results', []), tracks):
+                face_result['track_id'] = track.track_id
+            result['tracks'] = tracker.get_active_verdicts()
+            return result
+                
+        except Exception as e:
+            logger.error(f"Error analyzing frame: {e}")
+            return self.error_result(e)
+    
+    def analyze_frames(self, frames, max_frame_size=None, fast_only=False, face_detector=None):
+        """Analyze several frames, scoring all of their faces in one batched inference"""
+        try:
+            detections = []
+            for frame in frames:
+                faces = self.detect_faces_scaled(frame, max_frame_size, face_detector)
+                detections.append((faces, self.extract_faces(frame, faces)))
+            
+            all_rois = [roi for _, crops in detections for _, _, roi in crops]
+            all_scores = self.score_faces(all_rois, fast_only=fast_only)
+            
+            results = []
+            offset = 0
+            for faces, crops in detections:
+                results.append(self.build_frame_result(faces, crops, all_scores[offset:offset + len(crops)]))
+                offset += len(crops)
+            
+            return results
+        
+        except Exception as e:
+            logger.error(f"Error analyzing frames: {e}")
+            return [self.error_result(e) for _ in frames]
+    
+    def detect_from_array(self, frame, tracker=None):
+        """Analyze a frame and return a flat frame-level verdict"""
+        start_time = time.time()
+        result = self.analyze_frame(frame, tracker=tracker)
+        
+        detection = {
+            'is_deepfake': result['deepfake_detected'],
+            'confidence': result['confidence'],
+            'faces_detected': result['faces_detected'],
+            'processing_time_ms': (time.time() - start_time) * 1000
+        }
+        if tracker is not None:
+            detection['tracks'] = result.get('tracks', [])
+        return detection
+    
+    def process_video_stream(self, video_path=None, camera_index=0, quality=None, slot=None, gate=None,
+                             tracker=None, start_frame=0):
+        """Process video stream for real-time detection
+        
+        If an AdaptiveQualityController is passed as `quality`, its current tier
+        decides the frame skip, detection resolution and model for each frame.
+        `slot` is an optional context manager factory entered around each
+        frame's analysis, e.g. to take a detector slot from admission control.
+        If the context manager yields a detector (such as one checked out of a
+        DetectorPool), that instance analyzes the frame instead of self.
+        With a FrameSimilarityGate as `gate`, frames nearly identical to the
+        last analyzed one reuse its result. A FaceTracker as `tracker` keeps
+        per-face scores across frames and re-scores only changed faces.
+        For video files, start_frame skips that many frames, e.g. to resume
+        from a checkpoint.
+        """
         try:
             if video_path:
-                cap = cv2.VideoCapture(video_path)
+                cap = open_at_frame(video_path, start_frame)
             else:
                 cap = cv2.VideoCapture(camera_index)
             
             if not cap.isOpened():
                 raise Exception("Could not open video source")
             
+            frame_index = start_frame if video_path else 0
+            last_result = None
             while True:
                 ret, frame = cap.read()
                 if not ret:
                     break
                 
-                # Analyze frame
-                result = self.analyze_frame(frame)
+                tier = quality.current_tier() if quality is not None else None
+                if last_result is not None and tier is not None and frame_index % tier['frame_skip'] != 0:
+                    # Skipped frame, reuse the last analysis
+                    result = dict(last_result, reused=True)
+                elif gate is not None and gate.should_reuse(frame):
+                    # Near-duplicate of the last analyzed frame
+                    result = dict(last_result, reused=True)
+                else:
+                    if tier is None:
+                        # Analyze frame
+                        with slot() if slot else nullcontext() as detector:
+                            result = (detector or self).analyze_frame(frame, tracker=tracker)
+                    else:
+                        with quality.track(), slot() if slot else nullcontext() as detector:
+                            result = (detector or self).analyze_frame(
+                                frame,
+                                max_frame_size=tier['max_frame_size'],
+                                fast_only=tier['fast_only'],
+                                tracker=tracker
+                            )
+                    last_result = result
+                
+                if tier is not None:
+                    result['quality_tier'] = tier['name']
+                
+                frame_index += 1
                 yield frame, result
                 
             cap.release()
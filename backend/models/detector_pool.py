@@ -0,0 +1,150 @@
+# backend/models/detector_pool.py
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+class DetectorPool:
+    """Fixed pool of DeepFakeDetector instances with checkout/return semantics
+
+    MediaPipe graphs are not safe for concurrent `process` calls, so each
+    request checks out its own instance instead of sharing one detector.
+    """
+
+    def __init__(self, factory, size=2, warmup=True, wait_window=1000):
+        self.size = size
+        self.instances = [factory() for _ in range(size)]
+        self.available = queue.Queue()
+        for detector in self.instances:
+            if warmup:
+                self.warmup(detector)
+            self.available.put(detector)
+
+        self.lock = threading.Lock()
+        self.wait_times = deque(maxlen=wait_window)
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def warmup(self, detector):
+        """Run every model once so the first real request doesn't pay graph setup"""
+        detector.analyze_frame(np.zeros((240, 320, 3), dtype=np.uint8))
+        for model in (detector.model, detector.cascade_model):
+            if model is not None:
+                width, height = detector.get_input_size(model)
+                model.predict(np.zeros((1, height, width, 3), dtype=np.float32), verbose=0)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """Borrow a detector for the duration of the block"""
+        start_time = time.perf_counter()
+        try:
+            detector = self.available.get(timeout=timeout)
+        except queue.Empty:
+            with self.lock:
+                self.timeouts += 1
+            raise TimeoutError("No detector available")
+
+        wait_ms = (time.perf_counter() - start_time) * 1000
+        with self.lock:
+            self.checkouts += 1
+            self.wait_times.append(wait_ms)
+
+        try:
+            yield detector
+        finally:
+            self.available.put(detector)
+
+    @property
+    def primary(self):
+        """Instance for read-only attributes shared by the whole pool"""
+        return self.instances[0]
+
+    def get_status(self):
+        """Pool size, occupancy and checkout wait times"""
+        with self.lock:
+            waits = list(self.wait_times)
+            checkouts = self.checkouts
+            timeouts = self.timeouts
+
+        return {
+            'size': self.size,
+            'available': self.available.qsize(),
+            'checkouts': checkouts,
+            'timeouts': timeouts,
+            'wait_ms': {
+                'mean': round(float(np.mean(waits)), 3) if waits else 0.0,
+                'p95': round(float(np.percentile(waits, 95)), 3) if waits else 0.0,
+                'max': round(float(np.max(waits)), 3) if waits else 0.0
+            }
+        }
+
+    def get_cascade_metrics(self):
+        """Cascade statistics summed over all instances"""
+        metrics = [detector.get_cascade_metrics() for detector in self.instances]
+        faces_scored = sum(m['faces_scored'] for m in metrics)
+        escalated = sum(m['escalated'] for m in metrics)
+
+        return {
+            'enabled': metrics[0]['enabled'],
+            'uncertainty_band': metrics[0]['uncertainty_band'],
+            'faces_scored': faces_scored,
+            'escalated': escalated,
+            'escalation_rate': escalated / faces_scored if faces_scored else 0.0
+        }
+
+# Concurrency stress test: python -m models.detector_pool [image_path]
+if __name__ == "__main__":
+    import sys
+    import cv2
+    from concurrent.futures import ThreadPoolExecutor
+    from models.detector import DeepFakeDetector
+
+    if len(sys.argv) > 1:
+        frames = [cv2.imread(sys.argv[1])]
+    else:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(4)]
+
+    # Noise frames contain no faces, so the model is exercised on crops directly
+    rng = np.random.default_rng(1)
+    crop_sets = [[rng.integers(0, 255, (rng.integers(80, 200), rng.integers(80, 200), 3), dtype=np.uint8)
+                  for _ in range(3)] for _ in range(4)]
+
+    # Sequential results from a single detector are the reference; untrained
+    # models are randomly initialised, so every instance copies its weights
+    reference_detector = DeepFakeDetector(allow_untrained=True)
+    reference_weights = reference_detector.model.get_weights()
+
+    def create_detector():
+        detector = DeepFakeDetector(allow_untrained=True)
+        detector.model.set_weights(reference_weights)
+        return detector
+
+    expected_boxes = [reference_detector.detect_faces(frame) for frame in frames]
+    expected_scores = [[score for score, _ in reference_detector.score_faces(crops)] for crops in crop_sets]
+    print(f"Reference: {sum(map(len, expected_boxes))} faces in {len(frames)} frames, "
+          f"{sum(map(len, expected_scores))} crops scored")
+
+    requests = 64
+    threads = 8
+    for size in (1, 2, 4):
+        pool = DetectorPool(create_detector, size=size)
+
+        def run(i):
+            frame_index, crop_index = i % len(frames), i % len(crop_sets)
+            with pool.checkout() as detector:
+                # Face detection and model inference both run concurrently across instances
+                boxes = detector.detect_faces(frames[frame_index])
+                scores = [score for score, _ in detector.score_faces(crop_sets[crop_index])]
+            return (boxes == expected_boxes[frame_index]
+                    and np.allclose(scores, expected_scores[crop_index], atol=1e-4))
+
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            correct = list(executor.map(run, range(requests)))
+        elapsed = time.time() - start_time
+
+        print(f"pool_size={size} requests={requests} throughput={requests / elapsed:.1f}/s "
+              f"correct={sum(correct)}/{requests} wait={pool.get_status()['wait_ms']}")
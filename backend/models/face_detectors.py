@@ -0,0 +1,168 @@
+# backend/models/face_detectors.py
+import os
+import cv2
+import numpy as np
+
+class FaceDetectorBackend:
+    """Interface for face detectors: detect() returns raw (x, y, w, h) pixel boxes for a BGR image"""
+
+    name = None
+
+    def detect(self, image):
+        raise NotImplementedError
+
+class MediaPipeFaceDetector(FaceDetectorBackend):
+    """MediaPipe face detection; model_selection 0 is short-range (<2m), 1 is full-range (<5m)"""
+
+    def __init__(self, model_selection=1, min_confidence=0.7):
+        import mediapipe as mp
+        self.name = 'mediapipe_full' if model_selection == 1 else 'mediapipe_short'
+        self.face_detection = mp.solutions.face_detection.FaceDetection(
+            model_selection=model_selection, min_detection_confidence=min_confidence
+        )
+
+    def detect(self, image):
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        results = self.face_detection.process(rgb_image)
+
+        boxes = []
+        if results.detections:
+            h, w = image.shape[:2]
+            for detection in results.detections:
+                bbox = detection.location_data.relative_bounding_box
+                boxes.append((int(bbox.xmin * w), int(bbox.ymin * h), int(bbox.width * w), int(bbox.height * h)))
+        return boxes
+
+class OpenCVDnnFaceDetector(FaceDetectorBackend):
+    """OpenCV DNN face detector (ResNet-10 SSD, 300x300 Caffe model)"""
+
+    name = 'opencv_dnn'
+
+    def __init__(self, prototxt_path, model_path, min_confidence=0.5, input_size=(300, 300)):
+        if not (os.path.exists(prototxt_path) and os.path.exists(model_path)):
+            raise ValueError(f"OpenCV DNN face model not found at {prototxt_path} / {model_path}")
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+        self.min_confidence = min_confidence
+        self.input_size = input_size
+
+    def detect(self, image):
+        h, w = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(
+            cv2.resize(image, self.input_size), 1.0, self.input_size, (104.0, 177.0, 123.0)
+        )
+        self.net.setInput(blob)
+        detections = self.net.forward()
+
+        boxes = []
+        for i in range(detections.shape[2]):
+            if detections[0, 0, i, 2] < self.min_confidence:
+                continue
+            x1, y1, x2, y2 = (detections[0, 0, i, 3:7] * np.array([w, h, w, h])).astype(int)
+            x1, y1 = max(0, x1), max(0, y1)
+            if x2 > x1 and y2 > y1:
+                boxes.append((int(x1), int(y1), int(x2 - x1), int(y2 - y1)))
+        return boxes
+
+class HaarCascadeFaceDetector(FaceDetectorBackend):
+    """OpenCV Haar cascade, the cheapest backend but with the lowest recall"""
+
+    name = 'haar'
+
+    def __init__(self, cascade_path=None, scale_factor=1.1, min_neighbors=5, min_size=(40, 40)):
+        cascade_path = cascade_path or os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml')
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise ValueError(f"Could not load Haar cascade from {cascade_path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    def detect(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(
+            gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors, minSize=self.min_size
+        )
+        return [tuple(int(v) for v in face) for face in faces]
+
+FACE_DETECTOR_BACKENDS = ['mediapipe_short', 'mediapipe_full', 'opencv_dnn', 'haar']
+
+def create_face_detector(name, min_confidence=0.7, dnn_prototxt=None, dnn_model=None):
+    """Create a face detector backend by name"""
+    if name == 'mediapipe_short':
+        return MediaPipeFaceDetector(model_selection=0, min_confidence=min_confidence)
+    if name == 'mediapipe_full':
+        return MediaPipeFaceDetector(model_selection=1, min_confidence=min_confidence)
+    if name == 'opencv_dnn':
+        return OpenCVDnnFaceDetector(dnn_prototxt, dnn_model, min_confidence=min_confidence)
+    if name == 'haar':
+        return HaarCascadeFaceDetector()
+    raise ValueError(f"Unknown face detector '{name}', expected one of {FACE_DETECTOR_BACKENDS}")
+
+def expand_box(box, image_shape, margin=0.15):
+    """Grow a box by `margin` of its width/height on each side, clipped to the image"""
+    x, y, width, height = box
+    h, w = image_shape[:2]
+    dx = int(width * margin)
+    dy = int(height * margin)
+
+    x = max(0, x - dx)
+    y = max(0, y - dy)
+    width = min(w - x, width + 2 * dx)
+    height = min(h - y, height + 2 * dy)
+    return (x, y, width, height)
+
+def box_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = ix * iy
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union else 0.0
+
+# Speed/recall benchmark on a labelled sample:
+#   python -m models.face_detectors samples/ [--dnn_prototxt deploy.prototxt --dnn_model res10.caffemodel]
+# where samples/labels.json maps image filenames to lists of [x, y, w, h] face boxes.
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description='Compare face detector backends')
+    parser.add_argument('sample_dir', type=str)
+    parser.add_argument('--dnn_prototxt', type=str, default=None)
+    parser.add_argument('--dnn_model', type=str, default=None)
+    parser.add_argument('--iou', type=float, default=0.5)
+    args = parser.parse_args()
+
+    with open(os.path.join(args.sample_dir, 'labels.json')) as f:
+        labels = json.load(f)
+    images = {name: cv2.imread(os.path.join(args.sample_dir, name)) for name in labels}
+
+    for backend_name in FACE_DETECTOR_BACKENDS:
+        try:
+            backend = create_face_detector(backend_name, dnn_prototxt=args.dnn_prototxt, dnn_model=args.dnn_model)
+        except Exception as e:
+            print(f"{backend_name:<16} skipped: {e}")
+            continue
+
+        timings = []
+        matched = 0
+        total_faces = 0
+        detections = 0
+        for name, image in images.items():
+            if image is None:
+                continue
+            start_time = time.perf_counter()
+            boxes = backend.detect(image)
+            timings.append((time.perf_counter() - start_time) * 1000)
+
+            detections += len(boxes)
+            for truth in labels[name]:
+                total_faces += 1
+                if any(box_iou(truth, box) >= args.iou for box in boxes):
+                    matched += 1
+
+        recall = matched / total_faces if total_faces else 0.0
+        print(f"{backend_name:<16} latency_ms mean={np.mean(timings):.2f} p95={np.percentile(timings, 95):.2f} "
+              f"recall={recall:.3f} detections={detections}")
@@ -0,0 +1,189 @@
+# backend/models/face_tracker.py
+import cv2
+import numpy as np
+from .face_detectors import box_iou
+
+class FaceTrack:
+    """One face followed across frames, with an EMA of its model scores"""
+
+    def __init__(self, track_id, bbox, frame_index):
+        self.track_id = track_id
+        self.bbox = bbox
+        self.thumbnail = None
+        self.pending_thumbnail = None  # Crop awaiting a score; becomes the reference once scored
+        self.score = None          # EMA of confidence_real over inferences
+        self.last_score = None     # Most recent raw inference
+        self.last_stage = None
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+        self.frames_seen = 0
+        self.inferences = 0
+        self.frames_since_inference = 0
+        self.missed = 0
+
+class FaceTracker:
+    """Associates faces across frames by box overlap and decides which crops need a fresh inference
+
+    A matched face is re-scored only when its crop has changed by more than
+    change_threshold (mean absolute difference of small grayscale thumbnails)
+    or refresh_interval frames have passed since its last inference;
+    otherwise the previous score is reused. Tracks that go unmatched for
+    more than max_missed frames are closed.
+    """
+
+    def __init__(self, confidence_threshold=0.85, iou_threshold=0.3, change_threshold=0.08,
+                 refresh_interval=15, ema_alpha=0.3, max_missed=5, thumbnail_size=(24, 24)):
+        self.confidence_threshold = confidence_threshold
+        self.iou_threshold = iou_threshold
+        self.change_threshold = change_threshold
+        self.refresh_interval = refresh_interval
+        self.ema_alpha = ema_alpha
+        self.max_missed = max_missed
+        self.thumbnail_size = thumbnail_size
+
+        self.active = []
+        self.closed = []
+        self.next_id = 0
+        self.frame_index = 0
+        self.faces_seen = 0
+        self.faces_inferred = 0
+
+    def thumbnail(self, face_roi):
+        gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY) if face_roi.ndim == 3 else face_roi
+        return cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+
+    def assign(self, faces):
+        """Match (bbox, face_roi) pairs to tracks; returns a (track, needs_inference) pair per face"""
+        self.frame_index += 1
+
+        # Greedy matching, best overlaps first
+        candidates = sorted(
+            ((box_iou(track.bbox, bbox), t, f)
+             for t, track in enumerate(self.active) for f, (bbox, _) in enumerate(faces)),
+            reverse=True
+        )
+        matches = {}
+        used_tracks = set()
+        for iou, t, f in candidates:
+            if iou < self.iou_threshold:
+                break
+            if t in used_tracks or f in matches:
+                continue
+            matches[f] = self.active[t]
+            used_tracks.add(t)
+
+        assignments = []
+        for f, (bbox, face_roi) in enumerate(faces):
+            thumb = self.thumbnail(face_roi)
+            track = matches.get(f)
+            if track is None:
+                track = FaceTrack(self.next_id, bbox, self.frame_index)
+                self.next_id += 1
+                self.active.append(track)
+                needs_inference = True
+            elif track.last_score is None:
+                # The previous inference for this track never completed
+                needs_inference = True
+            else:
+                changed = float(np.mean(np.abs(thumb - track.thumbnail))) > self.change_threshold
+                needs_inference = changed or track.frames_since_inference >= self.refresh_interval
+
+            track.bbox = bbox
+            track.last_frame = self.frame_index
+            track.frames_seen += 1
+            track.missed = 0
+            if needs_inference:
+                # Only committed as the reference by observe(), once the crop is actually scored
+                track.pending_thumbnail = thumb
+            assignments.append((track, needs_inference))
+
+        matched = {id(track) for track, _ in assignments}
+        for track in self.active:
+            if id(track) not in matched:
+                track.missed += 1
+        self.closed.extend(t for t in self.active if t.missed > self.max_missed)
+        self.active = [t for t in self.active if t.missed <= self.max_missed]
+
+        self.faces_seen += len(faces)
+        return assignments
+
+    def observe(self, track, score=None, stage=None):
+        """Record a fresh inference for the track, or a frame where its last score was reused"""
+        if score is None:
+            track.frames_since_inference += 1
+            return
+
+        # The crop the score belongs to becomes the reference
+        if track.pending_thumbnail is not None:
+            track.thumbnail, track.pending_thumbnail = track.pending_thumbnail, None
+        track.inferences += 1
+        track.frames_since_inference = 0
+        track.last_score = score
+        track.last_stage = stage
+        track.score = score if track.score is None else self.ema_alpha * score + (1 - self.ema_alpha) * track.score
+        self.faces_inferred += 1
+
+    def track_verdict(self, track):
+        return {
+            'track_id': track.track_id,
+            'bbox': list(track.bbox),
+            'score': track.score,
+            'is_deepfake': track.score is not None and track.score < self.confidence_threshold,
+            'frames_seen': track.frames_seen,
+            'inferences': track.inferences,
+            'first_frame': track.first_frame,
+            'last_frame': track.last_frame
+        }
+
+    def get_active_verdicts(self):
+        """Verdicts for faces currently on screen"""
+        return [self.track_verdict(t) for t in self.active if t.missed == 0]
+
+    def get_track_verdicts(self):
+        """Verdicts for every track seen so far, in order of appearance"""
+        tracks = sorted(self.closed + self.active, key=lambda t: t.track_id)
+        return [self.track_verdict(t) for t in tracks]
+
+    def get_stats(self):
+        return {
+            'tracks': self.next_id,
+            'faces_seen': self.faces_seen,
+            'faces_inferred': self.faces_inferred,
+            'inference_rate': self.faces_inferred / self.faces_seen if self.faces_seen else 0.0
+        }
+
+# Inference savings on stable footage: python -m models.face_tracker video.mp4
+if __name__ == "__main__":
+    import sys
+    import time
+    from models.detector import DeepFakeDetector
+
+    video_path = sys.argv[1]
+    detector = DeepFakeDetector(allow_untrained=True)
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+
+    def run(tracker):
+        verdicts = []
+        frames = 0
+        start_time = time.time()
+        for frame, result in detector.process_video_stream(video_path=video_path, tracker=tracker):
+            frames += 1
+            verdicts.append(result['deepfake_detected'])
+        return verdicts, frames, time.time() - start_time
+
+    full_verdicts, frames, full_time = run(None)
+    tracker = FaceTracker(confidence_threshold=detector.confidence_threshold)
+    tracked_verdicts, _, tracked_time = run(tracker)
+
+    stats = tracker.get_stats()
+    video_seconds = frames / fps
+    agreement = np.mean([a == b for a, b in zip(full_verdicts, tracked_verdicts)]) if full_verdicts else 0.0
+    print(f"Per-frame scoring: {stats['faces_seen'] / video_seconds:.1f} face inferences/s of video, {full_time:.2f}s")
+    print(f"Tracked scoring:   {stats['faces_inferred'] / video_seconds:.1f} face inferences/s of video, "
+          f"{tracked_time:.2f}s ({stats})")
+    print(f"Per-frame verdict agreement: {agreement:.1%}")
+    for verdict in tracker.get_track_verdicts():
+        print(verdict)
@@ -0,0 +1,81 @@
+# backend/models/frame_gate.py
+import cv2
+import numpy as np
+
+class FrameSimilarityGate:
+    """Decides whether a frame is close enough to the last analyzed one to reuse its result
+
+    Frames are compared as small grayscale thumbnails by mean absolute
+    difference (0 = identical, 1 = inverted). A difference above cut_threshold
+    is counted as a scene cut; anything above reuse_threshold, or more than
+    max_reuse consecutive reuses, forces a fresh analysis.
+    """
+
+    def __init__(self, reuse_threshold=0.02, cut_threshold=0.25, max_reuse=30, thumbnail_size=(32, 32)):
+        self.reuse_threshold = reuse_threshold
+        self.cut_threshold = cut_threshold
+        self.max_reuse = max_reuse
+        self.thumbnail_size = thumbnail_size
+
+        self.reference = None
+        self.consecutive_reuses = 0
+        self.frames_reused = 0
+        self.frames_analyzed = 0
+        self.scene_cuts = 0
+
+    def thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+
+    def should_reuse(self, frame):
+        """True if the last result can be reused; otherwise the frame becomes the new reference"""
+        thumb = self.thumbnail(frame)
+
+        if self.reference is not None and self.consecutive_reuses < self.max_reuse:
+            difference = float(np.mean(np.abs(thumb - self.reference)))
+            if difference <= self.reuse_threshold:
+                self.consecutive_reuses += 1
+                self.frames_reused += 1
+                return True
+            if difference >= self.cut_threshold:
+                self.scene_cuts += 1
+
+        self.reference = thumb
+        self.consecutive_reuses = 0
+        self.frames_analyzed += 1
+        return False
+
+    def get_stats(self):
+        total = self.frames_reused + self.frames_analyzed
+        return {
+            'frames_reused': self.frames_reused,
+            'frames_analyzed': self.frames_analyzed,
+            'scene_cuts': self.scene_cuts,
+            'reuse_rate': self.frames_reused / total if total else 0.0
+        }
+
+# Accuracy and throughput against full analysis: python -m models.frame_gate video.mp4 [threshold]
+if __name__ == "__main__":
+    import sys
+    import time
+    from models.detector import DeepFakeDetector
+
+    video_path = sys.argv[1]
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    detector = DeepFakeDetector(allow_untrained=True)
+
+    def run(gate):
+        verdicts = []
+        start_time = time.time()
+        for frame, result in detector.process_video_stream(video_path=video_path, gate=gate):
+            verdicts.append(result['deepfake_detected'])
+        return verdicts, time.time() - start_time
+
+    full_verdicts, full_time = run(None)
+    gate = FrameSimilarityGate(reuse_threshold=threshold)
+    gated_verdicts, gated_time = run(gate)
+
+    agreement = np.mean([a == b for a, b in zip(full_verdicts, gated_verdicts)]) if full_verdicts else 0.0
+    print(f"Full analysis:  {len(full_verdicts)} frames in {full_time:.2f}s")
+    print(f"Gated analysis: {len(gated_verdicts)} frames in {gated_time:.2f}s ({gate.get_stats()})")
+    print(f"Speedup: {full_time / gated_time:.2f}x, per-frame verdict agreement: {agreement:.1%}")
@@ -0,0 +1,39 @@
+# backend/models/inference_profile.py
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_BACKENDS = ['predict', 'call']
+
+def load_inference_profile(path):
+    """Read an autotune profile (see autotune.py); None if there is none"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        profile = json.load(f)
+    if 'best' not in profile:
+        raise ValueError(f"Inference profile {path} has no 'best' configuration")
+    return profile
+
+def apply_thread_settings(profile):
+    """Set TF thread pools from the profile; must run before TensorFlow executes any op"""
+    import tensorflow as tf
+
+    best = profile['best']
+    tf.config.threading.set_intra_op_parallelism_threads(best['intra_op_threads'])
+    tf.config.threading.set_inter_op_parallelism_threads(best['inter_op_threads'])
+    logger.info(f"Inference profile {profile['name']}: intra_op={best['intra_op_threads']} "
+                f"inter_op={best['inter_op_threads']} batch_size={best['batch_size']} backend={best['backend']}")
+
+def profile_summary(profile):
+    """What /api/health reports about the active profile"""
+    if profile is None:
+        return None
+    return {
+        'name': profile['name'],
+        'created_at': profile['created_at'],
+        'model_path': profile['model_path'],
+        'best': profile['best']
+    }
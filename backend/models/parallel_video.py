@@ -0,0 +1,154 @@
+# backend/models/parallel_video.py
+import multiprocessing as mp
+import time
+import logging
+import cv2
+from .frame_gate import FrameSimilarityGate
+from .artifact import check_model_path
+
+logger = logging.getLogger(__name__)
+
+# Each worker process holds its own detector
+segment_detector = None
+
+def init_segment_worker(detector_kwargs, inference_profile=None):
+    """Create the detector once per worker process, configured like the parent's detectors"""
+    global segment_detector
+    if inference_profile is not None:
+        from .inference_profile import apply_thread_settings
+        apply_thread_settings(inference_profile)
+    from .detector import DeepFakeDetector
+    segment_detector = DeepFakeDetector(**detector_kwargs)
+
+def split_segments(total_frames, num_segments):
+    """Split 1-based frame numbers 1..total_frames into contiguous (start, end] ranges
+
+    The last segment is open-ended (end=None) so frames beyond an inaccurate
+    CAP_PROP_FRAME_COUNT are still analyzed exactly once.
+    """
+    num_segments = max(1, min(num_segments, total_frames))
+    bounds = [round(i * total_frames / num_segments) for i in range(num_segments + 1)]
+    segments = [(bounds[i], bounds[i + 1]) for i in range(num_segments)]
+    segments[-1] = (segments[-1][0], None)
+    return segments
+
+def open_at_frame(video_path, start):
+    """Open a capture positioned so the next read returns frame number start + 1"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError("Could not open video file")
+
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != start:
+            # Inexact seek on this backend, fall back to skipping from the start
+            cap.release()
+            cap = cv2.VideoCapture(video_path)
+            for _ in range(start):
+                if not cap.grab():
+                    break
+    return cap
+
+def analyze_segment(task):
+    """Analyze the sampled frames of one segment in a worker process"""
+    video_path, start, end, sample_rate, reuse_threshold, frame_options = task
+    cap = open_at_frame(video_path, start)
+    # Each segment starts with a fresh reference, so its first frame is always analyzed
+    gate = FrameSimilarityGate(reuse_threshold=reuse_threshold) if reuse_threshold > 0 else None
+
+    results = []
+    frame_number = start
+    while end is None or frame_number < end:
+        # grab() skips decoding to BGR for frames that are not sampled
+        if not cap.grab():
+            break
+        frame_number += 1
+        if frame_number % sample_rate != 0:
+            continue
+
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+
+        if gate is not None and gate.should_reuse(frame):
+            result = dict(results[-1], processing_time_ms=0.0, reused=True)
+        else:
+            start_time = time.time()
+            result = segment_detector.analyze_frame(frame, **frame_options)
+            result['processing_time_ms'] = (time.time() - start_time) * 1000
+        result['frame_number'] = frame_number
+        results.append(result)
+
+    cap.release()
+    return results
+
+class ParallelVideoAnalyzer:
+    """Analyzes one video as time segments spread over a pool of worker processes
+
+    detector_kwargs are passed to every worker's DeepFakeDetector and should
+    match the caller's own detector (cascade, face detector, margins, backend),
+    or verdicts would change with the number of workers. inference_profile, if
+    given, sets each worker's TF thread pools as at server startup.
+    """
+
+    def __init__(self, workers=4, segments_per_worker=2, inference_profile=None, **detector_kwargs):
+        self.workers = workers
+        self.segments_per_worker = segments_per_worker
+        check_model_path(detector_kwargs.get('model_path'), detector_kwargs.get('allow_untrained', False))
+        # Spawned workers avoid sharing TensorFlow/MediaPipe state across fork
+        self.pool = mp.get_context('spawn').Pool(
+            workers, initializer=init_segment_worker, initargs=(detector_kwargs, inference_profile)
+        )
+
+    def analyze_frames(self, video_path, sample_rate=1, reuse_threshold=0.0, max_frame_size=None,
+                       fast_only=False, face_detector=None):
+        """Per-frame results for every sampled frame, in frame order
+
+        max_frame_size and fast_only are the caller's quality tier when the
+        video is submitted; they apply to every segment.
+        """
+        frame_options = {'max_frame_size': max_frame_size, 'fast_only': fast_only, 'face_detector': face_detector}
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError("Could not open video file")
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        # A few more segments than workers keeps the pool busy when segments differ in cost
+        segments = split_segments(max(total_frames, 1), self.workers * self.segments_per_worker)
+        tasks = [(video_path, start, end, sample_rate, reuse_threshold, frame_options) for start, end in segments]
+        logger.info(f"Analyzing {total_frames} frames as {len(tasks)} segments on {self.workers} workers")
+
+        results = []
+        for segment_results in self.pool.map(analyze_segment, tasks):
+            results.extend(segment_results)
+        return results
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+# Scaling benchmark: python -m models.parallel_video video.mp4 [sample_rate]
+if __name__ == "__main__":
+    import sys
+
+    video_path = sys.argv[1]
+    sample_rate = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    baseline = None
+    baseline_time = None
+    for workers in (1, 2, 4, 8):
+        analyzer = ParallelVideoAnalyzer(workers=workers, allow_untrained=True)
+        analyzer.analyze_frames(video_path, sample_rate)  # Warm up worker models
+
+        start_time = time.time()
+        results = analyzer.analyze_frames(video_path, sample_rate)
+        elapsed = time.time() - start_time
+        analyzer.close()
+
+        frame_numbers = [r['frame_number'] for r in results]
+        if baseline is None:
+            baseline, baseline_time = frame_numbers, elapsed
+        matches = frame_numbers == baseline and len(set(frame_numbers)) == len(frame_numbers)
+        print(f"workers={workers:<2} frames={len(results):<6} time={elapsed:.2f}s "
+              f"speedup={baseline_time / elapsed:.2f}x frames_match={matches}")
@@ -0,0 +1,139 @@
+# backend/models/profiling.py
+import os
+import io
+import re
+import hmac
+import time
+import shutil
+import pstats
+import cProfile
+import logging
+import threading
+import itertools
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_PATTERN = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9]{6}-[a-z0-9_]+$')
+
+class ProfileSession:
+    """An active profile of one request, finished with RequestProfiler.finish"""
+
+    def __init__(self, profile_id, profiler, tf_logdir=None):
+        self.profile_id = profile_id
+        self.profiler = profiler
+        self.tf_logdir = tf_logdir
+        self.start_time = time.perf_counter()
+
+class RequestProfiler:
+    """Opt-in cProfile (and optionally TensorFlow trace) capture for single requests
+
+    A request is profiled when it presents the configured token, or when it is
+    the Nth since the last sample with sample_every > 0. Only one request is
+    profiled at a time, since both profilers are process-wide; others run
+    unprofiled. Profiles go to a ring of at most max_profiles in profile_dir.
+    When disabled, should_profile returns False without doing any work.
+    """
+
+    def __init__(self, profile_dir='profiles', token='', sample_every=0, max_profiles=50,
+                 tf_trace=False, enabled=False):
+        self.profile_dir = profile_dir
+        self.token = token
+        self.sample_every = sample_every
+        self.max_profiles = max_profiles
+        self.tf_trace = tf_trace
+        self.enabled = enabled
+
+        self.active_lock = threading.Lock()
+        self.sequence = itertools.count()
+        self.request_counter = itertools.count(1)
+        if enabled:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def is_authorized(self, token):
+        # Compared as bytes: compare_digest rejects non-ASCII str, and the header is client-controlled
+        return bool(self.token) and token is not None and hmac.compare_digest(
+            str(token).encode('utf-8'), self.token.encode('utf-8')
+        )
+
+    def should_profile(self, token=None):
+        if not self.enabled:
+            return False
+        if self.is_authorized(token):
+            return True
+        return self.sample_every > 0 and next(self.request_counter) % self.sample_every == 0
+
+    def start(self, name):
+        """Begin profiling the current thread, or None if another profile is running"""
+        if not self.active_lock.acquire(blocking=False):
+            return None
+
+        name = re.sub(r'[^a-z0-9_]+', '_', name.lower()).strip('_') or 'request'
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{next(self.sequence) % 1000000:06d}-{name}"
+
+        tf_logdir = None
+        if self.tf_trace:
+            try:
+                import tensorflow as tf
+                tf_logdir = os.path.join(self.profile_dir, f'{profile_id}.tf')
+                tf.profiler.experimental.start(tf_logdir)
+            except Exception:
+                self.active_lock.release()
+                raise
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return ProfileSession(profile_id, profiler, tf_logdir)
+
+    def finish(self, session):
+        """Stop profiling and write <id>.prof, a readable <id>.txt summary and any TF trace"""
+        try:
+            session.profiler.disable()
+            if session.tf_logdir:
+                import tensorflow as tf
+                tf.profiler.experimental.stop()
+            elapsed_ms = (time.perf_counter() - session.start_time) * 1000
+
+            base_path = os.path.join(self.profile_dir, session.profile_id)
+            session.profiler.dump_stats(base_path + '.prof')
+
+            summary = io.StringIO()
+            summary.write(f"{session.profile_id}: {elapsed_ms:.1f}ms wall time\n\n")
+            stats = pstats.Stats(session.profiler, stream=summary)
+            stats.sort_stats('cumulative').print_stats(40)
+            with open(base_path + '.txt', 'w') as f:
+                f.write(summary.getvalue())
+
+            logger.info(f"Profile {session.profile_id} written ({elapsed_ms:.1f}ms)")
+        finally:
+            self.active_lock.release()
+        self.prune()
+
+    def list_profiles(self):
+        """Profiles on disk, newest first"""
+        if not os.path.isdir(self.profile_dir):
+            return []
+        profile_ids = sorted(
+            (name[:-len('.prof')] for name in os.listdir(self.profile_dir) if name.endswith('.prof')),
+            reverse=True
+        )
+        return [{
+            'profile_id': profile_id,
+            'size_bytes': os.path.getsize(os.path.join(self.profile_dir, profile_id + '.prof')),
+            'tf_trace': os.path.isdir(os.path.join(self.profile_dir, profile_id + '.tf'))
+        } for profile_id in profile_ids]
+
+    def get_path(self, profile_id, kind='txt'):
+        """Path of a stored profile file; None for unknown or malformed ids"""
+        if not PROFILE_ID_PATTERN.match(profile_id) or kind not in ('txt', 'prof', 'tf'):
+            return None
+        path = os.path.join(self.profile_dir, f'{profile_id}.{kind}')
+        return path if os.path.exists(path) else None
+
+    def prune(self):
+        """Delete the oldest profiles beyond max_profiles"""
+        for profile in self.list_profiles()[self.max_profiles:]:
+            base_path = os.path.join(self.profile_dir, profile['profile_id'])
+            for suffix in ('.prof', '.txt'):
+                if os.path.exists(base_path + suffix):
+                    os.remove(base_path + suffix)
+            shutil.rmtree(base_path + '.tf', ignore_errors=True)
@@ -5,12 +5,13 @@ import torch
 import threading
 import queue
 import time
-from .detector import DeepfakeDetector
+from .detector import DeepFakeDetector
 from collections import deque
+from config import Config
 
 class RealTimeDeepfakeDetector:
-    def __init__(self, model_path=None, device='cuda'):
-        self.detector = DeepfakeDetector(model_path, device)
+    def __init__(self, model_path=Config.REALTIME_MODEL_PATH, device='cuda'):
+        self.detector = DeepFakeDetector(model_path=model_path)
         
         # Optimization settings
         self.input_size = (112, 112)  # Smaller for speed
@@ -0,0 +1,184 @@
+# backend/models/shared_state.py
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # Redis is optional, everything falls back to in-process state
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+def create_redis_client(url, max_connections=20, timeout=0.5):
+    """Create a pooled Redis client, or return None if Redis is unavailable"""
+    if redis is None or not url:
+        return None
+
+    try:
+        pool = redis.ConnectionPool.from_url(
+            url,
+            max_connections=max_connections,
+            socket_connect_timeout=timeout,
+            socket_timeout=timeout
+        )
+        client = redis.Redis(connection_pool=pool)
+        client.ping()
+        logger.info(f"Connected to Redis at {url}")
+        return client
+    except Exception as e:
+        logger.warning(f"Redis unavailable at {url}, using in-process state: {e}")
+        return None
+
+class ResultCache:
+    """Detection result cache shared across workers through Redis
+
+    Falls back to a bounded in-process LRU when no client is configured or
+    Redis stops responding.
+    """
+
+    def __init__(self, client=None, ttl=3600, max_local_entries=1024, prefix='deepfake:result:'):
+        self.client = client
+        self.ttl = ttl
+        self.max_local_entries = max_local_entries
+        self.prefix = prefix
+
+        self.lock = threading.Lock()
+        self.local = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, data):
+        """Content hash used as the cache key"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key):
+        value = None
+        if self.client is not None:
+            try:
+                raw = self.client.get(self.prefix + key)
+                value = json.loads(raw) if raw else None
+            except Exception as e:
+                logger.warning(f"Redis cache read failed, using local cache: {e}")
+                value = self._get_local(key)
+        else:
+            value = self._get_local(key)
+
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.client is not None:
+            try:
+                self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+                return
+            except Exception as e:
+                logger.warning(f"Redis cache write failed, using local cache: {e}")
+        self._set_local(key, value)
+
+    def _get_local(self, key):
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is None:
+                return None
+            raw, expires_at = entry
+            if expires_at < time.time():
+                del self.local[key]
+                return None
+            self.local.move_to_end(key)
+            return json.loads(raw)
+
+    def _set_local(self, key, value):
+        with self.lock:
+            # Stored serialized, like in Redis, so callers can't mutate cached entries
+            self.local[key] = (json.dumps(value), time.time() + self.ttl)
+            self.local.move_to_end(key)
+            while len(self.local) > self.max_local_entries:
+                self.local.popitem(last=False)
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'redis' if self.client is not None else 'local',
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'local_entries': len(self.local)
+            }
+
+class JobStore:
+    """Job and progress state for video analysis, shared across workers through Redis"""
+
+    def __init__(self, client=None, ttl=86400, prefix='deepfake:job:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+        self.lock = threading.Lock()
+        self.local = {}
+
+    def update(self, job_id, **fields):
+        """Merge fields into a job's state"""
+        job = self.get(job_id) or {'job_id': job_id}
+        job.update(fields)
+        job['updated_at'] = time.time()
+
+        if self.client is not None:
+            try:
+                self.client.set(self.prefix + job_id, json.dumps(job), ex=self.ttl)
+                return job
+            except Exception as e:
+                logger.warning(f"Redis job write failed, using local state: {e}")
+
+        with self.lock:
+            self.local[job_id] = job
+        return job
+
+    def get(self, job_id):
+        if self.client is not None:
+            try:
+                raw = self.client.get(self.prefix + job_id)
+                if raw:
+                    return json.loads(raw)
+            except Exception as e:
+                logger.warning(f"Redis job read failed, using local state: {e}")
+
+        with self.lock:
+            job = self.local.get(job_id)
+            return dict(job) if job else None
+
+# Run against fakeredis (if installed) or a local redis-server
+if __name__ == "__main__":
+    import sys
+
+    url = sys.argv[1] if len(sys.argv) > 1 else None
+    if url:
+        client = create_redis_client(url)
+    else:
+        try:
+            import fakeredis
+            client = fakeredis.FakeRedis()
+        except ImportError:
+            client = None
+
+    cache = ResultCache(client)
+    key = cache.make_key(b'sample image bytes')
+    print(f"Cache miss: {cache.get(key)}")
+    cache.set(key, {'deepfake_detected': False, 'confidence': 0.93})
+    print(f"Cache hit: {cache.get(key)}")
+    print(f"Cache stats: {cache.get_stats()}")
+
+    jobs = JobStore(client)
+    jobs.update('job-1', status='processing', frames_processed=10)
+    jobs.update('job-1', frames_processed=20)
+    print(f"Job state: {jobs.get('job-1')}")
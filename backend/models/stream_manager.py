@@ -0,0 +1,365 @@
+# backend/models/stream_manager.py
+import os
+import threading
+import time
+import logging
+from urllib.parse import urlparse
+from collections import deque
+from contextlib import nullcontext
+import cv2
+
+logger = logging.getLogger(__name__)
+
+def parse_source(source):
+    """Device indices arrive as strings from JSON/CLI; everything else is a path or URL"""
+    if isinstance(source, int):
+        return source
+    return int(source) if str(source).isdigit() else source
+
+def is_file_source(source):
+    return isinstance(source, str) and '://' not in source
+
+class SourcePolicy:
+    """Which capture sources clients may open on the server
+
+    Files must resolve (after symlinks) inside media_dir, devices must be
+    listed, and URLs need both an allowed scheme and an allowed host. Anything
+    else, including capture backend pipeline strings, is rejected.
+    """
+
+    def __init__(self, media_dir='', allowed_devices=(), allowed_schemes=(), allowed_hosts=()):
+        self.media_dir = os.path.realpath(media_dir) if media_dir else None
+        self.allowed_devices = set(allowed_devices)
+        self.allowed_schemes = {scheme.lower() for scheme in allowed_schemes}
+        self.allowed_hosts = {host.lower() for host in allowed_hosts}
+
+    def check(self, source):
+        """The source to open (files as absolute paths), or ValueError if it is not allowed"""
+        source = parse_source(source)
+        if isinstance(source, int):
+            if source not in self.allowed_devices:
+                raise ValueError(f"Device {source} is not allowed")
+            return source
+
+        if not is_file_source(source):
+            url = urlparse(source)
+            if url.scheme.lower() not in self.allowed_schemes or (url.hostname or '').lower() not in self.allowed_hosts:
+                raise ValueError(f"Stream URL {url.scheme}://{url.hostname} is not allowed")
+            return source
+
+        if self.media_dir is None:
+            raise ValueError("File sources are disabled")
+        path = os.path.realpath(os.path.join(self.media_dir, source))
+        if os.path.commonpath([path, self.media_dir]) != self.media_dir or not os.path.isfile(path):
+            raise ValueError(f"No media file '{source}'")
+        return path
+
+class RateMeter:
+    """Events per second over a sliding time window"""
+
+    def __init__(self, window_seconds=5.0):
+        self.window_seconds = window_seconds
+        self.events = deque()
+
+    def tick(self, now):
+        self.events.append(now)
+        self.trim(now)
+
+    def trim(self, now):
+        while self.events and now - self.events[0] > self.window_seconds:
+            self.events.popleft()
+
+    def rate(self, now):
+        self.trim(now)
+        return len(self.events) / self.window_seconds
+
+class StreamSource:
+    """One capture source read by its own thread into a single latest-frame slot
+
+    Frames that are overwritten before the inference worker takes them are
+    counted as dropped, so a slow model never builds a backlog. Files are
+    played back at their native frame rate; URLs reconnect with backoff.
+    """
+
+    def __init__(self, stream_id, source, loop=False, reconnect_delay=1.0, max_reconnect_delay=30.0,
+                 on_finished=None):
+        self.stream_id = stream_id
+        self.source = parse_source(source)
+        self.loop = loop
+        self.on_finished = on_finished
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.lock = threading.Lock()
+        self.latest = None  # (frame, frame_number, captured_at)
+        self.stop_event = threading.Event()
+        self.state = 'starting'
+
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.frames_analyzed = 0
+        self.reconnects = 0
+        self.last_lag_ms = 0.0
+        self.lag_ms = deque(maxlen=100)
+        self.read_meter = RateMeter()
+        self.analyzed_meter = RateMeter()
+
+        self.thread = threading.Thread(target=self.run, name=f'stream-{stream_id}', daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        delay = self.reconnect_delay
+        while not self.stop_event.is_set():
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                self.state = 'reconnecting'
+                logger.warning(f"Stream {self.stream_id}: could not open {self.source}, retrying in {delay:.0f}s")
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            self.state = 'running'
+            delay = self.reconnect_delay
+            self.read_frames(cap)
+            cap.release()
+
+            if self.stop_event.is_set():
+                break
+            if is_file_source(self.source) and not self.loop:
+                self.state = 'finished'
+                if self.on_finished is not None:
+                    self.on_finished(self)
+                return
+            if not is_file_source(self.source):
+                self.reconnects += 1
+                self.state = 'reconnecting'
+        self.state = 'stopped'
+
+    def read_frames(self, cap):
+        # Pace file playback to real time; live sources pace themselves
+        fps = cap.get(cv2.CAP_PROP_FPS) if is_file_source(self.source) else 0
+        frame_interval = 1.0 / fps if fps and fps > 0 else 0.0
+        next_frame_at = time.monotonic()
+
+        while not self.stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                return
+
+            now = time.monotonic()
+            with self.lock:
+                if self.latest is not None:
+                    self.frames_dropped += 1
+                self.frames_read += 1
+                self.latest = (frame, self.frames_read, now)
+            self.read_meter.tick(now)
+
+            if frame_interval:
+                next_frame_at += frame_interval
+                self.stop_event.wait(max(0.0, next_frame_at - time.monotonic()))
+
+    def take_frame(self):
+        """Hand the latest unread frame to the inference worker, or None"""
+        with self.lock:
+            latest, self.latest = self.latest, None
+        return latest
+
+    def record_result(self, captured_at):
+        now = time.monotonic()
+        self.last_lag_ms = (now - captured_at) * 1000
+        self.lag_ms.append(self.last_lag_ms)
+        self.frames_analyzed += 1
+        self.analyzed_meter.tick(now)
+
+    def get_status(self):
+        now = time.monotonic()
+        lags = list(self.lag_ms)
+        return {
+            'stream_id': self.stream_id,
+            'source': str(self.source),
+            'state': self.state,
+            'frames_read': self.frames_read,
+            'frames_analyzed': self.frames_analyzed,
+            'frames_dropped': self.frames_dropped,
+            'reconnects': self.reconnects,
+            'read_fps': round(self.read_meter.rate(now), 2),
+            'analyzed_fps': round(self.analyzed_meter.rate(now), 2),
+            'lag_ms': round(self.last_lag_ms, 2),
+            'mean_lag_ms': round(sum(lags) / len(lags), 2) if lags else 0.0
+        }
+
+class StreamManager:
+    """Runs many capture sources and scores their frames in shared batches
+
+    A single inference worker visits streams round-robin, starting after the
+    stream served first last time, and takes at most one frame per stream per
+    batch, so a fast source cannot starve the others. `slot` is an optional
+    context manager factory (as for process_video_stream) that may yield the
+    detector to use; otherwise `detector` is used. `on_result(stream_id,
+    frame, result)` is called for every analyzed frame.
+    """
+
+    def __init__(self, detector=None, slot=None, on_result=None, batch_size=8, idle_wait=0.005):
+        self.detector = detector
+        self.slot = slot
+        self.on_result = on_result
+        self.batch_size = batch_size
+        self.idle_wait = idle_wait
+
+        self.lock = threading.Lock()
+        self.streams = {}
+        self.next_start = 0
+        self.batches = 0
+        self.batch_sizes = deque(maxlen=100)
+        self.stop_event = threading.Event()
+        self.worker = None
+
+    def add_stream(self, stream_id, source, loop=False):
+        with self.lock:
+            if stream_id in self.streams:
+                raise ValueError(f"Stream '{stream_id}' already exists")
+            stream = StreamSource(stream_id, source, loop=loop, on_finished=self.discard_stream)
+            self.streams[stream_id] = stream
+        stream.start()
+        self.ensure_worker()
+        logger.info(f"Stream {stream_id} added from {source}")
+        return stream
+
+    def remove_stream(self, stream_id):
+        with self.lock:
+            stream = self.streams.pop(stream_id, None)
+        if stream is None:
+            return False
+        stream.stop()
+        return True
+
+    def discard_stream(self, stream):
+        """Forget a file stream that played to the end, so it stops counting as a source"""
+        with self.lock:
+            if self.streams.get(stream.stream_id) is stream:
+                del self.streams[stream.stream_id]
+        logger.info(f"Stream {stream.stream_id} finished")
+
+    def ensure_worker(self):
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.stop_event.clear()
+                self.worker = threading.Thread(target=self.run, name='stream-inference', daemon=True)
+                self.worker.start()
+
+    def collect_batch(self):
+        """At most one frame per stream, visiting streams round-robin"""
+        with self.lock:
+            streams = list(self.streams.values())
+            if not streams:
+                return []
+            start = self.next_start % len(streams)
+            self.next_start = start + 1
+
+        batch = []
+        for stream in streams[start:] + streams[:start]:
+            latest = stream.take_frame()
+            if latest is not None:
+                batch.append((stream, latest))
+                if len(batch) >= self.batch_size:
+                    break
+        return batch
+
+    def run(self):
+        while not self.stop_event.is_set():
+            batch = self.collect_batch()
+            if not batch:
+                self.stop_event.wait(self.idle_wait)
+                continue
+
+            frames = [frame for _, (frame, _, _) in batch]
+            try:
+                with self.slot() if self.slot else nullcontext() as detector:
+                    results = (detector or self.detector).analyze_frames(frames)
+            except Exception as e:
+                logger.error(f"Stream batch failed: {e}")
+                continue
+
+            self.batches += 1
+            self.batch_sizes.append(len(batch))
+            for (stream, (frame, frame_number, captured_at)), result in zip(batch, results):
+                stream.record_result(captured_at)
+                result['frame_number'] = frame_number
+                result['lag_ms'] = round(stream.last_lag_ms, 2)
+                if self.on_result is not None:
+                    try:
+                        self.on_result(stream.stream_id, frame, result)
+                    except Exception as e:
+                        logger.error(f"Publishing result for stream {stream.stream_id} failed: {e}")
+
+    def stop(self):
+        with self.lock:
+            streams = list(self.streams.values())
+            self.streams = {}
+        for stream in streams:
+            stream.stop()
+        self.stop_event.set()
+
+    def get_status(self):
+        with self.lock:
+            streams = list(self.streams.values())
+        sizes = list(self.batch_sizes)
+        return {
+            'streams': [stream.get_status() for stream in streams],
+            'batches': self.batches,
+            'mean_batch_size': round(sum(sizes) / len(sizes), 2) if sizes else 0.0
+        }
+
+# Multi-source demo: python -m models.stream_manager video.mp4 [num_streams] [seconds]
+# Plays the file directly and re-serves it as a local MJPEG-over-HTTP stream.
+if __name__ == "__main__":
+    import sys
+    import json
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from models.detector import DeepFakeDetector
+
+    video_path = sys.argv[1]
+    num_streams = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    class MjpegHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+            self.end_headers()
+            cap = cv2.VideoCapture(video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    _, jpeg = cv2.imencode('.jpg', frame)
+                    self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
+                    time.sleep(1.0 / fps)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                cap.release()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MjpegHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/stream.mjpg'
+
+    manager = StreamManager(detector=DeepFakeDetector(allow_untrained=True))
+    for i in range(num_streams):
+        manager.add_stream(f'cam{i}', url if i % 2 else video_path, loop=True)
+
+    time.sleep(seconds)
+    print(json.dumps(manager.get_status(), indent=2))
+    manager.stop()
+    server.shutdown()
@@ -17,10 +17,31 @@ def base64_to_image(base64_string):
     except Exception as e:
         raise ValueError(f"Error converting base64 to image: {e}")
 
-def image_to_base64(image):
+def bytes_to_image(image_bytes):
+    """Decode encoded image bytes (JPEG, PNG, ...) to an OpenCV image"""
+    # imdecode asserts on an empty buffer instead of returning None
+    if not image_bytes:
+        raise ValueError("Empty image data")
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image")
+    return image
+
+def image_to_jpeg_bytes(image, quality=95, max_width=None):
+    """Encode OpenCV image as JPEG bytes, optionally downscaled to max_width"""
+    try:
+        if max_width and image.shape[1] > max_width:
+            scale = max_width / image.shape[1]
+            image = cv2.resize(image, (max_width, int(image.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+        _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+        return buffer.tobytes()
+    except Exception as e:
+        raise ValueError(f"Error encoding image: {e}")
+
+def image_to_base64(image, quality=95, max_width=None):
     """Convert OpenCV image to base64 string"""
     try:
-        _, buffer = cv2.imencode('.jpg', image)
+        buffer = image_to_jpeg_bytes(image, quality, max_width)
         image_base64 = base64.b64encode(buffer).decode('utf-8')
         return image_base64
     except Exception as e:
@@ -0,0 +1,108 @@
+# backend/models/video_aggregator.py
+import random
+import cv2
+
+class VideoResultAggregator:
+    """Running video verdict that keeps O(1) state however many frames are added
+
+    Detections use the detect_from_array shape (is_deepfake, confidence,
+    processing_time_ms, optional reused). Only the first `detail_frames`
+    detections are kept verbatim; optionally, a reservoir of `example_frames`
+    downscaled frames is sampled uniformly over the whole video.
+    """
+
+    # Running totals saved in checkpoints; the example-frame reservoir is not persisted
+    STATE_FIELDS = ['frames_analyzed', 'deepfake_count', 'frames_reused', 'confidence_sum',
+                    'processing_time_sum', 'last_frame_number', 'details']
+
+    def __init__(self, total_frames=0, deepfake_ratio=0.3, detail_frames=5,
+                 example_frames=0, example_width=320, seed=None):
+        self.total_frames = total_frames
+        self.deepfake_ratio = deepfake_ratio
+        self.detail_frames = detail_frames
+        self.example_frames = example_frames
+        self.example_width = example_width
+        self.rng = random.Random(seed)
+
+        self.frames_analyzed = 0
+        self.deepfake_count = 0
+        self.frames_reused = 0
+        self.confidence_sum = 0.0
+        self.processing_time_sum = 0.0
+        self.last_frame_number = 0
+        self.details = []
+        self.reservoir = []
+
+    def add(self, detection, frame=None):
+        self.frames_analyzed += 1
+        self.deepfake_count += int(bool(detection['is_deepfake']))
+        self.frames_reused += int(bool(detection.get('reused')))
+        self.confidence_sum += detection['confidence']
+        self.processing_time_sum += detection['processing_time_ms']
+        self.last_frame_number = detection.get('frame_number', self.last_frame_number)
+
+        if len(self.details) < self.detail_frames:
+            self.details.append(detection)
+        if frame is not None and self.example_frames > 0:
+            self.sample_frame(detection, frame)
+
+    def sample_frame(self, detection, frame):
+        """Reservoir sampling (Algorithm R): every frame seen so far is kept with equal probability"""
+        if len(self.reservoir) < self.example_frames:
+            index = len(self.reservoir)
+            self.reservoir.append(None)
+        else:
+            index = self.rng.randrange(self.frames_analyzed)
+            if index >= self.example_frames:
+                return
+
+        # Store a small copy, never a reference into the decoder's full-size buffer
+        scale = min(1.0, self.example_width / frame.shape[1])
+        thumbnail = cv2.resize(frame, (int(frame.shape[1] * scale), int(frame.shape[0] * scale)),
+                               interpolation=cv2.INTER_AREA)
+        self.reservoir[index] = {
+            'frame_number': detection.get('frame_number'),
+            'is_deepfake': detection['is_deepfake'],
+            'confidence': detection['confidence'],
+            'frame': thumbnail
+        }
+
+    def get_state(self):
+        """JSON-serializable running state, for checkpointing"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    def load_state(self, state):
+        for field in self.STATE_FIELDS:
+            setattr(self, field, state[field])
+
+    def get_examples(self):
+        """Sampled example frames in frame order"""
+        return sorted(self.reservoir, key=lambda e: e['frame_number'] or 0)
+
+    def partial(self):
+        """Summary of the frames seen so far, for progress reporting"""
+        deepfake_percentage = (self.deepfake_count / self.frames_analyzed) * 100 if self.frames_analyzed else 0.0
+        return {
+            'frames_analyzed': self.frames_analyzed,
+            'last_frame_number': self.last_frame_number,
+            'progress': round(self.last_frame_number / self.total_frames * 100, 2) if self.total_frames else None,
+            'deepfake_percentage': round(deepfake_percentage, 2),
+            'confidence': self.confidence_sum / self.frames_analyzed if self.frames_analyzed else 0.0
+        }
+
+    def summary(self):
+        """Final verdict: deepfake if more than deepfake_ratio of the analyzed frames are"""
+        if not self.frames_analyzed:
+            return {'error': 'No frames could be analyzed'}
+
+        deepfake_percentage = (self.deepfake_count / self.frames_analyzed) * 100
+        return {
+            'is_deepfake': deepfake_percentage > self.deepfake_ratio * 100,
+            'confidence': self.confidence_sum / self.frames_analyzed,
+            'deepfake_percentage': round(deepfake_percentage, 2),
+            'frames_analyzed': self.frames_analyzed,
+            'frames_reused': self.frames_reused,
+            'total_frames': self.total_frames,
+            'avg_processing_time_ms': round(self.processing_time_sum / self.frames_analyzed, 2),
+            'frame_details': self.details
+        }
@@ -0,0 +1,173 @@
+# backend/models/video_checkpoint.py
+import os
+import json
+import shutil
+import hashlib
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+class CheckpointBusyError(RuntimeError):
+    """Another analysis of the same video and settings holds the checkpoint"""
+
+class CheckpointLock:
+    """Exclusive, non-blocking OS file lock; the OS releases it if the process dies"""
+
+    def __init__(self, path):
+        self.file = open(path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self.file.close()
+            raise CheckpointBusyError(f"{path} is locked by another analysis")
+
+    def release(self):
+        if self.file.closed:
+            return
+        if fcntl is None:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+
+def file_content_hash(path, chunk_size=1 << 20):
+    """SHA-256 of the file contents, so renamed or re-uploaded copies share checkpoints"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class VideoCheckpointStore:
+    """Local-disk checkpoints and final results for long video analyses
+
+    Entries are keyed by the video's content hash plus the analysis settings,
+    since the same file analyzed differently must not share results. Each key
+    has a directory holding:
+
+        checkpoint.json   last saved position and partial aggregate state
+        frames.jsonl      per-frame results so far, appended at each checkpoint
+        result.json       final result, persisted once the analysis completes
+
+    Files are replaced atomically, so a crash mid-write leaves the previous
+    checkpoint intact. Writers hold acquire(key) so concurrent analyses of the
+    same key cannot interleave their appends.
+    """
+
+    def __init__(self, root='video_checkpoints'):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def make_key(self, video_path, **settings):
+        settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
+        return f'{file_content_hash(video_path)}-{settings_hash}'
+
+    def path(self, key, name):
+        return os.path.join(self.root, key, name)
+
+    def write_json(self, key, name, data):
+        os.makedirs(os.path.join(self.root, key), exist_ok=True)
+        tmp_path = self.path(key, name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path(key, name))
+
+    def read_json(self, key, name):
+        path = self.path(key, name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable {path}: {e}")
+            return None
+
+    def acquire(self, key):
+        """Lock the key for one analysis; raises CheckpointBusyError if it is already held"""
+        # Next to, not inside, the key directory, which clear() removes
+        return CheckpointLock(os.path.join(self.root, f'{key}.lock'))
+
+    def load_result(self, key):
+        return self.read_json(key, 'result.json')
+
+    def save_result(self, key, result):
+        """Persist the final result and drop the checkpoint it supersedes"""
+        self.write_json(key, 'result.json', result)
+        for name in ('checkpoint.json', 'frames.jsonl'):
+            if os.path.exists(self.path(key, name)):
+                os.remove(self.path(key, name))
+
+    def load_checkpoint(self, key):
+        return self.read_json(key, 'checkpoint.json')
+
+    def save_checkpoint(self, key, state, frames=None):
+        """Save the position and aggregate state, appending any new per-frame results first"""
+        if frames:
+            os.makedirs(os.path.join(self.root, key), exist_ok=True)
+            with open(self.path(key, 'frames.jsonl'), 'a') as f:
+                for frame in frames:
+                    f.write(json.dumps(frame) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        self.write_json(key, 'checkpoint.json', state)
+
+    def load_frames(self, key, count):
+        """The first `count` logged per-frame results (lines after a crashed append are ignored)"""
+        path = self.path(key, 'frames.jsonl')
+        frames = []
+        if count and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if len(frames) >= count:
+                        break
+                    frames.append(json.loads(line))
+        if len(frames) < count:
+            raise ValueError(f"Checkpoint for {key} expects {count} frames, log has {len(frames)}")
+        return frames
+
+    def load_resume_state(self, key):
+        """(frames_logged, frames) to resume from, (0, []) if there is nothing usable
+
+        A checkpoint whose frame log is shorter or unreadable is discarded, so
+        the analysis restarts instead of failing on every resubmission.
+        """
+        checkpoint = self.load_checkpoint(key)
+        if not checkpoint:
+            return 0, []
+        try:
+            frames_logged = checkpoint['frames_logged']
+            frames = self.load_frames(key, frames_logged)
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Discarding checkpoint {key}: {e}")
+            self.clear(key)
+            return 0, []
+        self.truncate_frames(key, frames_logged)
+        return frames_logged, frames
+
+    def truncate_frames(self, key, count):
+        """Drop log lines written after the last checkpoint so appends continue from it"""
+        path = self.path(key, 'frames.jsonl')
+        if not os.path.exists(path):
+            return
+        tmp_path = path + '.tmp'
+        with open(path) as src, open(tmp_path, 'w') as dst:
+            for i, line in enumerate(src):
+                if i >= count:
+                    break
+                dst.write(line)
+        os.replace(tmp_path, path)
+
+    def clear(self, key):
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
@@ -1,31 +1,86 @@
 # backend/models/video_detector.py
 import cv2
-import numpy as np
-from .detector import DeepfakeDetector
-import tempfile
-import os
+from .detector import DeepFakeDetector
+from .parallel_video import ParallelVideoAnalyzer, open_at_frame
+from .frame_gate import FrameSimilarityGate
+from .video_aggregator import VideoResultAggregator
+from .face_tracker import FaceTracker
 from collections import deque
-import threading
-import time
 
 class VideoDeepfakeDetector:
     def __init__(self, model_path=None, device='cuda'):
-        self.detector = DeepfakeDetector(model_path, device)
-        self.frame_buffer = deque(maxlen=30)  # Store last 30 frames
+        self.model_path = model_path
+        self.detector = DeepFakeDetector(model_path=model_path)
         self.detection_history = deque(maxlen=10)  # Store last 10 results
-        
-    def analyze_video_file(self, video_path, sample_rate=3):
-        """Analyze entire video file for deepfakes"""
-        cap = cv2.VideoCapture(video_path)
-        
-        if not cap.isOpened():
+        self.tracker = FaceTracker(confidence_threshold=self.detector.confidence_threshold)
+        
+    def analyze_video_file(self, video_path, sample_rate=3, workers=1, reuse_threshold=0.0,
+                           example_frames=0, progress_callback=None, track_faces=False,
+                           checkpoint_store=None, checkpoint_interval=300):
+        """Analyze entire video file for deepfakes
+        
+        Results are folded into a running aggregate as frames arrive, so memory
+        does not grow with video length. progress_callback, if given, receives
+        the partial summary every 30 processed frames. With track_faces, faces
+        are followed across sampled frames, only changed crops are re-scored,
+        and per-track verdicts are added to the summary.
+        
+        With a VideoCheckpointStore, the position and aggregate are saved every
+        checkpoint_interval frames, keyed by content hash and settings; a rerun
+        on the same content resumes there, and a completed analysis is returned
+        from the store. Face tracks and example frames restart on resume.
+        
+        workers > 1 analyzes segments in parallel processes; that path does not
+        support checkpoints, face tracking, example frames or progress callbacks.
+        """
+        if workers > 1:
+            unsupported = [name for name, value in (
+                ('checkpoint_store', checkpoint_store), ('track_faces', track_faces),
+                ('example_frames', example_frames), ('progress_callback', progress_callback)
+            ) if value]
+            if unsupported:
+                raise ValueError(f"{', '.join(unsupported)} not supported with workers > 1")
+            return self.analyze_video_file_parallel(video_path, sample_rate, workers, reuse_threshold)
+        
+        # Near-duplicate sampled frames reuse the previous result
+        gate = FrameSimilarityGate(reuse_threshold=reuse_threshold) if reuse_threshold > 0 else None
+        
+        checkpoint_key = None
+        checkpoint = None
+        if checkpoint_store is not None:
+            manifest = self.detector.model_manifest
+            checkpoint_key = checkpoint_store.make_key(
+                video_path,
+                sample_rate=sample_rate,
+                reuse_threshold=reuse_threshold,
+                track_faces=track_faces,
+                confidence_threshold=self.detector.confidence_threshold,
+                model=manifest['version'] if manifest else self.model_path
+            )
+            stored = checkpoint_store.load_result(checkpoint_key)
+            if stored is not None:
+                return dict(stored, from_store=True)
+            checkpoint = checkpoint_store.load_checkpoint(checkpoint_key)
+        
+        start_frame = checkpoint['frame_count'] if checkpoint else 0
+        try:
+            cap = open_at_frame(video_path, start_frame)
+        except ValueError:
             return {'error': 'Could not open video file'}
         
-        frame_count = 0
-        deepfake_detections = []
+        frame_count = start_frame
+        last_checkpoint = start_frame
+        last_result = checkpoint['last_result'] if checkpoint else None
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        aggregator = VideoResultAggregator(total_frames, example_frames=example_frames)
+        if checkpoint:
+            aggregator.load_state(checkpoint['aggregate'])
+        tracker = FaceTracker(confidence_threshold=self.detector.confidence_threshold) if track_faces else None
         
-        print(f"Analyzing video with {total_frames} frames...")
+        if start_frame:
+            print(f"Resuming video with {total_frames} frames at frame {start_frame}...")
+        else:
+            print(f"Analyzing video with {total_frames} frames...")
         
         while True:
             ret, frame = cap.read()
@@ -38,58 +93,91 @@ class VideoDeepfakeDetector:
             if frame_count % sample_rate != 0:
                 continue
             
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Detect deepfake
-            result = self.detector.detect_from_array(rgb_frame)
+            if gate is not None and gate.should_reuse(frame):
+                result = dict(last_result, processing_time_ms=0.0, reused=True)
+            else:
+                # Detect deepfake (the detector expects BGR frames)
+                result = self.detector.detect_from_array(frame, tracker=tracker)
+                result.pop('tracks', None)
             result['frame_number'] = frame_count
-            deepfake_detections.append(result)
+            aggregator.add(result, frame)
+            last_result = result
             
             # Progress update
             if frame_count % (sample_rate * 30) == 0:  # Every 30 processed frames
-                progress = (frame_count / total_frames) * 100
-                print(f"Progress: {progress:.1f}%")
+                partial = aggregator.partial()
+                print(f"Progress: {partial['progress']}%")
+                if progress_callback is not None:
+                    progress_callback(partial)
+            
+            if checkpoint_key is not None and frame_count - last_checkpoint >= checkpoint_interval:
+                checkpoint_store.save_checkpoint(checkpoint_key, {
+                    'frame_count': frame_count,
+                    'last_result': last_result,
+                    'aggregate': aggregator.get_state()
+                })
+                last_checkpoint = frame_count
+        
+        cap.release()
         
+        result = aggregator.summary()
+        if tracker is not None and 'error' not in result:
+            result['tracks'] = tracker.get_track_verdicts()
+            result['face_inference'] = tracker.get_stats()
+        if checkpoint_key is not None and 'error' not in result:
+            checkpoint_store.save_result(checkpoint_key, result)
+        if example_frames > 0 and 'error' not in result:
+            result['example_frames'] = aggregator.get_examples()
+        return result
+    
+    def analyze_video_file_parallel(self, video_path, sample_rate=3, workers=4, reuse_threshold=0.0):
+        """Analyze time segments of the video in parallel worker processes"""
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return {'error': 'Could not open video file'}
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         cap.release()
         
-        # Analyze results
-        return self._analyze_results(deepfake_detections, total_frames)
+        analyzer = ParallelVideoAnalyzer(
+            model_path=self.model_path,
+            confidence_threshold=self.detector.confidence_threshold,
+            workers=workers,
+            allow_untrained=self.detector.allow_untrained
+        )
+        try:
+            frame_results = analyzer.analyze_frames(video_path, sample_rate, reuse_threshold)
+        finally:
+            analyzer.close()
+        
+        # Same per-frame shape as detect_from_array, so the verdict is computed identically
+        deepfake_detections = [{
+            'frame_number': r['frame_number'],
+            'is_deepfake': r['deepfake_detected'],
+            'confidence': r['confidence'],
+            'faces_detected': r['faces_detected'],
+            'processing_time_ms': r['processing_time_ms'],
+            'reused': r.get('reused', False)
+        } for r in frame_results]
+        
+        result = self._analyze_results(deepfake_detections, total_frames)
+        result['frame_timeline'] = [
+            {'frame_number': d['frame_number'], 'is_deepfake': d['is_deepfake'], 'confidence': d['confidence']}
+            for d in deepfake_detections
+        ]
+        return result
     
     def _analyze_results(self, detections, total_frames):
         """Analyze detection results and determine if video is deepfake"""
-        if not detections:
-            return {'error': 'No frames could be analyzed'}
-        
-        # Calculate statistics
-        deepfake_count = sum(1 for d in detections if d['is_deepfake'])
-        total_detections = len(detections)
-        deepfake_percentage = (deepfake_count / total_detections) * 100
-        
-        # Average confidence
-        avg_confidence = np.mean([d['confidence'] for d in detections])
-        avg_processing_time = np.mean([d['processing_time_ms'] for d in detections])
-        
-        # Determine final result
-        is_deepfake_video = deepfake_percentage > 30  # If >30% frames are deepfake
-        
-        return {
-            'is_deepfake': is_deepfake_video,
-            'confidence': avg_confidence,
-            'deepfake_percentage': round(deepfake_percentage, 2),
-            'frames_analyzed': total_detections,
-            'total_frames': total_frames,
-            'avg_processing_time_ms': round(avg_processing_time, 2),
-            'frame_details': detections[:5]  # Return first 5 for inspection
-        }
+        # Deepfake if >30% of frames are; first 5 detections kept for inspection
+        aggregator = VideoResultAggregator(total_frames, deepfake_ratio=0.3, detail_frames=5)
+        for detection in detections:
+            aggregator.add(detection)
+        return aggregator.summary()
     
     def analyze_realtime_frame(self, frame):
         """Analyze single frame for real-time detection"""
-        # Add frame to buffer
-        self.frame_buffer.append(frame)
-        
-        # Detect deepfake
-        result = self.detector.detect_from_array(frame)
+        # Detect deepfake, re-scoring only faces whose crops changed
+        result = self.detector.detect_from_array(frame, tracker=self.tracker)
         
         # Add to history
         self.detection_history.append(result)
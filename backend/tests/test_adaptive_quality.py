@@ -0,0 +1,72 @@
+# backend/tests/test_adaptive_quality.py
+from models.adaptive_quality import AdaptiveQualityController, QUALITY_TIERS
+
+def make_controller(**kwargs):
+    # No cooldown, so every current_tier() call may change tier
+    options = {'target_latency_ms': 100, 'high_queue_depth': 4, 'low_queue_depth': 1,
+               'cooldown_seconds': 0.0, 'min_samples': 5}
+    options.update(kwargs)
+    return AdaptiveQualityController(**options)
+
+def record_latencies(controller, latency_ms, count):
+    for _ in range(count):
+        controller.latencies.append(latency_ms)
+
+def test_starts_at_full_quality():
+    controller = make_controller()
+    assert controller.current_tier() is QUALITY_TIERS[0]
+
+def test_steps_down_on_high_latency():
+    controller = make_controller()
+    record_latencies(controller, 250, 5)
+    assert controller.current_tier()['name'] == 'reduced'
+    # Latencies from the previous tier are dropped after a change
+    assert len(controller.latencies) == 0
+    assert controller.get_status()['tier_changes'] == 1
+
+def test_steps_down_on_queue_depth():
+    controller = make_controller()
+    controller.in_flight = 4
+    assert controller.current_tier()['name'] == 'reduced'
+
+def test_too_few_samples_do_not_change_tier():
+    controller = make_controller()
+    record_latencies(controller, 250, 4)
+    assert controller.current_tier()['name'] == 'full'
+
+def test_steps_up_when_underloaded():
+    controller = make_controller()
+    controller.level = 2
+    record_latencies(controller, 10, 5)
+    assert controller.current_tier()['name'] == 'reduced'
+
+def test_stays_within_tier_bounds():
+    controller = make_controller()
+    controller.in_flight = 10
+    for _ in range(len(QUALITY_TIERS) + 2):
+        controller.current_tier()
+    assert controller.current_tier() is QUALITY_TIERS[-1]
+
+    controller.in_flight = 0
+    controller.level = 0
+    record_latencies(controller, 10, 5)
+    assert controller.current_tier() is QUALITY_TIERS[0]
+
+def test_cooldown_holds_tier():
+    controller = make_controller(cooldown_seconds=60.0)
+    controller.in_flight = 10
+    assert controller.current_tier()['name'] == 'reduced'
+    assert controller.current_tier()['name'] == 'reduced'
+
+def test_disabled_never_changes_tier():
+    controller = make_controller(enabled=False)
+    controller.in_flight = 10
+    record_latencies(controller, 1000, 5)
+    assert controller.current_tier()['name'] == 'full'
+
+def test_track_counts_in_flight_and_latency():
+    controller = make_controller()
+    with controller.track():
+        assert controller.get_status()['in_flight'] == 1
+    assert controller.get_status()['in_flight'] == 0
+    assert len(controller.latencies) == 1
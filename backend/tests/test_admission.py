@@ -0,0 +1,79 @@
+# backend/tests/test_admission.py
+import threading
+import time
+import pytest
+from models.admission import AdmissionController, LaneFullError
+
+LIMITS = {'realtime': 2, 'interactive': 2, 'batch': 1}
+
+def test_admit_sheds_when_lane_is_full():
+    controller = AdmissionController(LIMITS, retry_after=3)
+    with controller.admit('batch'):
+        with pytest.raises(LaneFullError) as excinfo:
+            with controller.admit('batch'):
+                pass
+        assert excinfo.value.lane == 'batch'
+        assert excinfo.value.retry_after == 3
+        # Other lanes are unaffected
+        with controller.admit('interactive'):
+            pass
+
+    status = controller.get_status()['lanes']['batch']
+    assert status['rejected'] == 1
+    assert status['completed'] == 1
+    assert status['in_flight'] == 0
+
+def test_admit_releases_on_error():
+    controller = AdmissionController(LIMITS)
+    with pytest.raises(RuntimeError):
+        with controller.admit('batch'):
+            raise RuntimeError('job failed')
+    with controller.admit('batch'):
+        assert controller.get_status()['lanes']['batch']['in_flight'] == 1
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+def test_slots_go_to_higher_lanes_first():
+    controller = AdmissionController({lane: 10 for lane in LIMITS}, concurrency=1)
+    order = []
+
+    def worker(lane):
+        with controller.slot(lane):
+            order.append(lane)
+
+    # Hold the only slot while work queues up, lowest priority first
+    with controller.slot('batch'):
+        threads = []
+        for lane in ('batch', 'interactive', 'realtime'):
+            thread = threading.Thread(target=worker, args=(lane,))
+            thread.start()
+            threads.append(thread)
+            wait_for(lambda: controller.get_status()['lanes'][lane]['waiting'] == 1)
+
+    for thread in threads:
+        thread.join(timeout=2.0)
+    assert order == ['realtime', 'interactive', 'batch']
+
+def test_slots_respect_concurrency():
+    controller = AdmissionController({lane: 10 for lane in LIMITS}, concurrency=2)
+    peak = []
+    lock = threading.Lock()
+
+    def worker():
+        with controller.slot('interactive'):
+            with lock:
+                peak.append(controller.running)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=2.0)
+
+    assert max(peak) <= 2
+    assert controller.get_status()['running'] == 0
@@ -0,0 +1,50 @@
+# backend/tests/test_frame_gate.py
+import numpy as np
+import pytest
+
+pytest.importorskip('cv2')
+from models.frame_gate import FrameSimilarityGate
+
+def solid_frame(value, shape=(64, 64, 3)):
+    # Uniform frames have thumbnails of exactly value / 255
+    return np.full(shape, value, dtype=np.uint8)
+
+def test_first_frame_is_analyzed_and_duplicates_reused():
+    gate = FrameSimilarityGate(reuse_threshold=0.02)
+    assert not gate.should_reuse(solid_frame(100))
+    assert gate.should_reuse(solid_frame(100))
+    assert gate.should_reuse(solid_frame(103))  # 3/255 below the threshold
+    assert gate.get_stats()['frames_reused'] == 2
+
+def test_changes_accumulate_against_the_reference():
+    gate = FrameSimilarityGate(reuse_threshold=0.02)
+    gate.should_reuse(solid_frame(100))
+    assert gate.should_reuse(solid_frame(103))
+    # 3/255 from the last frame, but 6/255 from the analyzed reference
+    assert not gate.should_reuse(solid_frame(106))
+
+def test_scene_cuts_are_counted():
+    gate = FrameSimilarityGate(reuse_threshold=0.02, cut_threshold=0.25)
+    gate.should_reuse(solid_frame(0))
+    assert not gate.should_reuse(solid_frame(40))    # changed, not a cut
+    assert not gate.should_reuse(solid_frame(255))   # 215/255 is a cut
+    stats = gate.get_stats()
+    assert stats['scene_cuts'] == 1
+    assert stats['frames_analyzed'] == 3
+
+def test_max_reuse_forces_fresh_analysis():
+    gate = FrameSimilarityGate(reuse_threshold=0.02, max_reuse=2)
+    decisions = [gate.should_reuse(solid_frame(100)) for _ in range(7)]
+    assert decisions == [False, True, True, False, True, True, False]
+
+def test_grayscale_frames():
+    gate = FrameSimilarityGate()
+    assert not gate.should_reuse(solid_frame(50, shape=(48, 48)))
+    assert gate.should_reuse(solid_frame(50, shape=(48, 48)))
+
+def test_reuse_rate():
+    gate = FrameSimilarityGate()
+    assert gate.get_stats()['reuse_rate'] == 0.0
+    for _ in range(4):
+        gate.should_reuse(solid_frame(10))
+    assert gate.get_stats()['reuse_rate'] == 0.75
@@ -0,0 +1,84 @@
+# backend/tests/test_shared_state.py
+import pytest
+from models.shared_state import ResultCache, JobStore
+
+@pytest.fixture(params=['local', 'redis'])
+def client(request):
+    if request.param == 'local':
+        return None
+    fakeredis = pytest.importorskip('fakeredis')
+    return fakeredis.FakeRedis()
+
+class FailingRedis:
+    """Stands in for a Redis server that stopped responding"""
+
+    def get(self, key):
+        raise ConnectionError('redis down')
+
+    def set(self, key, value, ex=None):
+        raise ConnectionError('redis down')
+
+def test_cache_round_trip(client):
+    cache = ResultCache(client)
+    key = cache.make_key(b'image bytes')
+    assert cache.get(key) is None
+    cache.set(key, {'deepfake_detected': False, 'confidence': 0.93})
+    assert cache.get(key) == {'deepfake_detected': False, 'confidence': 0.93}
+
+    stats = cache.get_stats()
+    assert stats['backend'] == ('local' if client is None else 'redis')
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+def test_cache_key_is_content_hash():
+    cache = ResultCache()
+    assert cache.make_key('same') == cache.make_key(b'same')
+    assert cache.make_key(b'a') != cache.make_key(b'b')
+
+def test_cache_entries_are_copies(client):
+    cache = ResultCache(client)
+    result = {'faces': [1]}
+    cache.set('key', result)
+    cache.get('key')['faces'].append(2)
+    result['faces'].append(3)
+    assert cache.get('key') == {'faces': [1]}
+
+def test_local_cache_is_bounded_lru():
+    cache = ResultCache(max_local_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+def test_local_cache_expires_entries():
+    cache = ResultCache(ttl=-1)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+    assert cache.get_stats()['local_entries'] == 0
+
+def test_cache_falls_back_when_redis_fails():
+    cache = ResultCache(FailingRedis())
+    cache.set('a', {'ok': True})
+    assert cache.get('a') == {'ok': True}
+
+def test_job_updates_merge(client):
+    jobs = JobStore(client)
+    assert jobs.get('job-1') is None
+    jobs.update('job-1', status='processing', frames_processed=10)
+    job = jobs.update('job-1', frames_processed=20)
+    assert job['status'] == 'processing'
+    assert jobs.get('job-1')['frames_processed'] == 20
+    assert jobs.get('job-1')['job_id'] == 'job-1'
+
+def test_jobs_shared_between_stores():
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    JobStore(fakeredis.FakeRedis(server=server)).update('job-1', status='completed')
+    assert JobStore(fakeredis.FakeRedis(server=server)).get('job-1')['status'] == 'completed'
+
+def test_job_store_falls_back_when_redis_fails():
+    jobs = JobStore(FailingRedis())
+    jobs.update('job-1', status='failed')
+    assert jobs.get('job-1')['status'] == 'failed'
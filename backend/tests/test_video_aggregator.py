@@ -0,0 +1,84 @@
+# backend/tests/test_video_aggregator.py
+import json
+import numpy as np
+import pytest
+
+pytest.importorskip('cv2')
+from models.video_aggregator import VideoResultAggregator
+
+def detection(frame_number, is_deepfake, confidence=0.5, reused=False):
+    return {'frame_number': frame_number, 'is_deepfake': is_deepfake, 'confidence': confidence,
+            'processing_time_ms': 10.0, 'reused': reused}
+
+def test_summary_verdict_and_totals():
+    aggregator = VideoResultAggregator(total_frames=40, deepfake_ratio=0.3, detail_frames=2)
+    for i in range(10):
+        aggregator.add(detection(i + 1, is_deepfake=i < 4, confidence=0.2 * (i % 5), reused=i == 9))
+
+    summary = aggregator.summary()
+    assert summary['is_deepfake']  # 40% of frames > 30%
+    assert summary['deepfake_percentage'] == 40.0
+    assert summary['frames_analyzed'] == 10
+    assert summary['frames_reused'] == 1
+    assert summary['confidence'] == pytest.approx(0.4)
+    assert summary['avg_processing_time_ms'] == 10.0
+    assert [d['frame_number'] for d in summary['frame_details']] == [1, 2]
+
+def test_ratio_is_exclusive():
+    aggregator = VideoResultAggregator(deepfake_ratio=0.3)
+    for i in range(10):
+        aggregator.add(detection(i + 1, is_deepfake=i < 3))
+    assert not aggregator.summary()['is_deepfake']
+
+def test_empty_video_is_an_error():
+    assert 'error' in VideoResultAggregator(total_frames=100).summary()
+
+def test_partial_progress():
+    aggregator = VideoResultAggregator(total_frames=200)
+    assert aggregator.partial()['frames_analyzed'] == 0
+    aggregator.add(detection(50, is_deepfake=True, confidence=0.1))
+    partial = aggregator.partial()
+    assert partial['progress'] == 25.0
+    assert partial['deepfake_percentage'] == 100.0
+    assert VideoResultAggregator().partial()['progress'] is None
+
+def test_state_round_trip_matches_uninterrupted_run():
+    detections = [detection(i + 1, is_deepfake=i % 3 == 0, confidence=i / 20) for i in range(20)]
+
+    full = VideoResultAggregator(total_frames=20)
+    for d in detections:
+        full.add(d)
+
+    first = VideoResultAggregator(total_frames=20)
+    for d in detections[:12]:
+        first.add(d)
+    # Checkpoints store the state as JSON
+    resumed = VideoResultAggregator(total_frames=20)
+    resumed.load_state(json.loads(json.dumps(first.get_state())))
+    for d in detections[12:]:
+        resumed.add(d)
+
+    assert resumed.summary() == full.summary()
+
+def test_example_frames_are_bounded_downscaled_and_ordered():
+    aggregator = VideoResultAggregator(example_frames=3, example_width=32, seed=0)
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    for i in range(50):
+        aggregator.add(detection(i + 1, is_deepfake=False), frame)
+
+    examples = aggregator.get_examples()
+    assert len(examples) == 3
+    assert [e['frame_number'] for e in examples] == sorted(e['frame_number'] for e in examples)
+    assert examples[0]['frame'].shape == (24, 32, 3)
+
+def test_example_frames_are_sampled_uniformly():
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+    counts = np.zeros(10)
+    for seed in range(2000):
+        aggregator = VideoResultAggregator(example_frames=2, seed=seed)
+        for i in range(10):
+            aggregator.add(detection(i + 1, is_deepfake=False), frame)
+        for example in aggregator.get_examples():
+            counts[example['frame_number'] - 1] += 1
+    # Each frame is kept with probability 2/10
+    assert np.all(np.abs(counts / 2000 - 0.2) < 0.04)
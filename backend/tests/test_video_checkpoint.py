@@ -0,0 +1,79 @@
+# backend/tests/test_video_checkpoint.py
+import pytest
+from models.video_checkpoint import VideoCheckpointStore, CheckpointBusyError
+
+@pytest.fixture
+def store(tmp_path):
+    return VideoCheckpointStore(str(tmp_path / 'checkpoints'))
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(b'not really a video')
+    return str(path)
+
+def test_key_depends_on_content_and_settings(store, video, tmp_path):
+    copy = tmp_path / 'renamed.mp4'
+    copy.write_bytes(b'not really a video')
+    other = tmp_path / 'other.mp4'
+    other.write_bytes(b'different bytes')
+
+    key = store.make_key(video, sample_rate=3, model='v1')
+    assert store.make_key(str(copy), model='v1', sample_rate=3) == key
+    assert store.make_key(video, sample_rate=5, model='v1') != key
+    assert store.make_key(str(other), sample_rate=3, model='v1') != key
+
+def test_checkpoint_and_frames_resume(store):
+    frames = [{'frame_number': i} for i in range(1, 5)]
+    store.save_checkpoint('key', {'frames_logged': 2}, frames[:2])
+    store.save_checkpoint('key', {'frames_logged': 4}, frames[2:])
+    assert store.load_checkpoint('key') == {'frames_logged': 4}
+    assert store.load_resume_state('key') == (4, frames)
+
+def test_resume_drops_frames_after_last_checkpoint(store):
+    frames = [{'frame_number': i} for i in range(1, 6)]
+    store.save_checkpoint('key', {'frames_logged': 3}, frames)
+    # A crash after the append left two frames past the checkpoint
+    assert store.load_resume_state('key') == (3, frames[:3])
+    store.save_checkpoint('key', {'frames_logged': 4}, [{'frame_number': 9}])
+    assert store.load_frames('key', 4) == frames[:3] + [{'frame_number': 9}]
+
+def test_resume_discards_checkpoint_with_short_log(store):
+    store.save_checkpoint('key', {'frames_logged': 5}, [{'frame_number': 1}])
+    assert store.load_resume_state('key') == (0, [])
+    assert store.load_checkpoint('key') is None
+
+def test_nothing_to_resume(store):
+    assert store.load_resume_state('missing') == (0, [])
+
+def test_unreadable_checkpoint_is_ignored(store):
+    store.save_checkpoint('key', {'frames_logged': 0})
+    with open(store.path('key', 'checkpoint.json'), 'w') as f:
+        f.write('{truncated')
+    assert store.load_checkpoint('key') is None
+
+def test_result_supersedes_checkpoint(store):
+    store.save_checkpoint('key', {'frames_logged': 1}, [{'frame_number': 1}])
+    store.save_result('key', {'is_deepfake': False})
+    assert store.load_result('key') == {'is_deepfake': False}
+    assert store.load_checkpoint('key') is None
+    assert store.load_resume_state('key') == (0, [])
+
+def test_lock_is_exclusive_until_released(store):
+    lock = store.acquire('key')
+    with pytest.raises(CheckpointBusyError):
+        store.acquire('key')
+    # Other keys are independent
+    store.acquire('other').release()
+
+    lock.release()
+    lock.release()  # Releasing twice is harmless
+    store.acquire('key').release()
+
+def test_lock_survives_clear(store):
+    lock = store.acquire('key')
+    store.save_checkpoint('key', {'frames_logged': 0})
+    store.clear('key')
+    with pytest.raises(CheckpointBusyError):
+        store.acquire('key')
+    lock.release()
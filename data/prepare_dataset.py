@@ -9,6 +9,9 @@ from torch.utils.data import Dataset, DataLoader
 import torchvision.transforms as transforms
 from pathlib import Path
 import json
+import time
+import argparse
+import multiprocessing as mp
 
 class DeepfakeDataset(Dataset):
     def __init__(self, data_dir, csv_file, transform=None, max_samples=None):
@@ -88,10 +91,227 @@ def download_sample_data():
     
     return df
 
-def create_data_loaders(data_dir='data', csv_file='data/dataset.csv', batch_size=32):
-    """Create train/val/test data loaders"""
+def perceptual_hash(path, hash_size=8, highfreq_factor=4):
+    """64-bit DCT perceptual hash; near-identical frames differ in only a few bits"""
+    image = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return None
     
-    # Data transforms
+    size = hash_size * highfreq_factor
+    resized = cv2.resize(image, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low_freq = cv2.dct(resized)[:hash_size, :hash_size]
+    bits = (low_freq > np.median(low_freq)).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+def compute_hashes(data_dir, filenames, workers=None):
+    """Perceptual hashes of all samples, computed in parallel (None for unreadable files)"""
+    paths = [str(Path(data_dir) / filename) for filename in filenames]
+    with mp.Pool(workers or os.cpu_count()) as pool:
+        return pool.map(perceptual_hash, paths, chunksize=64)
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance for radius queries on hashes
+    
+    Nodes are [hash, sample_indices, {distance: child}]; by the triangle
+    inequality only children at distance d-radius..d+radius can match, so a
+    query visits a small part of the tree instead of every hash.
+    """
+    
+    def __init__(self):
+        self.root = None
+    
+    def add(self, value, index):
+        if self.root is None:
+            self.root = [value, [index], {}]
+            return
+        
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(index)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [index], {}]
+                return
+            node = child
+    
+    def search(self, value, radius):
+        """Indices of all samples whose hash is within radius of value"""
+        results = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= radius:
+                results.extend(node[1])
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return results
+
+def cluster_near_duplicates(hashes, radius=6, groups=None):
+    """Cluster id per sample: samples within `radius` bits share a cluster, as do samples in the same group"""
+    parent = list(range(len(hashes)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    def union(i, j):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    
+    tree = BKTree()
+    for i, value in enumerate(hashes):
+        if value is None:
+            continue
+        for j in tree.search(value, radius):
+            union(i, j)
+        tree.add(value, i)
+    
+    # Known clip/identity groups are never split either
+    if groups is not None:
+        first_in_group = {}
+        for i, group in enumerate(groups):
+            union(i, first_in_group.setdefault(group, i))
+    
+    return [find(i) for i in range(len(hashes))]
+
+def select_per_cluster(df, keep_per_cluster=1):
+    """Keep up to keep_per_cluster samples per (cluster, label), spread evenly through each cluster
+    
+    Labels are deduplicated separately because a fake is often a near-copy
+    of the real frame it was made from, and both are needed for training.
+    """
+    keep = []
+    for _, members in df.sort_values('filename').groupby(['cluster', 'label'], sort=False):
+        positions = np.linspace(0, len(members) - 1, num=min(keep_per_cluster, len(members))).round().astype(int)
+        keep.extend(members.index[np.unique(positions)])
+    return df.loc[sorted(keep)]
+
+def assign_group_splits(df, ratios=(0.7, 0.15, 0.15), seed=42):
+    """Assign whole clusters to train/val/test so each split gets its share of every label"""
+    split_names = ['train', 'val', 'test']
+    targets = {
+        label: np.array(ratios) * count for label, count in df['label'].value_counts().items()
+    }
+    counts = {label: np.zeros(len(split_names)) for label in targets}
+    
+    # Largest clusters first, so small ones can fill the remaining gaps
+    rng = np.random.default_rng(seed)
+    clusters = [(cluster, members['label'].value_counts()) for cluster, members in df.groupby('cluster')]
+    rng.shuffle(clusters)
+    clusters.sort(key=lambda c: -c[1].sum())
+    
+    split_of = {}
+    for cluster, label_counts in clusters:
+        # The split furthest below target for this cluster's labels, weighted by how many it holds
+        deficits = sum(
+            (targets[label] - counts[label]) / targets[label].sum() * n for label, n in label_counts.items()
+        )
+        split = int(np.argmax(deficits))
+        split_of[cluster] = split_names[split]
+        for label, n in label_counts.items():
+            counts[label][split] += n
+    
+    return df['cluster'].map(split_of)
+
+def balance_classes(df, seed=42):
+    """Downsample the majority label within each split to the size of the minority label"""
+    balanced = []
+    for _, split_df in df.groupby('split'):
+        smallest = split_df['label'].value_counts().min()
+        for _, label_df in split_df.groupby('label'):
+            balanced.append(label_df.sample(n=smallest, random_state=seed))
+    return pd.concat(balanced).sort_index()
+
+def estimate_epoch_seconds(data_dir, csv_file, df, transform, sample_size=200, seed=42):
+    """Epoch time estimated from the mean load+transform time of a sample of the given rows"""
+    if df.empty:
+        return 0.0
+    dataset = DeepfakeDataset(data_dir, csv_file, transform=transform)
+    dataset.df = df.sample(n=min(sample_size, len(df)), random_state=seed).reset_index(drop=True)
+    
+    start_time = time.perf_counter()
+    for i in range(len(dataset)):
+        dataset[i]
+    per_sample = (time.perf_counter() - start_time) / len(dataset)
+    return per_sample * len(df)
+
+def deduplicate_dataset(data_dir='data', csv_file='data/dataset.csv', output_dir='data/manifest',
+                        radius=6, keep_per_cluster=1, group_column=None, ratios=(0.7, 0.15, 0.15),
+                        class_balance=False, workers=None, seed=42):
+    """Remove near-duplicate samples and write group-aware, label-stratified splits as a manifest"""
+    df = pd.read_csv(csv_file)
+    
+    start_time = time.perf_counter()
+    hashes = compute_hashes(data_dir, df['filename'], workers)
+    hash_seconds = time.perf_counter() - start_time
+    
+    df['phash'] = [f'{h:016x}' if h is not None else None for h in hashes]
+    unreadable = int(df['phash'].isna().sum())
+    df = df[df['phash'].notna()].copy()
+    
+    start_time = time.perf_counter()
+    groups = df[group_column].tolist() if group_column else None
+    df['cluster'] = cluster_near_duplicates([int(h, 16) for h in df['phash']], radius, groups)
+    cluster_seconds = time.perf_counter() - start_time
+    
+    deduped = select_per_cluster(df, keep_per_cluster)
+    deduped = deduped.assign(split=assign_group_splits(deduped, ratios, seed))
+    if class_balance:
+        deduped = balance_classes(deduped, seed)
+    
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / 'manifest.csv'
+    deduped.to_csv(manifest_path, index=False)
+    
+    # Before: the sequential 70% slice create_data_loaders used to train on
+    train_transform, _ = get_transforms()
+    full_df = pd.read_csv(csv_file)
+    full_train = full_df.iloc[:int(ratios[0] * len(full_df))]
+    epoch_before = estimate_epoch_seconds(data_dir, csv_file, full_train, train_transform, seed=seed)
+    epoch_after = estimate_epoch_seconds(data_dir, csv_file, deduped[deduped['split'] == 'train'],
+                                         train_transform, seed=seed)
+    
+    total = len(df) + unreadable
+    report = {
+        'samples_before': total,
+        'samples_after': len(deduped),
+        'unreadable': unreadable,
+        'reduction': round(1 - len(deduped) / total, 4) if total else 0.0,
+        'clusters': int(df['cluster'].nunique()),
+        'radius': radius,
+        'keep_per_cluster': keep_per_cluster,
+        'group_column': group_column,
+        'hash_seconds': round(hash_seconds, 2),
+        'cluster_seconds': round(cluster_seconds, 2),
+        'splits': {
+            split: {str(label): int(n) for label, n in split_df['label'].value_counts().sort_index().items()}
+            for split, split_df in deduped.groupby('split')
+        },
+        'estimated_epoch_seconds': {'before': round(epoch_before, 2), 'after': round(epoch_after, 2)},
+        'manifest': str(manifest_path)
+    }
+    with open(output_dir / 'dedup_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print(f"🧹 {total} -> {len(deduped)} samples ({report['reduction']:.1%} removed) in {report['clusters']} clusters")
+    print(f"📊 Splits: {report['splits']}")
+    print(f"⏱️ Estimated epoch time: {epoch_before:.1f}s -> {epoch_after:.1f}s")
+    return report
+
+def get_transforms():
+    """Train (augmenting) and eval transforms"""
     train_transform = transforms.Compose([
         transforms.ToPILImage(),
         transforms.Resize((224, 224)),
@@ -111,6 +331,31 @@ def create_data_loaders(data_dir='data', csv_file='data/dataset.csv', batch_size
                            std=[0.229, 0.224, 0.225])
     ])
     
+    return train_transform, val_transform
+
+def create_data_loaders(data_dir='data', csv_file='data/dataset.csv', batch_size=32, manifest_file=None):
+    """Create train/val/test data loaders
+    
+    With a manifest from deduplicate_dataset, its group-aware splits are used
+    instead of sequential slices of csv_file.
+    """
+    
+    # Data transforms
+    train_transform, val_transform = get_transforms()
+    
+    if manifest_file:
+        train_dataset = DeepfakeDataset(data_dir, manifest_file, transform=train_transform)
+        val_dataset = DeepfakeDataset(data_dir, manifest_file, transform=val_transform)
+        test_dataset = DeepfakeDataset(data_dir, manifest_file, transform=val_transform)
+        for dataset, split in ((train_dataset, 'train'), (val_dataset, 'val'), (test_dataset, 'test')):
+            dataset.df = dataset.df[dataset.df['split'] == split].reset_index(drop=True)
+        
+        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
+        val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False)
+        test_loader = DataLoader(test_dataset, batch_size=batch_size, shuffle=False)
+        print(f"📊 Manifest splits - Train: {len(train_dataset)}, Val: {len(val_dataset)}, Test: {len(test_dataset)}")
+        return train_loader, val_loader, test_loader
+    
     # Load dataset
     full_dataset = DeepfakeDataset(data_dir, csv_file, transform=None)
     
@@ -143,10 +388,32 @@ def create_data_loaders(data_dir='data', csv_file='data/dataset.csv', batch_size
     return train_loader, val_loader, test_loader
 
 if __name__ == "__main__":
-    # Download and prepare data
-    df = download_sample_data()
-    
-    # Create data loaders
-    train_loader, val_loader, test_loader = create_data_loaders()
+    parser = argparse.ArgumentParser(description='Prepare the deepfake dataset')
+    parser.add_argument('--dedup', action='store_true',
+                       help='Remove near-duplicates and write a split manifest')
+    parser.add_argument('--data_dir', type=str, default='data')
+    parser.add_argument('--csv_file', type=str, default='data/dataset.csv')
+    parser.add_argument('--output_dir', type=str, default='data/manifest')
+    parser.add_argument('--radius', type=int, default=6,
+                       help='Max Hamming distance between 64-bit hashes of near-duplicates')
+    parser.add_argument('--keep_per_cluster', type=int, default=1,
+                       help='Samples kept per near-duplicate cluster and label')
+    parser.add_argument('--group_column', type=str, default=None,
+                       help='CSV column (e.g. video id) whose groups must stay in one split')
+    parser.add_argument('--class_balance', action='store_true',
+                       help='Downsample the majority label within each split')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
     
-    print("✅ Dataset preparation complete!")
\ No newline at end of file
+    if args.dedup:
+        deduplicate_dataset(args.data_dir, args.csv_file, args.output_dir, radius=args.radius,
+                            keep_per_cluster=args.keep_per_cluster, group_column=args.group_column,
+                            class_balance=args.class_balance, workers=args.workers)
+    else:
+        # Download and prepare data
+        df = download_sample_data()
+        
+        # Create data loaders
+        train_loader, val_loader, test_loader = create_data_loaders()
+        
+        print("✅ Dataset preparation complete!")
\ No newline at end of file
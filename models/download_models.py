@@ -3,6 +3,7 @@ import gdown
 import tensorflow as tf
 from pathlib import Path
 import sys
+from train_deepfake import save_serving_artifact
 
 def download_pretrained_models():
     """Download pre-trained deepfake detection models"""
@@ -38,6 +39,8 @@ def create_base_model():
     models_dir = Path('models/pretrained')
     models_dir.mkdir(parents=True, exist_ok=True)
     model.save(models_dir / 'base_model.h5')
+    # Untrained weights; the version makes that visible in /api/health if it is ever served
+    save_serving_artifact(model, models_dir / 'base_model', version='untrained-base')
     return model
 
 if __name__ == '__main__':
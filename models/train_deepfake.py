@@ -6,40 +6,406 @@ from tensorflow.keras.models import Model
 from tensorflow.keras.optimizers import Adam
 import numpy as np
 import os
+import json
+import hashlib
+import time
 from pathlib import Path
 import argparse
+import importlib.util
+
+def save_serving_artifact(model, artifact_dir, version=None, threshold=0.85):
+    """Export model in the backend's serving format (backend/models/artifact.py)
+
+    Training images come from ImageDataGenerator, i.e. RGB scaled to [0, 1],
+    and the manifest records that so the server preprocesses crops the same way.
+    """
+    spec = importlib.util.spec_from_file_location(
+        'serving_artifact', Path(__file__).resolve().parents[1] / 'backend' / 'models' / 'artifact.py'
+    )
+    artifact = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(artifact)
+    
+    manifest = artifact.save_artifact(
+        model, str(artifact_dir), threshold=threshold, version=version,
+        preprocessing={'color_order': 'rgb', 'rescale': 1.0 / 255}
+    )
+    print(f"✅ Serving artifact saved to {artifact_dir} (version {manifest['version']})")
+    return manifest
+
+class FeatureStore:
+    """Memory-mapped on-disk store of pooled backbone features and labels"""
+    
+    def __init__(self, cache_dir, split):
+        self.cache_dir = Path(cache_dir)
+        self.features_path = self.cache_dir / f'{split}_features.npy'
+        self.labels_path = self.cache_dir / f'{split}_labels.npy'
+        self.meta_path = self.cache_dir / f'{split}_meta.json'
+    
+    def is_valid(self, meta):
+        """Check whether a cached store exists for the same extraction settings"""
+        if not (self.features_path.exists() and self.labels_path.exists() and self.meta_path.exists()):
+            return False
+        with open(self.meta_path) as f:
+            return json.load(f) == meta
+    
+    def create(self, num_samples, feature_dim):
+        """Allocate writable memory-mapped arrays for features and labels"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        features = np.lib.format.open_memmap(
+            self.features_path, mode='w+', dtype=np.float16, shape=(num_samples, feature_dim)
+        )
+        labels = np.lib.format.open_memmap(
+            self.labels_path, mode='w+', dtype=np.float32, shape=(num_samples,)
+        )
+        return features, labels
+    
+    def finalize(self, features, labels, meta):
+        """Flush arrays to disk and record the settings they were built with"""
+        features.flush()
+        labels.flush()
+        with open(self.meta_path, 'w') as f:
+            json.dump(meta, f)
+    
+    def load(self):
+        """Open cached features and labels read-only without loading them into RAM"""
+        return np.load(self.features_path, mmap_mode='r'), np.load(self.labels_path, mmap_mode='r')
+
+class ScoreCache:
+    """Per-sample test scores, labels and sources in one compressed .npz
+    
+    Written once by a batched inference pass; every metric and threshold is
+    then computed from these arrays without touching the model again.
+    """
+    
+    def __init__(self, cache_dir, split):
+        self.cache_dir = Path(cache_dir)
+        self.scores_path = self.cache_dir / f'{split}_scores.npz'
+        self.meta_path = self.cache_dir / f'{split}_scores_meta.json'
+    
+    def is_valid(self, meta):
+        """Check whether cached scores exist for the same model and data"""
+        if not (self.scores_path.exists() and self.meta_path.exists()):
+            return False
+        with open(self.meta_path) as f:
+            return json.load(f) == meta
+    
+    def save(self, scores, is_fake, sources, meta):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(self.scores_path, scores=scores.astype(np.float32),
+                            is_fake=is_fake.astype(bool), sources=np.asarray(sources, dtype=str))
+        with open(self.meta_path, 'w') as f:
+            json.dump(meta, f)
+    
+    def load(self):
+        """(scores, is_fake, sources); scores are the model's P(real) outputs"""
+        with np.load(self.scores_path) as data:
+            return data['scores'], data['is_fake'], data['sources']
+
+def model_fingerprint(model):
+    """Hash of the model's weights, so cached scores are invalidated when it changes"""
+    digest = hashlib.md5()
+    for weights in model.get_weights():
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return digest.hexdigest()
+
+def sample_source(filename):
+    """Source of a sample from its path under the class directory (fake/<source>/x.jpg)"""
+    parts = Path(filename).parts
+    return parts[1] if len(parts) > 2 else parts[0]
+
+def detection_curve(scores, is_fake):
+    """ROC and PR points for the detector rule `deepfake if score < threshold`, vectorised
+    
+    Returns a dict of arrays indexed by threshold, lowest first: at
+    thresholds[i], samples with scores below it are flagged as deepfakes.
+    """
+    order = np.argsort(scores, kind='mergesort')
+    sorted_scores = scores[order]
+    sorted_fake = is_fake[order]
+    
+    # Last index of each distinct score: flagging everything up to it
+    distinct = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    tp = np.r_[0, np.cumsum(sorted_fake)[distinct]]
+    fp = np.r_[0, np.cumsum(~sorted_fake)[distinct]]
+    thresholds = np.r_[sorted_scores[0], sorted_scores[distinct[:-1] + 1],
+                       np.nextafter(sorted_scores[-1], np.inf)]
+    
+    positives = max(int(is_fake.sum()), 1)
+    negatives = max(int((~is_fake).sum()), 1)
+    flagged = tp + fp
+    return {
+        'thresholds': thresholds,
+        'tpr': tp / positives,
+        'fpr': fp / negatives,
+        'precision': np.divide(tp, flagged, out=np.ones(len(tp)), where=flagged > 0),
+        'recall': tp / positives
+    }
+
+def threshold_for_fpr(curve, target_fpr):
+    """Highest-recall threshold whose false-positive rate (real flagged as fake) is within target"""
+    index = np.searchsorted(curve['fpr'], target_fpr, side='right') - 1
+    return float(curve['thresholds'][index])
+
+def score_metrics(scores, is_fake, threshold):
+    """Confusion-matrix metrics at one threshold"""
+    flagged = scores < threshold
+    tp = int(np.sum(flagged & is_fake))
+    fp = int(np.sum(flagged & ~is_fake))
+    fn = int(np.sum(~flagged & is_fake))
+    tn = int(np.sum(~flagged & ~is_fake))
+    return {
+        'threshold': round(float(threshold), 6),
+        'accuracy': (tp + tn) / max(len(scores), 1),
+        'tpr': tp / max(tp + fn, 1),
+        'fpr': fp / max(fp + tn, 1),
+        'precision': tp / max(tp + fp, 1),
+        'confusion': {'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn}
+    }
+
+def per_source_metrics(scores, is_fake, sources, threshold):
+    """Sample count, accuracy and flag rate per source, via one bincount per statistic"""
+    names, codes = np.unique(sources, return_inverse=True)
+    flagged = scores < threshold
+    totals = np.bincount(codes, minlength=len(names))
+    correct = np.bincount(codes, weights=flagged == is_fake, minlength=len(names))
+    flagged_counts = np.bincount(codes, weights=flagged, minlength=len(names))
+    fakes = np.bincount(codes, weights=is_fake, minlength=len(names))
+    return {
+        str(name): {
+            'samples': int(total),
+            'fake_samples': int(fake),
+            'accuracy': round(float(right / total), 4),
+            'flagged_rate': round(float(flags / total), 4)
+        }
+        for name, total, fake, right, flags in zip(names, totals, fakes, correct, flagged_counts)
+    }
+
+def evaluate_scores(scores, is_fake, sources, target_fpr=0.01, thresholds=()):
+    """Full report from cached scores: loss, AUCs, calibrated threshold and per-source breakdown"""
+    curve = detection_curve(scores, is_fake)
+    calibrated = threshold_for_fpr(curve, target_fpr)
+    
+    # Scores are P(real); real-class labels are ~is_fake
+    clipped = np.clip(scores.astype(np.float64), 1e-7, 1 - 1e-7)
+    loss = -np.mean(np.where(is_fake, np.log(1 - clipped), np.log(clipped)))
+    
+    return {
+        'samples': int(len(scores)),
+        'fake_samples': int(is_fake.sum()),
+        'loss': round(float(loss), 6),
+        'roc_auc': round(float(np.sum(np.diff(curve['fpr']) * (curve['tpr'][1:] + curve['tpr'][:-1]) / 2)), 6),
+        'pr_auc': round(float(np.sum(np.diff(curve['recall']) * curve['precision'][1:])), 6),
+        'target_fpr': target_fpr,
+        'calibrated': score_metrics(scores, is_fake, calibrated),
+        'at_threshold': [score_metrics(scores, is_fake, t) for t in thresholds],
+        'per_source': per_source_metrics(scores, is_fake, sources, calibrated),
+        'curve': {key: np.round(values, 6).tolist() for key, values in curve.items()}
+    }
+
+AUGMENTATION_SETTINGS = ('rotation_range', 'width_shift_range', 'height_shift_range', 'horizontal_flip', 'zoom_range')
+
+def augmentation_settings(datagen):
+    """The ImageDataGenerator augmentation parameters that change extracted features"""
+    return {name: np.asarray(getattr(datagen, name)).tolist() for name in AUGMENTATION_SETTINGS}
+
+class FeatureSequence(tf.keras.utils.Sequence):
+    """Batches cached features straight from the memory map"""
+    
+    def __init__(self, features, labels, batch_size=256, shuffle=True):
+        self.features = features
+        self.labels = labels
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.indices = np.arange(len(labels))
+        self.on_epoch_end()
+    
+    def __len__(self):
+        return int(np.ceil(len(self.indices) / self.batch_size))
+    
+    def __getitem__(self, idx):
+        # Sorted indices keep reads from the memory map mostly sequential
+        batch = np.sort(self.indices[idx * self.batch_size:(idx + 1) * self.batch_size])
+        return self.features[batch].astype('float32'), self.labels[batch]
+    
+    def on_epoch_end(self):
+        if self.shuffle:
+            np.random.shuffle(self.indices)
+
+HEAD_LAYERS = ('head_dense', 'head_output')
+
+def copy_head_weights(head, model):
+    """Copy the standalone head's trained weights into the full model"""
+    for name in HEAD_LAYERS:
+        model.get_layer(name).set_weights(head.get_layer(name).get_weights())
+
+class HeadCheckpoint(tf.keras.callbacks.Callback):
+    """ModelCheckpoint for head-only training: saves the full model whenever the head's monitored metric improves"""
+    
+    def __init__(self, full_model, filepath, monitor='val_accuracy'):
+        super().__init__()
+        self.full_model = full_model
+        self.filepath = filepath
+        self.monitor = monitor
+        self.best = -np.inf
+    
+    def on_epoch_end(self, epoch, logs=None):
+        current = (logs or {}).get(self.monitor)
+        if current is not None and current > self.best:
+            self.best = current
+            copy_head_weights(self.model, self.full_model)
+            self.full_model.save(self.filepath)
+
+class DistillationSequence(tf.keras.utils.Sequence):
+    """Pairs each image batch with the teacher's soft labels at the student's input size"""
+    
+    def __init__(self, generator, teacher, student_size, temperature=2.0):
+        self.generator = generator
+        self.teacher = teacher
+        self.student_size = student_size
+        self.temperature = temperature
+    
+    def __len__(self):
+        return len(self.generator)
+    
+    def __getitem__(self, idx):
+        batch_x, batch_y = self.generator[idx]
+        teacher_probs = self.teacher.predict_on_batch(batch_x).reshape(-1)
+        soft_labels = soften_probabilities(teacher_probs, self.temperature)
+        
+        student_x = tf.image.resize(batch_x, self.student_size).numpy()
+        targets = np.stack([batch_y, soft_labels], axis=1).astype('float32')
+        return student_x, targets
+    
+    def on_epoch_end(self):
+        self.generator.on_epoch_end()
+
+def soften_probabilities(probs, temperature):
+    """Apply temperature scaling to sigmoid probabilities"""
+    probs = np.clip(probs, 1e-7, 1 - 1e-7)
+    logits = np.log(probs / (1 - probs))
+    return 1 / (1 + np.exp(-logits / temperature))
+
+def make_distillation_loss(alpha=0.5, temperature=2.0):
+    """Blend hard-label BCE with BCE against the teacher's softened outputs"""
+    bce = tf.keras.losses.BinaryCrossentropy()
+    
+    def distillation_loss(y_true, y_pred):
+        hard_labels = y_true[:, 0:1]
+        soft_labels = y_true[:, 1:2]
+        
+        probs = tf.clip_by_value(y_pred, 1e-7, 1 - 1e-7)
+        logits = tf.math.log(probs / (1 - probs))
+        soft_pred = tf.sigmoid(logits / temperature)
+        
+        hard_loss = bce(hard_labels, y_pred)
+        soft_loss = bce(soft_labels, soft_pred) * (temperature ** 2)
+        return alpha * hard_loss + (1 - alpha) * soft_loss
+    
+    return distillation_loss
+
+def hard_label_accuracy(y_true, y_pred):
+    """Accuracy against the ground-truth column of the distillation targets"""
+    return tf.keras.metrics.binary_accuracy(y_true[:, 0:1], y_pred)
+
+def count_flops(model):
+    """Count floating point operations for a single-image forward pass"""
+    from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2_as_graph
+    
+    spec = tf.TensorSpec([1] + list(model.input_shape[1:]), tf.float32)
+    concrete = tf.function(lambda x: model(x, training=False)).get_concrete_function(spec)
+    _, graph_def = convert_variables_to_constants_v2_as_graph(concrete)
+    
+    with tf.Graph().as_default() as graph:
+        tf.graph_util.import_graph_def(graph_def, name='')
+        options = tf.compat.v1.profiler.ProfileOptionBuilder.float_operation()
+        options['output'] = 'none'
+        profile = tf.compat.v1.profiler.profile(
+            graph=graph, run_meta=tf.compat.v1.RunMetadata(), cmd='op', options=options
+        )
+    return int(profile.total_float_ops)
+
+def measure_cpu_latency(model, runs=50, warmup=5):
+    """Median single-image CPU latency in milliseconds"""
+    sample = np.random.rand(1, *model.input_shape[1:]).astype('float32')
+    timings = []
+    
+    with tf.device('/CPU:0'):
+        for i in range(warmup + runs):
+            start_time = time.perf_counter()
+            model(sample, training=False)
+            if i >= warmup:
+                timings.append((time.perf_counter() - start_time) * 1000)
+    
+    return float(np.median(timings))
 
 class DeepFakeTrainer:
-    def __init__(self, data_dir, model_save_path='models/pretrained/trained_model.h5'):
+    def __init__(self, data_dir, model_save_path='models/pretrained/trained_model.h5', manifest_path=None):
         self.data_dir = Path(data_dir)
         self.model_save_path = Path(model_save_path)
+        # Split manifest from `prepare_dataset.py --dedup`; filenames are relative to data_dir
+        self.manifest_path = Path(manifest_path) if manifest_path else None
         self.model = None
         self.history = None
+    
+    def read_manifest_split(self, split):
+        """Rows of one manifest split, with class names matching flow_from_directory's folders"""
+        import pandas as pd
+        manifest = pd.read_csv(self.manifest_path)
+        rows = manifest[manifest['split'] == split]
+        return rows.assign(class_name=rows['label'].map({0: 'real', 1: 'fake'}))
+    
+    def flow_from_manifest(self, datagen, split, img_size, batch_size, shuffle):
+        """Generator over one manifest split, with the same class indices as flow_from_directory (fake=0, real=1)"""
+        return datagen.flow_from_dataframe(
+            self.read_manifest_split(split),
+            directory=str(self.data_dir),
+            x_col='filename',
+            y_col='class_name',
+            classes=['fake', 'real'],
+            target_size=img_size,
+            batch_size=batch_size,
+            class_mode='binary',
+            shuffle=shuffle
+        )
         
-    def prepare_data_generators(self, batch_size=32, img_size=(128, 128)):
-        """Prepare data generators for training and validation"""
+    def prepare_data_generators(self, batch_size=32, img_size=(128, 128), augment=True, shuffle=True):
+        """Prepare data generators for training and validation
+        
+        With a manifest, its deduplicated group-aware train/val splits replace
+        the random 20% validation_split, so near-duplicates can't straddle them.
+        """
         
         # Data augmentation for training
-        train_datagen = ImageDataGenerator(
-            rescale=1./255,
-            rotation_range=20,
-            width_shift_range=0.2,
-            height_shift_range=0.2,
-            horizontal_flip=True,
-            zoom_range=0.2,
-            validation_split=0.2  # Use 20% for validation
-        )
+        if augment:
+            train_datagen = ImageDataGenerator(
+                rescale=1./255,
+                rotation_range=20,
+                width_shift_range=0.2,
+                height_shift_range=0.2,
+                horizontal_flip=True,
+                zoom_range=0.2,
+                validation_split=0.2  # Use 20% for validation
+            )
+        else:
+            train_datagen = ImageDataGenerator(rescale=1./255, validation_split=0.2)
         
         # Only rescaling for validation
         val_datagen = ImageDataGenerator(rescale=1./255, validation_split=0.2)
         
+        if self.manifest_path is not None:
+            return (
+                self.flow_from_manifest(train_datagen, 'train', img_size, batch_size, shuffle),
+                self.flow_from_manifest(val_datagen, 'val', img_size, batch_size, shuffle)
+            )
+        
         # Training generator
         train_generator = train_datagen.flow_from_directory(
             self.data_dir,
             target_size=img_size,
             batch_size=batch_size,
             class_mode='binary',
-            subset='training'
+            subset='training',
+            shuffle=shuffle
         )
         
         # Validation generator
@@ -48,7 +414,8 @@ class DeepFakeTrainer:
             target_size=img_size,
             batch_size=batch_size,
             class_mode='binary',
-            subset='validation'
+            subset='validation',
+            shuffle=shuffle
         )
         
         return train_generator, val_generator
@@ -67,10 +434,10 @@ class DeepFakeTrainer:
             
             # Add custom layers
             x = base_model.output
-            x = GlobalAveragePooling2D()(x)
-            x = Dense(128, activation='relu')(x)
-            x = Dropout(0.3)(x)
-            predictions = Dense(1, activation='sigmoid')(x)
+            x = GlobalAveragePooling2D(name='feature_pool')(x)
+            x = Dense(128, activation='relu', name='head_dense')(x)
+            x = Dropout(0.3, name='head_dropout')(x)
+            predictions = Dense(1, activation='sigmoid', name='head_output')(x)
             
             self.model = Model(inputs=base_model.input, outputs=predictions)
             
@@ -98,7 +465,100 @@ class DeepFakeTrainer:
         
         return self.model
     
-    def train(self, epochs=50, batch_size=32, fine_tune_epochs=10):
+    def create_head_model(self, feature_dim):
+        """Create a standalone copy of the classification head for cached features"""
+        inputs = tf.keras.Input(shape=(feature_dim,))
+        x = Dense(128, activation='relu', name='head_dense')(inputs)
+        x = Dropout(0.3, name='head_dropout')(x)
+        predictions = Dense(1, activation='sigmoid', name='head_output')(x)
+        
+        head = Model(inputs=inputs, outputs=predictions)
+        head.compile(
+            optimizer=Adam(learning_rate=0.001),
+            loss='binary_crossentropy',
+            metrics=['accuracy', 'precision', 'recall']
+        )
+        return head
+    
+    def extract_features(self, generator, store, views=1):
+        """Run the frozen backbone once per view and write pooled features to the store"""
+        extractor = Model(inputs=self.model.input, outputs=self.model.get_layer('feature_pool').output)
+        feature_dim = extractor.output_shape[-1]
+        features, labels = store.create(generator.samples * views, feature_dim)
+        
+        offset = 0
+        for view in range(views):
+            print(f"Extracting features: view {view + 1}/{views}")
+            generator.reset()
+            for _ in range(len(generator)):
+                batch_x, batch_y = next(generator)
+                batch_features = extractor.predict_on_batch(batch_x)
+                features[offset:offset + len(batch_y)] = batch_features
+                labels[offset:offset + len(batch_y)] = batch_y
+                offset += len(batch_y)
+        
+        return features, labels
+    
+    def load_or_extract_features(self, generator, cache_dir, split, views=1, img_size=(128, 128), augmented=False):
+        """Reuse a cached feature store if it matches the current data, otherwise build it"""
+        store = FeatureStore(cache_dir, split)
+        meta = {
+            'samples': generator.samples,
+            'filenames_hash': hashlib.md5('\n'.join(generator.filenames).encode()).hexdigest(),
+            'views': views,
+            'img_size': list(img_size),
+            # One plain view and one augmented view both have views=1
+            'augmented': augmented,
+            'augmentation': augmentation_settings(generator.image_data_generator) if augmented else None,
+        }
+        
+        if store.is_valid(meta):
+            print(f"Using cached {split} features from {cache_dir}")
+        else:
+            features, labels = self.extract_features(generator, store, views=views)
+            store.finalize(features, labels, meta)
+            del features, labels
+        
+        return store.load()
+    
+    def train_head_on_cached_features(self, epochs, batch_size, cache_dir, augmented_views=0):
+        """Phase 1 variant: train the Dense head on cached backbone features"""
+        if self.model is None or 'feature_pool' not in [layer.name for layer in self.model.layers]:
+            raise ValueError("Cached features require the efficientnet model from create_model()")
+        
+        # Augmented views are drawn from the training generator, validation is never augmented
+        train_gen, _ = self.prepare_data_generators(
+            batch_size=batch_size, augment=augmented_views > 0, shuffle=False
+        )
+        _, val_gen = self.prepare_data_generators(batch_size=batch_size, augment=False, shuffle=False)
+        
+        train_x, train_y = self.load_or_extract_features(
+            train_gen, cache_dir, 'train', views=max(1, augmented_views), augmented=augmented_views > 0
+        )
+        val_x, val_y = self.load_or_extract_features(val_gen, cache_dir, 'val')
+        
+        head = self.create_head_model(train_x.shape[1])
+        # Same callbacks as the uncached phase 1; the checkpoint saves the full model
+        callbacks = [
+            tf.keras.callbacks.EarlyStopping(patience=5, restore_best_weights=True),
+            tf.keras.callbacks.ReduceLROnPlateau(factor=0.2, patience=3),
+            HeadCheckpoint(self.model, self.model_save_path, monitor='val_accuracy')
+        ]
+        history = head.fit(
+            FeatureSequence(train_x, train_y, batch_size=batch_size),
+            epochs=epochs,
+            validation_data=FeatureSequence(val_x, val_y, batch_size=batch_size, shuffle=False),
+            callbacks=callbacks,
+            verbose=1
+        )
+        
+        # Copy the trained head into the full model
+        copy_head_weights(head, self.model)
+        
+        return history
+    
+    def train(self, epochs=50, batch_size=32, fine_tune_epochs=10,
+              cache_features=False, feature_cache_dir='models/feature_cache', augmented_views=0):
         """Train the deepfake detection model"""
         
         # Prepare data
@@ -120,14 +580,20 @@ class DeepFakeTrainer:
         ]
         
         # Initial training with frozen base
-        print("Phase 1: Training with frozen base layers...")
-        history1 = self.model.fit(
-            train_gen,
-            epochs=epochs,
-            validation_data=val_gen,
-            callbacks=callbacks,
-            verbose=1
-        )
+        if cache_features:
+            print("Phase 1: Training head on cached backbone features...")
+            history1 = self.train_head_on_cached_features(
+                epochs, batch_size, feature_cache_dir, augmented_views=augmented_views
+            )
+        else:
+            print("Phase 1: Training with frozen base layers...")
+            history1 = self.model.fit(
+                train_gen,
+                epochs=epochs,
+                validation_data=val_gen,
+                callbacks=callbacks,
+                verbose=1
+            )
         
         # Fine-tuning (unfreeze some layers)
         if hasattr(self.model.layers[0], 'trainable'):
@@ -160,42 +626,282 @@ class DeepFakeTrainer:
         # Save final model
         self.model.save(self.model_save_path)
         print(f"✅ Model saved to {self.model_save_path}")
+        save_serving_artifact(self.model, self.model_save_path.with_suffix(''))
         
         return self.history
     
-    def evaluate(self, test_dir=None):
-        """Evaluate the trained model"""
+    def create_student_model(self, input_shape=(112, 112, 3), width=32):
+        """Create a compact depthwise-separable CNN for realtime inference"""
+        layers = tf.keras.layers
+        student = tf.keras.Sequential([
+            layers.Conv2D(width, (3, 3), strides=2, padding='same', use_bias=False, input_shape=input_shape),
+            layers.BatchNormalization(),
+            layers.ReLU(),
+            layers.SeparableConv2D(width * 2, (3, 3), padding='same', use_bias=False),
+            layers.BatchNormalization(),
+            layers.ReLU(),
+            layers.MaxPooling2D(2, 2),
+            layers.SeparableConv2D(width * 4, (3, 3), padding='same', use_bias=False),
+            layers.BatchNormalization(),
+            layers.ReLU(),
+            layers.MaxPooling2D(2, 2),
+            layers.SeparableConv2D(width * 8, (3, 3), padding='same', use_bias=False),
+            layers.BatchNormalization(),
+            layers.ReLU(),
+            layers.GlobalAveragePooling2D(),
+            layers.Dropout(0.2),
+            layers.Dense(1, activation='sigmoid')
+        ], name='realtime_student')
+        
+        return student
+    
+    def distill(self, teacher_path, student_path='models/pretrained/realtime_student.h5',
+                student_size=(112, 112), epochs=30, batch_size=32, temperature=2.0, alpha=0.5):
+        """Train a compact student from the teacher's soft labels and write a comparison report"""
+        
+        # Teacher sees images at its own input size, the student gets them resized
+        teacher = tf.keras.models.load_model(teacher_path, compile=False)
+        teacher_size = tuple(teacher.input_shape[1:3])
+        train_gen, val_gen = self.prepare_data_generators(batch_size=batch_size, img_size=teacher_size)
+        
+        student = self.create_student_model(input_shape=(*student_size, 3))
+        student.compile(
+            optimizer=Adam(learning_rate=0.001),
+            loss=make_distillation_loss(alpha=alpha, temperature=temperature),
+            metrics=[hard_label_accuracy]
+        )
+        
+        print(f"Distilling {teacher_path} into a {student_size[0]}x{student_size[1]} student...")
+        student.fit(
+            DistillationSequence(train_gen, teacher, student_size, temperature),
+            epochs=epochs,
+            validation_data=DistillationSequence(val_gen, teacher, student_size, temperature),
+            callbacks=[
+                tf.keras.callbacks.EarlyStopping(
+                    monitor='val_hard_label_accuracy', mode='max', patience=5, restore_best_weights=True
+                ),
+                tf.keras.callbacks.ReduceLROnPlateau(factor=0.2, patience=3)
+            ],
+            verbose=1
+        )
+        
+        # Recompile with a standard loss so the artifact loads without custom objects
+        student.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
+        student_path = Path(student_path)
+        student_path.parent.mkdir(parents=True, exist_ok=True)
+        student.save(student_path)
+        print(f"✅ Student model saved to {student_path}")
+        save_serving_artifact(student, student_path.with_suffix(''))
+        
+        report = self.compare_models(teacher, student, val_gen, student_size)
+        report.update({'teacher_path': str(teacher_path), 'student_path': str(student_path),
+                       'temperature': temperature, 'alpha': alpha})
+        report_path = student_path.with_name(student_path.stem + '_report.json')
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📊 Distillation report saved to {report_path}")
+        
+        return student, report
+    
+    def compare_models(self, teacher, student, val_gen, student_size):
+        """Compare accuracy, FLOPs, parameters and CPU latency of teacher and student"""
+        teacher_correct = 0
+        student_correct = 0
+        total = 0
+        
+        for i in range(len(val_gen)):
+            batch_x, batch_y = val_gen[i]
+            teacher_pred = teacher.predict_on_batch(batch_x).reshape(-1) >= 0.5
+            student_x = tf.image.resize(batch_x, student_size).numpy()
+            student_pred = student.predict_on_batch(student_x).reshape(-1) >= 0.5
+            
+            teacher_correct += int(np.sum(teacher_pred == batch_y.astype(bool)))
+            student_correct += int(np.sum(student_pred == batch_y.astype(bool)))
+            total += len(batch_y)
+        
+        report = {}
+        for name, model, correct in (('teacher', teacher, teacher_correct), ('student', student, student_correct)):
+            report[name] = {
+                'input_size': list(model.input_shape[1:3]),
+                'accuracy': correct / total if total else 0.0,
+                'flops': count_flops(model),
+                'parameters': int(model.count_params()),
+                'cpu_latency_ms': measure_cpu_latency(model)
+            }
+            print(f"{name}: {report[name]}")
+        
+        return report
+    
+    def predict_test_scores(self, test_dir, cache_dir, batch_size=32, img_size=None):
+        """Batched inference over test_dir (or the manifest's test split) once; later calls reuse the cached scores"""
+        img_size = img_size or tuple(self.model.input_shape[1:3])
+        test_datagen = ImageDataGenerator(rescale=1./255)
         if test_dir:
-            test_datagen = ImageDataGenerator(rescale=1./255)
             test_generator = test_datagen.flow_from_directory(
                 test_dir,
-                target_size=(128, 128),
-                batch_size=32,
+                target_size=img_size,
+                batch_size=batch_size,
                 class_mode='binary',
                 shuffle=False
             )
+            source_of = sample_source
+        else:
+            test_rows = self.read_manifest_split('test')
+            test_generator = self.flow_from_manifest(test_datagen, 'test', img_size, batch_size, shuffle=False)
+            if 'source' in test_rows:
+                source_of = dict(zip(test_rows['filename'], test_rows['source'].astype(str))).get
+            else:
+                source_of = sample_source
+        
+        cache = ScoreCache(cache_dir, 'test')
+        meta = {
+            'model': model_fingerprint(self.model),
+            'samples': test_generator.samples,
+            'filenames_hash': hashlib.md5('\n'.join(test_generator.filenames).encode()).hexdigest(),
+            'img_size': list(img_size),
+        }
+        if cache.is_valid(meta):
+            print(f"Using cached test scores from {cache_dir}")
+            return cache.load()
+        
+        start_time = time.time()
+        scores = np.empty(test_generator.samples, dtype=np.float32)
+        offset = 0
+        for _ in range(len(test_generator)):
+            batch_x, _ = next(test_generator)
+            batch_scores = np.asarray(self.model.predict_on_batch(batch_x)).reshape(-1)
+            scores[offset:offset + len(batch_scores)] = batch_scores
+            offset += len(batch_scores)
+        print(f"Scored {offset} test images in {time.time() - start_time:.1f}s")
+        
+        fake_index = test_generator.class_indices.get('fake', 0)
+        is_fake = test_generator.classes == fake_index
+        sources = [source_of(filename) for filename in test_generator.filenames]
+        cache.save(scores, is_fake, sources, meta)
+        return cache.load()
+    
+    def evaluate(self, test_dir=None, cache_dir='models/eval_cache', target_fpr=0.01,
+                 thresholds=(0.85,), batch_size=32, report_path=None):
+        """Evaluate the trained model from cached test scores
+        
+        Reports loss, ROC/PR curves and AUCs, the threshold meeting target_fpr
+        (fraction of real images flagged as fake), metrics at that and any
+        given thresholds, and a per-source breakdown. Without test_dir, the
+        manifest's test split is used.
+        """
+        if test_dir or self.manifest_path is not None:
+            scores, is_fake, sources = self.predict_test_scores(test_dir, cache_dir, batch_size=batch_size)
+            
+            start_time = time.perf_counter()
+            report = evaluate_scores(scores, is_fake, sources, target_fpr=target_fpr, thresholds=thresholds)
+            report['metrics_ms'] = round((time.perf_counter() - start_time) * 1000, 2)
+            
+            calibrated = report['calibrated']
+            print(f"Test Loss: {report['loss']:.4f}")
+            print(f"ROC AUC: {report['roc_auc']:.4f}  PR AUC: {report['pr_auc']:.4f}")
+            print(f"Threshold for FPR <= {target_fpr}: {calibrated['threshold']:.4f} "
+                  f"(accuracy {calibrated['accuracy']:.4f}, TPR {calibrated['tpr']:.4f}, FPR {calibrated['fpr']:.4f})")
+            for metrics in report['at_threshold']:
+                print(f"At threshold {metrics['threshold']}: accuracy {metrics['accuracy']:.4f}, "
+                      f"TPR {metrics['tpr']:.4f}, FPR {metrics['fpr']:.4f}")
+            for source, metrics in report['per_source'].items():
+                print(f"  {source}: {metrics}")
+            print(f"Metrics computed in {report['metrics_ms']}ms")
             
-            evaluation = self.model.evaluate(test_generator)
-            print(f"Test Loss: {evaluation[0]:.4f}")
-            print(f"Test Accuracy: {evaluation[1]:.4f}")
+            if report_path:
+                Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+                with open(report_path, 'w') as f:
+                    json.dump(report, f, indent=2)
+                print(f"📄 Evaluation report saved to {report_path}")
             
-            return evaluation
+            return report
 
 def main():
     parser = argparse.ArgumentParser(description='Train deepfake detection model')
+    parser.add_argument('--mode', type=str, default='train', choices=['train', 'distill', 'evaluate'],
+                       help='Train the full model, distill a compact realtime student, or evaluate a model')
     parser.add_argument('--data_dir', type=str, required=True, 
                        help='Path to training data directory')
     parser.add_argument('--epochs', type=int, default=50, 
                        help='Number of training epochs')
     parser.add_argument('--batch_size', type=int, default=32, 
                        help='Batch size for training')
+    parser.add_argument('--cache_features', action='store_true',
+                       help='Train phase 1 on cached backbone features instead of images')
+    parser.add_argument('--feature_cache_dir', type=str, default='models/feature_cache',
+                       help='Directory for the memory-mapped feature store')
+    parser.add_argument('--augmented_views', type=int, default=0,
+                       help='Augmented views per training image to cache (0 = one plain view)')
+    parser.add_argument('--teacher_path', type=str, default='models/pretrained/trained_model.h5',
+                       help='Teacher model used for distillation')
+    parser.add_argument('--student_path', type=str, default='models/pretrained/realtime_student.h5',
+                       help='Where to save the distilled student model')
+    parser.add_argument('--student_size', type=int, default=112,
+                       help='Square input size of the student model')
+    parser.add_argument('--temperature', type=float, default=2.0,
+                       help='Softening temperature for teacher outputs')
+    parser.add_argument('--alpha', type=float, default=0.5,
+                       help='Weight of the hard-label loss during distillation')
+    parser.add_argument('--model_path', type=str, default='models/pretrained/trained_model.h5',
+                       help='Model to evaluate')
+    parser.add_argument('--manifest', type=str, default=None,
+                       help='Split manifest from `prepare_dataset.py --dedup`, relative to --data_dir')
+    parser.add_argument('--test_dir', type=str, default=None,
+                       help='Test data directory for evaluation (defaults to the manifest test split, else --data_dir)')
+    parser.add_argument('--eval_cache_dir', type=str, default='models/eval_cache',
+                       help='Directory for cached test scores')
+    parser.add_argument('--target_fpr', type=float, default=0.01,
+                       help='Maximum fraction of real images flagged as fake when calibrating')
+    parser.add_argument('--thresholds', type=float, nargs='*', default=[0.85],
+                       help='Extra thresholds to report metrics at')
+    parser.add_argument('--report_path', type=str, default='models/eval_cache/evaluation_report.json',
+                       help='Where to write the evaluation report')
+    parser.add_argument('--export_artifact', type=str, default=None,
+                       help='Export the model as a serving artifact with the calibrated threshold')
     
     args = parser.parse_args()
     
+    if args.mode == 'distill':
+        trainer = DeepFakeTrainer(args.data_dir, manifest_path=args.manifest)
+        trainer.distill(
+            args.teacher_path,
+            student_path=args.student_path,
+            student_size=(args.student_size, args.student_size),
+            epochs=args.epochs,
+            batch_size=args.batch_size,
+            temperature=args.temperature,
+            alpha=args.alpha
+        )
+        print("✅ Distillation completed successfully!")
+        return
+    
+    if args.mode == 'evaluate':
+        trainer = DeepFakeTrainer(args.data_dir, model_save_path=args.model_path, manifest_path=args.manifest)
+        trainer.model = tf.keras.models.load_model(args.model_path, compile=False)
+        report = trainer.evaluate(
+            args.test_dir or (None if args.manifest else args.data_dir),
+            cache_dir=args.eval_cache_dir,
+            target_fpr=args.target_fpr,
+            thresholds=args.thresholds,
+            batch_size=args.batch_size,
+            report_path=args.report_path
+        )
+        if args.export_artifact:
+            save_serving_artifact(trainer.model, args.export_artifact,
+                                  threshold=report['calibrated']['threshold'])
+        print("✅ Evaluation completed successfully!")
+        return
+    
     # Train the model
-    trainer = DeepFakeTrainer(args.data_dir)
+    trainer = DeepFakeTrainer(args.data_dir, manifest_path=args.manifest)
     trainer.create_model()
-    history = trainer.train(epochs=args.epochs, batch_size=args.batch_size)
+    history = trainer.train(
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        cache_features=args.cache_features,
+        feature_cache_dir=args.feature_cache_dir,
+        augmented_views=args.augmented_views
+    )
     
     print("✅ Training completed successfully!")
 
@@ -0,0 +1,24 @@
+# tests/conftest.py
+import importlib.util
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+def load_script(relative_path, name):
+    """Import a training/data script by path (models/ here would clash with backend/models)"""
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope='session')
+def train_deepfake():
+    pytest.importorskip('tensorflow')
+    return load_script('models/train_deepfake.py', 'train_deepfake')
+
+@pytest.fixture(scope='session')
+def prepare_dataset():
+    for module in ('cv2', 'pandas', 'sklearn', 'torch', 'torchvision'):
+        pytest.importorskip(module)
+    return load_script('data/prepare_dataset.py', 'prepare_dataset')
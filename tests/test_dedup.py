@@ -0,0 +1,80 @@
+# tests/test_dedup.py
+import random
+import numpy as np
+import pytest
+
+def random_hashes(seed=0, n=300):
+    rng = random.Random(seed)
+    bases = [rng.getrandbits(64) for _ in range(30)]
+    # Near-copies of a few base images, each a handful of bits away
+    hashes = []
+    for _ in range(n):
+        value = rng.choice(bases)
+        for _ in range(rng.randrange(5)):
+            value ^= 1 << rng.randrange(64)
+        hashes.append(value)
+    return hashes
+
+def test_bk_tree_search_matches_brute_force(prepare_dataset):
+    hashes = random_hashes()
+    tree = prepare_dataset.BKTree()
+    for i, value in enumerate(hashes):
+        tree.add(value, i)
+
+    for query in hashes[:50]:
+        for radius in (0, 3, 8):
+            expected = [i for i, value in enumerate(hashes)
+                        if prepare_dataset.hamming_distance(query, value) <= radius]
+            assert sorted(tree.search(query, radius)) == expected
+
+def test_clusters_are_transitive(prepare_dataset):
+    # 0-1 and 1-2 are within radius, 0-2 is not; 3 is far from all
+    hashes = [0b0, 0b111, 0b111111, 0xFFFF0000]
+    assert prepare_dataset.cluster_near_duplicates(hashes, radius=3) == [0, 0, 0, 3]
+
+def test_clusters_match_connected_components(prepare_dataset):
+    hashes = random_hashes(seed=1)
+    clusters = prepare_dataset.cluster_near_duplicates(hashes, radius=6)
+
+    for i, a in enumerate(hashes):
+        for j, b in enumerate(hashes):
+            if prepare_dataset.hamming_distance(a, b) <= 6:
+                assert clusters[i] == clusters[j]
+    # Cluster ids are the smallest member index
+    assert all(clusters[i] <= i and clusters[clusters[i]] == clusters[i] for i in range(len(hashes)))
+
+def test_unreadable_samples_stay_alone(prepare_dataset):
+    assert prepare_dataset.cluster_near_duplicates([None, 5, None, 5], radius=0) == [0, 1, 2, 1]
+
+def test_groups_are_never_split(prepare_dataset):
+    hashes = [0, 1 << 40, 0xFFFF, 1 << 20]
+    groups = ['clip-a', 'clip-b', 'clip-b', 'clip-a']
+    assert prepare_dataset.cluster_near_duplicates(hashes, radius=0, groups=groups) == [0, 1, 1, 0]
+
+def test_select_per_cluster_keeps_each_label(prepare_dataset):
+    pd = pytest.importorskip('pandas')
+    df = pd.DataFrame({
+        'filename': ['real/a.jpg', 'real/b.jpg', 'fake/a.jpg', 'real/c.jpg'],
+        'label': [0, 0, 1, 0],
+        'cluster': [0, 0, 0, 3]
+    })
+    kept = prepare_dataset.select_per_cluster(df)
+    assert sorted(kept['filename']) == ['fake/a.jpg', 'real/a.jpg', 'real/c.jpg']
+
+def test_group_splits_follow_ratios(prepare_dataset):
+    pd = pytest.importorskip('pandas')
+    rng = np.random.default_rng(0)
+    sizes = rng.integers(1, 6, 200)
+    df = pd.DataFrame({
+        'cluster': np.repeat(np.arange(200), sizes),
+        'label': np.repeat(rng.integers(0, 2, 200), sizes)
+    })
+    df['split'] = prepare_dataset.assign_group_splits(df)
+
+    # Every cluster lands in exactly one split
+    assert (df.groupby('cluster')['split'].nunique() == 1).all()
+    for _, label_df in df.groupby('label'):
+        shares = label_df['split'].value_counts(normalize=True)
+        assert shares['train'] == pytest.approx(0.7, abs=0.05)
+        assert shares['val'] == pytest.approx(0.15, abs=0.05)
+        assert shares['test'] == pytest.approx(0.15, abs=0.05)
@@ -0,0 +1,73 @@
+# tests/test_evaluate_scores.py
+import numpy as np
+import pytest
+
+def random_scores(seed=0, n=500):
+    rng = np.random.default_rng(seed)
+    is_fake = rng.random(n) < 0.4
+    # Scores are P(real): fakes skew low, with ties from rounding
+    scores = np.round(np.clip(rng.normal(np.where(is_fake, 0.35, 0.7), 0.2), 0, 1), 2)
+    sources = np.where(is_fake, rng.choice(['deepfakes', 'face2face'], n), 'real')
+    return scores, is_fake, sources
+
+def brute_force_auc(scores, is_fake):
+    # Probability a fake scores below a real, ties counting half
+    fake = scores[is_fake][:, None]
+    real = scores[~is_fake][None, :]
+    return float(np.mean((fake < real) + 0.5 * (fake == real)))
+
+def test_curve_matches_score_metrics(train_deepfake):
+    scores, is_fake, _ = random_scores()
+    curve = train_deepfake.detection_curve(scores, is_fake)
+    assert np.all(np.diff(curve['thresholds']) > 0)
+    for i, threshold in enumerate(curve['thresholds']):
+        metrics = train_deepfake.score_metrics(scores, is_fake, threshold)
+        assert curve['tpr'][i] == pytest.approx(metrics['tpr'])
+        assert curve['fpr'][i] == pytest.approx(metrics['fpr'])
+    assert (curve['tpr'][0], curve['fpr'][0]) == (0, 0)
+    assert (curve['tpr'][-1], curve['fpr'][-1]) == (1, 1)
+
+@pytest.mark.parametrize('target_fpr', [0.0, 0.01, 0.05, 0.2])
+def test_threshold_for_fpr_is_highest_within_target(train_deepfake, target_fpr):
+    scores, is_fake, _ = random_scores()
+    curve = train_deepfake.detection_curve(scores, is_fake)
+    threshold = train_deepfake.threshold_for_fpr(curve, target_fpr)
+
+    assert train_deepfake.score_metrics(scores, is_fake, threshold)['fpr'] <= target_fpr
+    higher = curve['thresholds'][curve['thresholds'] > threshold]
+    if len(higher):
+        assert train_deepfake.score_metrics(scores, is_fake, higher[0])['fpr'] > target_fpr
+
+def test_evaluate_scores_report(train_deepfake):
+    scores, is_fake, sources = random_scores()
+    report = train_deepfake.evaluate_scores(scores, is_fake, sources, target_fpr=0.05, thresholds=(0.5, 0.85))
+
+    assert report['samples'] == len(scores)
+    assert report['fake_samples'] == int(is_fake.sum())
+    assert report['roc_auc'] == pytest.approx(brute_force_auc(scores, is_fake), abs=1e-6)
+    assert report['calibrated']['fpr'] <= 0.05
+    assert [m['threshold'] for m in report['at_threshold']] == [0.5, 0.85]
+
+    clipped = np.clip(scores, 1e-7, 1 - 1e-7)
+    expected_loss = -np.mean(np.where(is_fake, np.log(1 - clipped), np.log(clipped)))
+    assert report['loss'] == pytest.approx(expected_loss, abs=1e-6)
+
+    per_source = report['per_source']
+    assert set(per_source) == {'deepfakes', 'face2face', 'real'}
+    assert sum(s['samples'] for s in per_source.values()) == len(scores)
+    assert per_source['real']['fake_samples'] == 0
+    # Real samples are correct exactly when they are not flagged
+    assert per_source['real']['accuracy'] == pytest.approx(1 - per_source['real']['flagged_rate'], abs=1e-4)
+
+def test_perfect_separation(train_deepfake):
+    scores = np.array([0.1, 0.2, 0.3, 0.8, 0.9])
+    is_fake = np.array([True, True, True, False, False])
+    report = train_deepfake.evaluate_scores(scores, is_fake, np.array(['a'] * 5), target_fpr=0.0)
+    assert report['roc_auc'] == 1.0
+    assert report['pr_auc'] == 1.0
+    assert report['calibrated']['accuracy'] == 1.0
+    assert report['calibrated']['confusion'] == {'tp': 3, 'fp': 0, 'fn': 0, 'tn': 2}
+
+def test_sample_source(train_deepfake):
+    assert train_deepfake.sample_source('fake/face2face/0001.jpg') == 'face2face'
+    assert train_deepfake.sample_source('real/0001.jpg') == 'real'